@@ -18,21 +18,26 @@ class ChatbotClient(ABC):
         pass
 
     @abstractmethod
-    def chat_completion(self, message: str, model: AIModel, options: ModelOptions | None) -> Tuple[int, str]:
+    def chat_completion(self, message: str, model: AIModel, options: ModelOptions | None,
+                        system_prompt: str | None = None, history: List[Dict[str, str]] | None = None) -> Tuple[int, str]:
         """Send a message to an LLM and get the response.
         
         Args:
             message (str): The input message to send to the model
             model (AIModel): The AI model to use
             options (ModelOptions | None): Optional model parameters
+            system_prompt (str | None): System prompt for this call only; defaults to
+                the prompt set with set_system_prompt
+            history (List[Dict[str, str]] | None): Earlier messages of the conversation,
+                as {"role": ..., "content": ...} dicts
             
         Returns:
-            Tuple[int, str]: (time taken in milliseconds, model response)
+            Tuple[int, str]: (HTTP status code, model response or error message)
         """
         pass
 
     def set_system_prompt(self, prompt: str) -> None:
-        """Set the system prompt for the chat session.
+        """Set the default system prompt, used by calls that do not pass their own.
         
         Args:
             prompt (str): The system prompt to set
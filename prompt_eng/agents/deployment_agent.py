@@ -6,7 +6,7 @@ import subprocess
 import logging
 from pathlib import Path
 from bot_deployer import BotDeployer
-from clients import bootstrap_client_and_model
+from clients.registry import ClientRegistry, default_registry
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -28,18 +28,26 @@ class DeploymentGuide:
     configuration_files: Dict[str, str]  # filename -> content
 
 class DeploymentAgent:
-    def __init__(self):
+    def __init__(self, registry: Optional[ClientRegistry] = None):
         self.deployer = BotDeployer()
-        # Initialize client for generating deployment configs
-        self.client, self.model = bootstrap_client_and_model(
-            preferred_model="codellama"  # Prefer code-savvy model
-        )
+        # Client for generating deployment configs, fetched on first use
+        self.registry = registry or default_registry()
+        self.client = None
+        self.model = None
         self.deployment_dir = Path("deployed_bots")
         self.deployment_dir.mkdir(exist_ok=True)
+
+    async def initialize(self):
+        """Fetch the shared async client and model on first use"""
+        if self.client is None:
+            # Prefer code-savvy model
+            self.client, self.model = await self.registry.get("codellama")
     
     async def deploy(self, generated_bot: dict) -> dict:
         """Deploy the generated bot and return deployment information"""
         try:
+            await self.initialize()
+            
             bot_name = generated_bot.get("name", "default_bot")
             platform = generated_bot.get("platform", "web")
             
@@ -69,12 +77,11 @@ class DeploymentAgent:
         Include platform requirements, environment variables, and network settings.
         Respond in JSON format."""
         
-        self.client.set_system_prompt(system_prompt)
-        
-        _, config_json = self.client.chat_completion(
+        _, config_json = await self.client.chat_completion(
             json.dumps(bot_data),
             self.model,
-            None
+            None,
+            system_prompt=system_prompt
         )
         
         config_data = json.loads(config_json)
@@ -139,15 +146,14 @@ class DeploymentAgent:
         4. Configuration files (Dockerfile, kubernetes manifests)
         Respond in JSON format."""
         
-        self.client.set_system_prompt(system_prompt)
-        
-        _, guide_json = self.client.chat_completion(
+        _, guide_json = await self.client.chat_completion(
             json.dumps({
                 "bot_data": bot_data,
                 "config": config.__dict__
             }),
             self.model,
-            None
+            None,
+            system_prompt=system_prompt
         )
         
         guide_data = json.loads(guide_json)
@@ -160,16 +166,19 @@ class DeploymentAgent:
 
     async def _generate_deployment_files(self, bot_dir: Path, bot_data: dict, config: DeploymentConfig):
         """Generate necessary deployment files"""
-        # Generate Dockerfile
-        dockerfile_content = await self._generate_dockerfile(bot_data, config)
-        with open(bot_dir / "Dockerfile", "w") as f:
-            f.write(dockerfile_content)
-        
-        # Generate docker-compose.yml if needed
+        # Dockerfile always, docker-compose.yml for web bots; both are requested as one batch
+        file_instructions = {
+            "Dockerfile": "Generate a Dockerfile for the bot deployment. "
+                          "Include necessary dependencies and configuration.",
+        }
         if config.platform == "web":
-            compose_content = await self._generate_docker_compose(bot_data, config)
-            with open(bot_dir / "docker-compose.yml", "w") as f:
-                f.write(compose_content)
+            file_instructions["docker-compose.yml"] = "Generate a docker-compose.yml file for the bot deployment. " \
+                                                      "Include necessary services and configuration."
+        
+        file_contents = await self._generate_deployment_file_contents(bot_data, config, file_instructions)
+        for filename, content in file_contents.items():
+            with open(bot_dir / filename, "w") as f:
+                f.write(content)
         
         # Generate environment file
         env_content = "\n".join(f"{k}={v}" for k, v in config.environment_vars.items())
@@ -181,41 +190,28 @@ class DeploymentAgent:
             with open(bot_dir / filename, "w") as f:
                 f.write(content)
 
-    async def _generate_dockerfile(self, bot_data: dict, config: DeploymentConfig) -> str:
-        """Generate Dockerfile for the bot"""
-        system_prompt = """Generate a Dockerfile for the bot deployment.
-        Include necessary dependencies and configuration."""
-        
-        self.client.set_system_prompt(system_prompt)
+    async def _generate_deployment_file_contents(self, bot_data: dict, config: DeploymentConfig,
+                                                 file_instructions: Dict[str, str]) -> Dict[str, str]:
+        """Generate several deployment files in one batch, keyed by filename.
+        Files whose generation failed are logged and left out.
+        """
+        system_prompt = """You write deployment files for bots.
+        Follow the instruction in each request and reply with the file contents only."""
         
-        _, dockerfile = self.client.chat_completion(
-            json.dumps({
-                "bot_data": bot_data,
-                "config": config.__dict__
-            }),
-            self.model,
-            None
-        )
-        
-        return dockerfile
-
-    async def _generate_docker_compose(self, bot_data: dict, config: DeploymentConfig) -> str:
-        """Generate docker-compose.yml for the bot"""
-        system_prompt = """Generate a docker-compose.yml file for the bot deployment.
-        Include necessary services and configuration."""
-        
-        self.client.set_system_prompt(system_prompt)
-        
-        _, compose_file = self.client.chat_completion(
-            json.dumps({
-                "bot_data": bot_data,
-                "config": config.__dict__
-            }),
-            self.model,
-            None
-        )
+        payload = json.dumps({
+            "bot_data": bot_data,
+            "config": config.__dict__
+        })
+        prompts = [f"{instruction}\n\n{payload}" for instruction in file_instructions.values()]
+        results = await self.client.chat_completion_many(prompts, self.model, None, system_prompt=system_prompt)
         
-        return compose_file
+        file_contents = {}
+        for filename, (status, content) in zip(file_instructions, results):
+            if status != 200:
+                logger.error(f"Failed to generate {filename}: {content}")
+                continue
+            file_contents[filename] = content
+        return file_contents
 
 # Example usage:
 if __name__ == "__main__":
@@ -1,7 +1,8 @@
 import asyncio
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 from dataclasses import dataclass
-from ..clients import bootstrap_client_and_model
+from pathlib import Path
+from ..clients import ClientRegistry
 from .models import AIModel, ModelOptions
 from ..generator import DynamicBotGenerator, GeneratedBot
 import json
@@ -32,35 +33,61 @@ class BusinessRule:
     priority: int = 1
 
 class DynamicBotGeneratorAgent:
-    def __init__(self, preferred_model: Optional[str] = None):
+    def __init__(self, preferred_model: Optional[str] = None, use_cache: Optional[bool] = None,
+                 registry: Optional[ClientRegistry] = None):
         self.preferred_model = preferred_model
+        self.use_cache = use_cache
+        self.registry = registry
         self.bot_generator = None
     
     async def initialize(self):
         """Initialize the bot generator with the client and model"""
         if not self.bot_generator:
-            self.bot_generator = DynamicBotGenerator(self.preferred_model)
+            self.bot_generator = DynamicBotGenerator(self.preferred_model, use_cache=self.use_cache,
+                                                     registry=self.registry)
             await self.bot_generator.initialize()
     
-    async def generate_bot(self, requirements: Dict) -> GeneratedBot:
-        """Generate a bot based on the provided requirements"""
+    async def aclose(self):
+        """Shut down the underlying bot generator"""
+        if self.bot_generator:
+            await self.bot_generator.aclose()
+    
+    async def generate_bot(self, requirements: Dict, checkpoint_dir: Optional[Union[str, Path]] = None) -> GeneratedBot:
+        """Generate a bot based on the provided requirements, resuming from checkpoint_dir if given"""
         try:
             # Initialize if not already initialized
             await self.initialize()
             
-            # Convert requirements to include necessary fields
-            enhanced_requirements = {
-                **requirements,
-                "language": requirements.get("language", "python"),
-                "apis": requirements.get("apis", []),
-                "database": requirements.get("database"),
-                "async_support": requirements.get("async_support", False),
-                "error_handling": requirements.get("error_handling", True)
-            }
-            return await self.bot_generator.generate_bot(enhanced_requirements)
+            return await self.bot_generator.generate_bot(self._enhance(requirements), checkpoint_dir)
         except Exception as e:
             logger.error(f"Failed to generate bot: {str(e)}")
             raise Exception(f"Failed to generate bot: {str(e)}")
+    
+    async def update_bot(self, bot: GeneratedBot, old_requirements: Dict, requirements: Dict,
+                         checkpoint_dir: Optional[Union[str, Path]] = None) -> GeneratedBot:
+        """Regenerate only the parts of bot affected by the change from old_requirements to requirements"""
+        try:
+            await self.initialize()
+            return await self.bot_generator.update_bot(bot, self._enhance(old_requirements),
+                                                       self._enhance(requirements), checkpoint_dir)
+        except Exception as e:
+            logger.error(f"Failed to update bot: {str(e)}")
+            raise Exception(f"Failed to update bot: {str(e)}")
+    
+    def uses_fallback(self, bot: GeneratedBot) -> bool:
+        """Whether bot was partly built from fallback templates"""
+        return self.bot_generator is not None and self.bot_generator.uses_fallback(bot)
+    
+    def _enhance(self, requirements: Dict) -> Dict:
+        """Convert requirements to include necessary fields"""
+        return {
+            **requirements,
+            "language": requirements.get("language", "python"),
+            "apis": requirements.get("apis", []),
+            "database": requirements.get("database"),
+            "async_support": requirements.get("async_support", False),
+            "error_handling": requirements.get("error_handling", True)
+        }
 
 # Example usage
 if __name__ == "__main__":
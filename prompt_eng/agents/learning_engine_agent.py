@@ -4,7 +4,7 @@ from dataclasses import dataclass
 import json
 from pathlib import Path
 import hashlib
-from clients import bootstrap_client_and_model
+from clients.registry import ClientRegistry, default_registry
 from document import Document
 from vector_store import VectorStore
 
@@ -27,11 +27,11 @@ class KnowledgeBase:
         self.documents = self.documents or []
 
 class LearningEngineAgent:
-    def __init__(self):
-        # Initialize client with LLaMA-2 (or fallback to available model)
-        self.client, self.model = bootstrap_client_and_model(
-            preferred_model="llama2"
-        )
+    def __init__(self, registry: Optional[ClientRegistry] = None):
+        # Client with LLaMA-2 (or fallback to available model), fetched on first use
+        self.registry = registry or default_registry()
+        self.client = None
+        self.model = None
         self.vector_store = VectorStore()
         self.knowledge_base = KnowledgeBase(
             documents=[],
@@ -39,26 +39,30 @@ class LearningEngineAgent:
             last_updated=""
         )
     
+    async def initialize(self):
+        """Fetch the shared async client and model on first use"""
+        if self.client is None:
+            self.client, self.model = await self.registry.get("llama2")
+    
     async def process_documents(self, file_paths: List[str]) -> List[ProcessedDocument]:
         """Process and analyze documents using LLaMA-2"""
+        await self.initialize()
         processed_docs = []
         
-        for file_path in file_paths:
-            # Read document content
-            content = await self._read_document(file_path)
-            
+        # Read every document first so the analyses can go out as one batch
+        contents = [await self._read_document(file_path) for file_path in file_paths]
+        
+        # Process documents using LLaMA-2
+        system_prompt = """You are a document analysis expert. Extract key information, 
+        create a summary, and identify main points from the document. 
+        Respond in JSON format with 'summary' and 'key_points' fields."""
+        
+        results = await self.client.chat_completion_many(contents, self.model, None, system_prompt=system_prompt)
+        
+        for file_path, content, (_, analysis_json) in zip(file_paths, contents, results):
             # Generate document ID
             doc_id = self._generate_doc_id(file_path, content)
             
-            # Process document using LLaMA-2
-            system_prompt = """You are a document analysis expert. Extract key information, 
-            create a summary, and identify main points from the document. 
-            Respond in JSON format with 'summary' and 'key_points' fields."""
-            
-            self.client.set_system_prompt(system_prompt)
-            
-            _, analysis_json = self.client.chat_completion(content, self.model, None)
-            
             try:
                 analysis = json.loads(analysis_json)
                 processed_doc = ProcessedDocument(
@@ -82,23 +86,21 @@ class LearningEngineAgent:
 
     async def build_knowledge_base(self, processed_docs: List[ProcessedDocument]):
         """Build knowledge base using vector embeddings"""
+        await self.initialize()
+        # Generate embeddings using LLaMA-2
+        system_prompt = """Generate a semantic embedding for the following text.
+        Focus on key concepts and relationships."""
+        
+        # Combine summary and key points for embedding
+        embedding_texts = [
+            f"{doc.summary}\n" + "\n".join(doc.key_points)
+            for doc in processed_docs
+        ]
+        
+        # Get embeddings from model in one batch
+        await self.client.chat_completion_many(embedding_texts, self.model, None, system_prompt=system_prompt)
+        
         for doc in processed_docs:
-            # Generate embeddings using LLaMA-2
-            system_prompt = """Generate a semantic embedding for the following text.
-            Focus on key concepts and relationships."""
-            
-            self.client.set_system_prompt(system_prompt)
-            
-            # Combine summary and key points for embedding
-            embedding_text = f"{doc.summary}\n" + "\n".join(doc.key_points)
-            
-            # Get embedding from model
-            _, embedding_response = self.client.chat_completion(
-                embedding_text,
-                self.model,
-                None
-            )
-            
             # Store document in vector store
             document = Document(
                 content=doc.content,
@@ -115,11 +117,10 @@ class LearningEngineAgent:
     
     async def query_knowledge_base(self, query: str) -> Dict:
         """Query knowledge base using RAG"""
+        await self.initialize()
         system_prompt = """You are a knowledge base assistant. Use the provided context 
         to answer the question. If unsure, say so."""
         
-        self.client.set_system_prompt(system_prompt)
-        
         # Find relevant documents
         relevant_docs = self.vector_store.search(query, top_k=3)
         
@@ -133,10 +134,11 @@ class LearningEngineAgent:
         context_str = "\n".join(context)
         
         # Generate response using RAG
-        _, response = self.client.chat_completion(
+        _, response = await self.client.chat_completion(
             f"Context:\n{context_str}\n\nQuestion: {query}",
             self.model,
-            None
+            None,
+            system_prompt=system_prompt
         )
         
         return {
@@ -1,6 +1,8 @@
 import asyncio
-from typing import Dict, Optional
+import sys
+from typing import Dict, Optional, Union
 from dataclasses import dataclass
+from pathlib import Path
 import logging
 
 # Import your agent classes (assume you have created these modules)
@@ -10,12 +12,17 @@ from agents.dynamic_bot_generator_agent import DynamicBotGeneratorAgent
 from learning_engine_agent import LearningEngineAgent
 from ui_generator_agent import UIGeneratorAgent
 from deployment_agent import DeploymentAgent
-from clients import bootstrap_client_and_model
+from clients.registry import ClientRegistry
+from generator import GeneratedBot
+from generator.pipeline import GenerationPipeline, PipelineError, Stage
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Where the steps of a workflow run with a run id are checkpointed until it completes
+DEFAULT_CHECKPOINT_DIR = Path("generated_bots") / ".workflow"
+
 @dataclass
 class WorkflowContext:
     user_requirements: Dict
@@ -25,75 +32,147 @@ class WorkflowContext:
     deployment_info: Optional[Dict] = None
 
 class MainOrchestratorAgent:
-    def __init__(self):
+    def __init__(self, registry: Optional[ClientRegistry] = None):
+        # All agents share one registry, so they reuse a client and model list per host
+        self._owns_registry = registry is None
+        self.registry = registry or ClientRegistry()
+        
         # Initialize all agents
         try:
-            self.user_agent = UserInteractionAgent()
-            self.req_analysis_agent = RequirementAnalysisAgent()
-            self.bot_generator = DynamicBotGeneratorAgent()
-            self.learning_engine = LearningEngineAgent()
-            self.ui_generator = UIGeneratorAgent()
-            self.deployment_agent = DeploymentAgent()
+            self.user_agent = UserInteractionAgent(registry=self.registry)
+            self.req_analysis_agent = RequirementAnalysisAgent(registry=self.registry)
+            self.bot_generator = DynamicBotGeneratorAgent(registry=self.registry)
+            self.learning_engine = LearningEngineAgent(registry=self.registry)
+            self.ui_generator = UIGeneratorAgent(registry=self.registry)
+            self.deployment_agent = DeploymentAgent(registry=self.registry)
         except Exception as e:
             logger.error(f"Failed to initialize agents: {str(e)}")
             raise
     
-    async def orchestrate_workflow(self) -> Dict:
-        """Main workflow orchestration"""
-        workflow = WorkflowContext(user_requirements={})
-        
-        try:
-            # Step 1: Get user requirements
-            logger.info("Step 1: Gathering user requirements...")
-            raw_requirements = await self.user_agent.get_user_input()
-            
-            # Step 2: Analyze requirements
-            logger.info("Step 2: Analyzing requirements...")
-            analysis_result = await self.req_analysis_agent.analyze(raw_requirements)
-            workflow.user_requirements = analysis_result["requirements"]
-            
-            # Step 3: Process any provided documents for learning
-            if "documents" in workflow.user_requirements:
-                logger.info("Step 3: Processing provided documents...")
-                docs = workflow.user_requirements["documents"]
-                processed_docs = await self.learning_engine.process_documents(docs)
-                await self.learning_engine.build_knowledge_base(processed_docs)
-                workflow.knowledge_base = {
-                    "processed_documents": len(processed_docs),
-                    "status": "ready"
-                }
-            
-            # Step 4: Generate bot code
-            logger.info("Step 4: Generating bot code...")
-            generated_bot = await self.bot_generator.generate_bot(workflow.user_requirements)
-            workflow.generated_bot = {
+    async def aclose(self):
+        """Release shared clients; an injected registry is left for its owner to close"""
+        await self.bot_generator.aclose()
+        if self._owns_registry:
+            await self.registry.aclose()
+    
+    async def initialize(self):
+        """Fetch every agent's client concurrently; the registry bootstraps each host once"""
+        await asyncio.gather(
+            self.user_agent.initialize(),
+            self.req_analysis_agent.initialize(),
+            self.bot_generator.initialize(),
+            self.learning_engine.initialize(),
+            self.ui_generator.initialize(),
+            self.deployment_agent.initialize()
+        )
+    
+    def _build_pipeline(self, checkpoint_dir: Optional[Path] = None) -> GenerationPipeline:
+        """
+        Workflow steps as a stage graph: knowledge base, bot and UI only depend
+        on the requirements, so they run concurrently; deployment needs the bot and UI
+        """
+        async def generate_bot(requirements: Dict) -> Dict:
+            generated_bot = await self._generate_bot(requirements, checkpoint_dir and checkpoint_dir / "generation")
+            return {
                 "name": generated_bot.name,
                 "code": generated_bot.code,
                 "conversation_flow": generated_bot.conversation_flow,
                 "business_rules": generated_bot.business_rules
             }
+
+        return GenerationPipeline([
+            # Requirements come from the user, so a rerun asks for them again rather than
+            # reusing answers from another session; later steps resume if they are unchanged
+            Stage("requirements", self._gather_requirements, checkpoint=False),
+            Stage("knowledge_base", self._process_documents, ["requirements"]),
+            # A bot built from fallback templates or a failed UI gets another try on the rerun
+            Stage("bot", generate_bot, ["requirements"],
+                  checkpoint=lambda bot: not self.bot_generator.uses_fallback(GeneratedBot(**bot))),
+            Stage("ui", self._generate_ui, ["requirements"], checkpoint=lambda ui: ui is not None),
+            # Deployment results hold guide objects and deploying is not worth skipping
+            Stage("deployment", self._deploy, ["requirements", "bot", "ui"], checkpoint=False)
+        ])
+
+    async def orchestrate_workflow(self, run_id: Optional[str] = None,
+                                   checkpoint_dir: Union[str, Path] = DEFAULT_CHECKPOINT_DIR) -> Dict:
+        """
+        Main workflow orchestration. With a run_id, completed steps are
+        checkpointed under checkpoint_dir/run_id, so rerunning with the same
+        run_id after a failure resumes from the failed step
+        """
+        workflow = WorkflowContext(user_requirements={})
+        run_dir = Path(checkpoint_dir) / run_id if run_id else None
+        
+        try:
+            await self.initialize()
             
-            # Step 5: Generate UI if needed
-            if workflow.user_requirements.get("ui_preferences"):
-                logger.info("Step 5: Generating UI...")
-                ui_code = self.ui_generator.generate_ui(workflow.user_requirements)
-                workflow.ui_design = {"ui_code": ui_code}
-                workflow.generated_bot["code"]["ui.jsx"] = ui_code
-            
-            # Step 6: Deploy the bot
-            logger.info("Step 6: Deploying bot...")
-            deployment_info = await self.deployment_agent.deploy({
-                **workflow.generated_bot,
-                "platform": workflow.user_requirements.get("platform", "web")
-            })
-            workflow.deployment_info = deployment_info
+            result = await self._build_pipeline(run_dir).run({}, checkpoint_dir=run_dir)
+            outputs = result.outputs
+            workflow.user_requirements = outputs["requirements"]
+            workflow.knowledge_base = outputs["knowledge_base"]
+            workflow.generated_bot = outputs["bot"]
+            if outputs["ui"]:
+                workflow.ui_design = outputs["ui"]
+                workflow.generated_bot["code"]["ui.jsx"] = outputs["ui"]["ui_code"]
+            workflow.deployment_info = outputs["deployment"]
             
             # Return complete workflow summary
             return self._generate_workflow_summary(workflow)
             
+        except PipelineError as e:
+            return await self._handle_error(e.error, e.stage)
         except Exception as e:
             return await self._handle_error(e, "workflow_orchestration")
 
+    async def _gather_requirements(self) -> Dict:
+        """Steps 1-2: Get user requirements and analyze them"""
+        logger.info("Step 1: Gathering user requirements...")
+        raw_requirements = await self.user_agent.get_user_input()
+        
+        logger.info("Step 2: Analyzing requirements...")
+        analysis_result = await self.req_analysis_agent.analyze(raw_requirements)
+        return analysis_result["requirements"]
+
+    async def _process_documents(self, requirements: Dict) -> Optional[Dict]:
+        """Step 3: Process any provided documents for learning"""
+        if "documents" not in requirements:
+            return None
+        logger.info("Step 3: Processing provided documents...")
+        processed_docs = await self.learning_engine.process_documents(requirements["documents"])
+        await self.learning_engine.build_knowledge_base(processed_docs)
+        return {
+            "processed_documents": len(processed_docs),
+            "status": "ready"
+        }
+
+    async def _generate_bot(self, requirements: Dict, checkpoint_dir: Optional[Path] = None):
+        """Step 4: Generate bot code"""
+        logger.info("Step 4: Generating bot code...")
+        return await self.bot_generator.generate_bot(requirements, checkpoint_dir)
+
+    async def _generate_ui(self, requirements: Dict) -> Optional[Dict]:
+        """Step 5: Generate UI if needed"""
+        if not requirements.get("ui_preferences"):
+            return None
+        logger.info("Step 5: Generating UI...")
+        result = await self.ui_generator.generate_ui(requirements)
+        if result.get("status") != "success":
+            logger.error(f"UI generation failed: {result.get('error')}")
+            return None
+        return {"ui_code": result["ui_code"]}
+
+    async def _deploy(self, requirements: Dict, bot: Dict, ui: Optional[Dict]) -> Dict:
+        """Step 6: Deploy the bot"""
+        logger.info("Step 6: Deploying bot...")
+        code = dict(bot["code"])
+        if ui:
+            code["ui.jsx"] = ui["ui_code"]
+        return await self.deployment_agent.deploy({
+            **bot,
+            "code": code,
+            "platform": requirements.get("platform", "web")
+        })
+
     def _generate_workflow_summary(self, workflow: WorkflowContext) -> Dict:
         """Generate a summary of the complete workflow"""
         return {
@@ -126,7 +205,11 @@ if __name__ == "__main__":
         print("This system will help you create, customize, and deploy your bot.")
         print("\nStarting workflow...")
         
-        result = await orchestrator.orchestrate_workflow()
+        try:
+            # Pass a run id to resume that run after a failure
+            result = await orchestrator.orchestrate_workflow(sys.argv[1] if len(sys.argv) > 1 else None)
+        finally:
+            await orchestrator.aclose()
         
         if result["status"] == "success":
             print("\nBot creation successful!")
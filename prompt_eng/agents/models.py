@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 
 # need to choose common features here between ollama API
 # and openwebUI API
@@ -119,6 +119,31 @@ class ModelOptions():
     similarity_threshold: float = 0.65
     max_context_length: int = 3000
 
+    # retrieval settings used by the RAG pipeline, never sent to the model
+    _LOCAL_FIELDS = ("rag_context_weight", "similarity_threshold", "max_context_length")
+
+    def to_openai_params(self) -> dict:
+        """top-level fields of an OpenAI-compatible chat completion request"""
+        params = {
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+            "top_p": self.top_p,
+            "seed": self.seed,
+            "stop": self.stop,
+            "presence_penalty": self.presence_penalty,
+            "frequency_penalty": self.frequency_penalty
+        }
+        return {key: value for key, value in params.items() if value is not None}
+
+    def to_ollama_options(self) -> dict:
+        """the "options" object of a native Ollama request, using Ollama's parameter names"""
+        renamed = {"max_tokens": "num_predict", "context_window_size": "num_ctx"}
+        return {
+            renamed.get(field.name, field.name): getattr(self, field.name)
+            for field in fields(self)
+            if field.name not in self._LOCAL_FIELDS and getattr(self, field.name) is not None
+        }
+
     def validate(self):
         if self.temperature:
             if not isinstance(self.temperature, float):
@@ -17,10 +17,6 @@ class RAGPipeline:
         {context}
         
         If the answer isn't in the context, say 'I don't know based on the documents provided'."""
-        self._init_system_prompt()
-    
-    def _init_system_prompt(self):
-        self.client.set_system_prompt(self.base_prompt)
 
     async def ingest_documents(self, file_paths: List[str]):
         """Process and store documents"""
@@ -47,12 +43,12 @@ class RAGPipeline:
             if not context:
                 return "No relevant information found in the uploaded documents."
             
-            # Update system prompt with current context
+            # Build the system prompt for this query only; the client may be shared
             formatted_context = "\n".join([doc.content for doc in context])
-            self.client.set_system_prompt(self.base_prompt.format(context=formatted_context))
+            system_prompt = self.base_prompt.format(context=formatted_context)
             
             # Use existing chat completion flow
-            _, response = self.client.chat_completion(question, self.model, options)
+            _, response = self.client.chat_completion(question, self.model, options, system_prompt=system_prompt)
             return response
         except Exception as e:
             return f"Error processing query: {str(e)}" 
\ No newline at end of file
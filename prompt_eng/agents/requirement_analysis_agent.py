@@ -1,18 +1,27 @@
-from typing import Dict
+import asyncio
+from typing import Dict, Optional
 from analysis.context_builder import ContextBuilder
-from clients import bootstrap_client_and_model
+from clients.registry import ClientRegistry, default_registry
+from clients.models import options_for
 
 class RequirementAnalysisAgent:
-    def __init__(self):
+    def __init__(self, registry: Optional[ClientRegistry] = None):
         self.context_builder = ContextBuilder()
-        # Initialize client and model once
-        self.client, self.model = bootstrap_client_and_model(
-            preferred_model="qwen2"  # Use available model from config
-        )
+        self.registry = registry or default_registry()
+        self.client = None
+        self.model = None
+
+    async def initialize(self):
+        """Fetch the shared async client and model on first use"""
+        if self.client is None:
+            # Use available model from config if qwen2 is missing
+            self.client, self.model = await self.registry.get("qwen2")
     
     async def analyze(self, user_description: str) -> Dict:
         """Analyze requirements and provide comprehensive analysis"""
         try:
+            await self.initialize()
+            
             # Set up system prompt
             system_prompt = """Analyze the bot requirements and extract:
             1. Primary intent/purpose
@@ -21,13 +30,12 @@ class RequirementAnalysisAgent:
             4. Complexity level
             Respond in JSON format."""
             
-            self.client.set_system_prompt(system_prompt)
-            
             # Get analysis from model
-            _, analysis_json = self.client.chat_completion(
+            _, analysis_json = await self.client.chat_completion(
                 user_description,
                 self.model,
-                None
+                options_for("analysis"),
+                system_prompt=system_prompt
             )
             
             # Build context using the analysis
@@ -48,5 +56,5 @@ class RequirementAnalysisAgent:
 if __name__ == "__main__":
     agent = RequirementAnalysisAgent()
     sample_description = "I want a weather bot that is playful and provides daily summaries."
-    requirements = agent.analyze(sample_description)
+    requirements = asyncio.run(agent.analyze(sample_description))
     print("Extracted requirements:", requirements) 
\ No newline at end of file
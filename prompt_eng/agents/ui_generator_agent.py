@@ -1,29 +1,38 @@
+import asyncio
 from typing import Dict, Optional
-from clients import bootstrap_client_and_model
+from clients.registry import ClientRegistry, default_registry
+from clients.models import options_for
 
 class UIGeneratorAgent:
-    def __init__(self):
-        self.client, self.model = bootstrap_client_and_model(
-            preferred_model="qwen2"
-        )
+    def __init__(self, registry: Optional[ClientRegistry] = None):
+        self.registry = registry or default_registry()
+        self.client = None
+        self.model = None
+
+    async def initialize(self):
+        """Fetch the shared async client and model on first use"""
+        if self.client is None:
+            # Falls back to an available model if qwen2 is missing
+            self.client, self.model = await self.registry.get("qwen2")
     
     async def generate_ui(self, requirements: Dict) -> Dict:
         """Generate UI code based on requirements"""
         try:
+            await self.initialize()
+            
             system_prompt = """Generate a modern, responsive UI using React and Tailwind CSS.
             Consider the user's design preferences and bot type.
             Return complete, functional component code."""
             
-            self.client.set_system_prompt(system_prompt)
-            
             design_prompt = f"""Create a UI for a {requirements.get('bot_type', 'generic')} bot with:
             Style: {requirements.get('ui_preferences', {}).get('design', 'modern')}
             Features: {requirements.get('features', [])}"""
             
-            _, ui_code = self.client.chat_completion(
+            _, ui_code = await self.client.chat_completion(
                 design_prompt,
                 self.model,
-                None
+                options_for("code"),
+                system_prompt=system_prompt
             )
             
             return {
@@ -66,4 +75,4 @@ export default function BotUI() {
 if __name__ == "__main__":
     agent = UIGeneratorAgent()
     sample_requirements = {"design": "Playful, bright colors with rounded buttons"}
-    print("Generated UI Code:", agent.generate_ui(sample_requirements)) 
\ No newline at end of file
+    print("Generated UI Code:", asyncio.run(agent.generate_ui(sample_requirements))) 
\ No newline at end of file
@@ -2,7 +2,8 @@ import asyncio
 import json
 from typing import Dict, Optional, Tuple, List
 from dataclasses import dataclass
-from clients import bootstrap_client_and_model
+from clients.registry import ClientRegistry, default_registry
+from clients.models import options_for
 
 @dataclass
 class BotIntent:
@@ -64,7 +65,7 @@ class ConversationContext:
         }
 
 class UserInteractionAgent:
-    def __init__(self):
+    def __init__(self, registry: Optional[ClientRegistry] = None):
         self.context = ConversationContext()
         self._clarifying_questions = {
             "bot_type": "What type of bot would you like to create?",
@@ -72,14 +73,19 @@ class UserInteractionAgent:
             "data_source": "What data source should the bot use?",
             "ui_preferences": "Do you have any specific UI preferences?"
         }
-        # Initialize client and model once during initialization
-        self.client, self.model = bootstrap_client_and_model(
-            # Prefer models optimized for conversation/analysis
-            preferred_model="qwen2"  # Will fall back to available model if not found
-        )
+        self.registry = registry or default_registry()
+        self.client = None
+        self.model = None
+
+    async def initialize(self):
+        """Fetch the shared async client and model on first use"""
+        if self.client is None:
+            # Prefer models optimized for conversation/analysis; falls back to an available model
+            self.client, self.model = await self.registry.get("qwen2")
     
     async def get_user_input(self) -> str:
         """Main entry point for user interaction"""
+        await self.initialize()
         print("Please describe the bot you want to create:")
         loop = asyncio.get_event_loop()
         raw_input = await loop.run_in_executor(None, input)
@@ -106,9 +112,7 @@ class UserInteractionAgent:
         and extract the primary intent, required AI models, functionalities, and integrations. 
         Respond in JSON format."""
         
-        self.client.set_system_prompt(system_prompt)
-        
-        _, intent_json = self.client.chat_completion(user_input, self.model, None)
+        _, intent_json = await self.client.chat_completion(user_input, self.model, options_for("intent"), system_prompt=system_prompt)
         
         try:
             intent_data = json.loads(intent_json)
@@ -127,18 +131,17 @@ class UserInteractionAgent:
         suggest appropriate APIs and assess their integration complexity. Include alternatives
         where applicable. Respond in JSON format."""
         
-        self.client.set_system_prompt(system_prompt)
-        
         analysis_input = {
             "bot_type": context.bot_type,
             "features": context.features,
             "intent": context.intent.to_json() if context.intent else {}
         }
         
-        _, api_json = self.client.chat_completion(
+        _, api_json = await self.client.chat_completion(
             json.dumps(analysis_input), 
             self.model, 
-            None
+            options_for("analysis"),
+            system_prompt=system_prompt
         )
         
         try:
@@ -164,18 +167,18 @@ class UserInteractionAgent:
         and identify missing information about bot type, features, data sources, and UI preferences.
         Respond with only the most important clarifying question."""
         
-        self.client.set_system_prompt(system_prompt)
-        
         # Continue conversation until all required info is gathered
         while not self._is_context_complete():
             # Get next clarifying question based on missing information
             next_question = self._get_next_question()
             
             # Use configured model to generate contextually appropriate question
-            _, refined_question = self.client.chat_completion(
-                json.dumps(self.context.conversation_history) + f"\nNext question: {next_question}",
+            _, refined_question = await self.client.chat_completion(
+                f"Next question: {next_question}",
                 self.model,
-                None
+                options_for("chat"),
+                system_prompt=system_prompt,
+                history=self.context.conversation_history
             )
             
             # Get user's response
@@ -200,13 +203,12 @@ class UserInteractionAgent:
         system_prompt = """You are a requirements structuring assistant. Convert the conversation 
         history into a structured JSON format with bot_type, features, data_source, and ui_preferences."""
         
-        self.client.set_system_prompt(system_prompt)
-        
         # Generate structured output
-        _, structured_json = self.client.chat_completion(
+        _, structured_json = await self.client.chat_completion(
             json.dumps(context.conversation_history),
             self.model,
-            None
+            options_for("analysis"),
+            system_prompt=system_prompt
         )
         
         try:
@@ -11,7 +11,8 @@ class ChatbotClient(ABC):
         pass
 
     @abstractmethod
-    def chat_completion(self, message: str, model: AIModel, options: ModelOptions | None) -> Tuple[int, str]:
+    def chat_completion(self, message: str, model: AIModel, options: ModelOptions | None,
+                        system_prompt: str | None = None, history: List[Dict[str, str]] | None = None) -> Tuple[int, str]:
         pass
 
     def set_system_prompt(self, prompt: str) -> None:
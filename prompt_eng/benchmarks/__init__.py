@@ -0,0 +1,3 @@
+"""
+Benchmarks and local stand-ins for measuring Mother of Bots performance
+"""
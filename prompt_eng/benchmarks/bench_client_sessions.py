@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""
+Compare per-call latency of a fresh HTTP session per request (the old client
+behaviour) against the pooled, keep-alive session owned by each client.
+
+Runs against a local stand-in server, so the numbers isolate connection setup
+cost from model latency. TLS is not involved locally; against an HTTPS host the
+gap is larger because every fresh session also pays a TLS handshake.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from prompt_eng.benchmarks.fake_server import FakeLLMServer
+from prompt_eng.clients import OpenWebUIClient
+from prompt_eng.clients.models import AIModel
+
+def summarize(label: str, samples: List[float]) -> str:
+    ordered = sorted(samples)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    return (f"{label:<16} mean={statistics.mean(samples):7.2f}ms "
+            f"p50={statistics.median(samples):7.2f}ms p95={p95:7.2f}ms")
+
+async def run_fresh_sessions(url: str, model: AIModel, calls: int) -> List[float]:
+    """One client (and therefore one session) per call, closed afterwards"""
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        client = OpenWebUIClient(host=url, bearer="bench")
+        await client.chat_completion("ping", model)
+        await client.aclose()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+async def run_pooled_session(url: str, model: AIModel, calls: int) -> List[float]:
+    """One long-lived client reused for every call"""
+    samples = []
+    async with OpenWebUIClient(host=url, bearer="bench") as client:
+        for _ in range(calls):
+            start = time.perf_counter()
+            await client.chat_completion("ping", model)
+            samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+async def main(calls: int):
+    async with FakeLLMServer() as server:
+        model = AIModel(id=server.model_id)
+        fresh = await run_fresh_sessions(server.url, model, calls)
+        pooled = await run_pooled_session(server.url, model, calls)
+    
+    print(f"{calls} sequential chat completions against {server.url}")
+    print(summarize("fresh session", fresh))
+    print(summarize("pooled session", pooled))
+    print(f"speedup (mean): {statistics.mean(fresh) / statistics.mean(pooled):.2f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200, help="Number of calls per mode")
+    args = parser.parse_args()
+    asyncio.run(main(args.calls))
@@ -0,0 +1,434 @@
+#!/usr/bin/env python
+"""
+End-to-end benchmarks for bot generation, bot loading and MasterBot message handling.
+
+Measures DynamicBotGenerator.generate_bot (wall time and per stage), a run
+of similar bots sharing an artifact store (with per-stage hit rates),
+updating a 300-line bot.py through an LLM edit versus regenerating it
+(with output tokens), BotManager start-up with many stored bots, and MasterBot.process_message on
+the rule-based and LLM paths, with the Python memory high-water mark of
+each. The LLM is either MockChatbotClient with simulated latency or the real
+Ollama client talking to a local FakeLLMServer, so no GPU box is needed.
+
+Results are written as JSON and compared against a stored baseline; a
+benchmark whose median time or peak memory grew by more than the threshold
+is reported as a regression and the script exits with status 1. Baselines
+are machine specific: regenerate one on the reference machine with
+--save-baseline.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from prompt_eng.benchmarks.fake_server import FakeLLMServer
+from prompt_eng.clients import MockChatbotClient, OllamaClient
+from prompt_eng.clients.metrics import estimate_tokens
+from prompt_eng.clients.models import AIModel
+from prompt_eng.clients.simulation import LatencyModel
+from prompt_eng.generator import DynamicBotGenerator
+from prompt_eng.generator.bot_generator import CodeGenerator
+from prompt_eng.generator.artifacts import ArtifactStore
+from prompt_eng.manager import BotManager, MasterBot
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+
+REQUIREMENTS = {
+    "name": "WeatherBot",
+    "type": "weather",
+    "features": ["daily_forecast", "location_based"],
+    "platform": "web",
+    "apis": [{"name": "OpenWeatherMap", "version": "2.5"}],
+    "database": "sqlite",
+    "language": "python"
+}
+
+# The bot creation conversation from test_master_bot.py
+CONVERSATION = [
+    "Create a new bot",
+    "Customer service bot",
+    "SupportHelper",
+    "ticket creation, FAQ search",
+    "yes",
+    "List my bots",
+    "Tell me about SupportHelper"
+]
+
+_canned = MockChatbotClient()
+
+async def canned_reply(messages: List[Dict[str, Any]]) -> str:
+    """Fake server responder giving the same answers as the mock client"""
+    _, content = await _canned.chat_completion(messages[-1].get("content", "") if messages else "", AIModel(id="mock"))
+    return content
+
+class Backend:
+    """The LLM client every benchmark uses: a simulated mock or the Ollama client against a fake server"""
+    def __init__(self, kind: str = "mock", latency: float = 0.0, tokens_per_second: float = 0.0, seed: int = 1):
+        self.kind = kind
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.seed = seed
+        self.server: Optional[FakeLLMServer] = None
+        self.client: Any = None
+        self.model: Optional[AIModel] = None
+
+    async def __aenter__(self):
+        if self.kind == "fake-server":
+            self.server = FakeLLMServer(
+                responder=canned_reply,
+                response_delay=self.latency,
+                token_delay=1 / self.tokens_per_second if self.tokens_per_second else 0.0
+            )
+            await self.server.start()
+            self.client = OllamaClient(self.server.url)
+            self.model = AIModel(id=self.server.model_id)
+        else:
+            self.client = MockChatbotClient(
+                latency=LatencyModel.fixed(self.latency),
+                tokens_per_second=self.tokens_per_second or None,
+                seed=self.seed
+            )
+            self.model = AIModel(id="mock")
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.client.aclose()
+        if self.server is not None:
+            await self.server.stop()
+
+    def attach(self, generator: DynamicBotGenerator) -> None:
+        """Point a generator and its components at the benchmark client"""
+        generator.client, generator.model = self.client, self.model
+        for component in (generator.code_generator, generator.flow_designer, generator.rule_engine):
+            component.client, component.model = self.client, self.model
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Summary statistics in seconds"""
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "mean": statistics.mean(ordered),
+        "p50": statistics.median(ordered),
+        "p95": ordered[max(0, int(len(ordered) * 0.95 + 0.5) - 1)],
+        "min": ordered[0],
+        "max": ordered[-1]
+    }
+
+async def peak_memory_mb(run: Callable[[], Awaitable[Any]]) -> float:
+    """Peak memory allocated by Python objects during one run"""
+    tracemalloc.start()
+    try:
+        await run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2 ** 20
+
+async def bench_generate_bot(backend: Backend, iterations: int) -> Dict[str, Any]:
+    generator = DynamicBotGenerator(use_cache=False)
+    backend.attach(generator)
+    samples: List[float] = []
+    stages: Dict[str, List[float]] = {}
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await generator.generate_bot(dict(REQUIREMENTS))
+        samples.append(time.perf_counter() - started)
+        for stage, seconds in generator.stage_timings.items():
+            stages.setdefault(stage, []).append(seconds)
+
+    result = summarize(samples)
+    result["stages"] = {stage: summarize(values) for stage, values in stages.items()}
+    result["peak_memory_mb"] = await peak_memory_mb(lambda: generator.generate_bot(dict(REQUIREMENTS)))
+    return result
+
+# Bots that differ in name and feature order only, then one with another feature set
+SIMILAR_BOTS = [
+    dict(REQUIREMENTS, name="WeatherBot"),
+    dict(REQUIREMENTS, name="ForecastBot", features=["location_based", "daily_forecast"]),
+    dict(REQUIREMENTS, name="StormBot", features=["alerts", "daily_forecast"]),
+    dict(REQUIREMENTS, name="SkyBot")
+]
+
+async def bench_generate_similar_bots(backend: Backend, iterations: int) -> Dict[str, Any]:
+    """Generate SIMILAR_BOTS against an empty in-memory artifact store each iteration"""
+    samples: List[float] = []
+    hit_rates: Dict[str, float] = {}
+
+    async def generate_all(record: bool):
+        generator = DynamicBotGenerator(use_cache=False, artifacts=ArtifactStore(None))
+        backend.attach(generator)
+        started = time.perf_counter()
+        for requirements in SIMILAR_BOTS:
+            await generator.generate_bot(dict(requirements))
+        if record:
+            samples.append(time.perf_counter() - started)
+            hit_rates.update({stage: counts["hit_rate"] for stage, counts in generator.artifacts.report().items()})
+
+    for _ in range(iterations):
+        await generate_all(record=True)
+    result = summarize(samples)
+    result["artifact_hit_rates"] = hit_rates
+    result["peak_memory_mb"] = await peak_memory_mb(lambda: generate_all(record=False))
+    return result
+
+def build_bot_file(methods: int = 40) -> str:
+    """A generated-looking bot.py of about 300 lines"""
+    lines = ["import aiohttp", "import json", "import logging", "", "logger = logging.getLogger(__name__)", "",
+             "", "class WeatherBot:", "    def __init__(self, api_key):", "        self.api_key = api_key",
+             "        self.base_url = \"https://api.openweathermap.org/data/2.5\"", ""]
+    for i in range(methods):
+        lines += [f"    async def handle_intent_{i}(self, location=None):",
+                  f"        \"\"\"Answer intent {i} for a location\"\"\"",
+                  f"        data = await self._fetch(\"endpoint_{i}\", location)",
+                  f"        return self._format(data, \"intent_{i}\")", "", ""]
+    lines += ["if __name__ == \"__main__\":", "    print(WeatherBot(\"key\"))"]
+    return "\n".join(lines) + "\n"
+
+ALERTS_METHOD = """    async def get_alerts(self, location=None):
+        \"\"\"Weather alerts for a location\"\"\"
+        data = await self._fetch("alerts", location)
+        return self._format(data, "alerts")
+"""
+
+class ScriptedEditClient(MockChatbotClient):
+    """Replies to an edit request with a short diff and to anything else with the whole new file"""
+    def __init__(self, bot_file: str, **kwargs):
+        super().__init__(**kwargs)
+        self.bot_file = bot_file
+        self.requests = 0
+        self.output_tokens = 0
+
+    async def _respond(self, prompt: str) -> str:
+        self.requests += 1
+        if "Do not repeat the whole file" in prompt:
+            anchor = "    def __init__(self, api_key):"
+            response = "@@ -9,2 +9,7 @@\n" + "\n".join(
+                [" " + anchor, "         self.api_key = api_key", "+"] +
+                ["+" + line for line in ALERTS_METHOD.splitlines()]) + "\n"
+        else:
+            response = self.bot_file.replace("\nif __name__", "\n" + ALERTS_METHOD + "\n\nif __name__")
+        self.output_tokens += estimate_tokens(response)
+        return response
+
+# Simulated generation speed for the edit benchmark when the backend is instant
+EDIT_TOKENS_PER_SECOND = 10000
+
+async def bench_update_bot_code(backend: Backend, edit_mode: bool, iterations: int) -> Dict[str, Any]:
+    """
+    Add a feature to a 300-line bot.py by LLM edit or by full regeneration.
+    Always uses a scripted mock, since canned responses cannot answer edit requests
+    """
+    bot_file = build_bot_file()
+    client = ScriptedEditClient(bot_file, latency=LatencyModel.fixed(backend.latency),
+                                tokens_per_second=backend.tokens_per_second or EDIT_TOKENS_PER_SECOND)
+    generator = CodeGenerator()
+    generator.client, generator.model, generator.edit_mode = client, AIModel(id="mock"), edit_mode
+    old = {"type": "weather", "features": ["daily_forecast"]}
+    new = {"type": "weather", "features": ["alerts", "daily_forecast"]}
+    previous = {"requirements": old, "bot_code": bot_file}
+
+    async def update():
+        requests = client.requests
+        code = await generator._generate_bot_code(new, {}, [], previous)
+        # One request each way; a second one would mean the edit fell back to regeneration
+        assert "async def get_alerts" in code and client.requests == requests + 1
+
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await update()
+        samples.append(time.perf_counter() - started)
+    result = summarize(samples)
+    result["output_tokens"] = client.output_tokens // iterations
+    result["peak_memory_mb"] = await peak_memory_mb(update)
+    return result
+
+def write_stored_bots(storage_dir: Path, count: int) -> None:
+    """Write count bots in BotManager's storage layout"""
+    code = {"bot.py": "import asyncio\n" + "# generated bot\n" * 120, "config.py": "DEBUG = False\n" * 20}
+    for i in range(count):
+        name = f"Bot{i:05d}"
+        code_dir = storage_dir / name / "code"
+        code_dir.mkdir(parents=True)
+        for filename, content in code.items():
+            (code_dir / filename).write_text(content)
+        metadata = {
+            "name": name,
+            "requirements": dict(REQUIREMENTS, name=name),
+            "conversation_flow": {"intents": [{"name": "get_weather", "patterns": ["weather in *"]}]},
+            "business_rules": [{"if": "location_not_found", "then": "prompt_for_location"}],
+            "created_at": "2024-01-01 00:00:00"
+        }
+        (storage_dir / name / "metadata.json").write_text(json.dumps(metadata, indent=2))
+
+async def bench_bot_manager_load(count: int, iterations: int, workdir: Path) -> Dict[str, Any]:
+    storage_dir = workdir / f"bots_{count}"
+    write_stored_bots(storage_dir, count)
+
+    async def load():
+        manager = BotManager(str(storage_dir))
+        await manager.initialize()
+        await manager.aclose()
+        assert len(manager.list_bots()) == count
+
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await load()
+        samples.append(time.perf_counter() - started)
+    result = summarize(samples)
+    result["peak_memory_mb"] = await peak_memory_mb(load)
+    shutil.rmtree(storage_dir)
+    return result
+
+async def bench_master_bot(backend: Backend, use_llm: bool, iterations: int, workdir: Path) -> Dict[str, Any]:
+    samples: List[float] = []
+
+    async def conversation(record: bool):
+        storage_dir = Path(tempfile.mkdtemp(dir=workdir))
+        master_bot = MasterBot(storage_dir=str(storage_dir), use_llm=False)
+        await master_bot.initialize()
+        backend.attach(master_bot.bot_manager.bot_generator.bot_generator)
+        if use_llm:
+            master_bot.use_llm = True
+            master_bot.llm_client, master_bot.llm_model = backend.client, backend.model
+        for message in CONVERSATION:
+            started = time.perf_counter()
+            await master_bot.process_message(message)
+            if record:
+                samples.append(time.perf_counter() - started)
+        shutil.rmtree(storage_dir)
+
+    for _ in range(iterations):
+        await conversation(record=True)
+    result = summarize(samples)
+    result["peak_memory_mb"] = await peak_memory_mb(lambda: conversation(record=False))
+    return result
+
+async def run_benchmarks(backend_kind: str = "mock", iterations: int = 5, bot_counts: List[int] = (10, 1000, 10000),
+                         latency: float = 0.0, tokens_per_second: float = 0.0) -> Dict[str, Any]:
+    """Run every benchmark and return the results document. Expects TEST_MODE=true."""
+    results: Dict[str, Any] = {}
+    workdir = Path(tempfile.mkdtemp(prefix="mob-bench-"))
+    try:
+        async with Backend(backend_kind, latency, tokens_per_second) as backend:
+            results["generate_bot"] = await bench_generate_bot(backend, iterations)
+            results["generate_similar_bots"] = await bench_generate_similar_bots(backend, iterations)
+            results["update_bot_code_full"] = await bench_update_bot_code(backend, False, iterations)
+            results["update_bot_code_edit"] = await bench_update_bot_code(backend, True, iterations)
+            for count in bot_counts:
+                results[f"bot_manager_load_{count}"] = await bench_bot_manager_load(count, iterations, workdir)
+            results["master_bot_rule_based"] = await bench_master_bot(backend, False, iterations, workdir)
+            results["master_bot_llm"] = await bench_master_bot(backend, True, iterations, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": backend_kind,
+            "iterations": iterations,
+            "latency": latency,
+            "tokens_per_second": tokens_per_second
+        },
+        "results": results
+    }
+
+# Smaller increases are noise: one millisecond of median time, half a megabyte of memory
+MIN_DELTA = {"p50": 0.001, "peak_memory_mb": 0.5}
+
+# Results are only comparable when the simulated LLM was the same
+COMPARABLE_SETTINGS = ("backend", "latency", "tokens_per_second")
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.25) -> List[str]:
+    """Compare median times and peak memory against a baseline and return the regressions"""
+    regressions = []
+    for name, result in results["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        for metric, min_delta in MIN_DELTA.items():
+            old, new = base.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            if new - old > min_delta and new > old * (1 + threshold):
+                regressions.append(f"{name} {metric}: {old:.4f} -> {new:.4f} (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+def print_results(results: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    print(f"{'benchmark':<28}{'p50':>10}{'p95':>10}{'peak MB':>10}{'baseline p50':>14}")
+    for name, result in results["results"].items():
+        base = (baseline or {}).get("results", {}).get(name, {})
+        base_p50 = f"{base['p50'] * 1000:11.2f}ms" if "p50" in base else ""
+        print(f"{name:<28}{result['p50'] * 1000:8.2f}ms{result['p95'] * 1000:8.2f}ms"
+              f"{result['peak_memory_mb']:10.2f}{base_p50:>14}")
+        for stage, stats in result.get("stages", {}).items():
+            print(f"  {stage:<26}{stats['p50'] * 1000:8.2f}ms{stats['p95'] * 1000:8.2f}ms")
+        if "output_tokens" in result:
+            print(f"  {'output tokens':<26}{result['output_tokens']:10d}")
+        for stage, rate in result.get("artifact_hit_rates", {}).items():
+            print(f"  {stage + ' hit rate':<26}{rate:10.0%}")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backend", choices=("mock", "fake-server"), default="mock")
+    parser.add_argument("--iterations", type=int, default=5, help="Runs per benchmark")
+    parser.add_argument("--bot-counts", default="10,1000,10000", help="Stored bot counts for the load benchmark")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated time to first token in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Simulated generation speed (0: instant)")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON results")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Baseline results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown before flagging, e.g. 0.25")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    args = parser.parse_args(argv)
+    # Per-request logging would dominate the timings
+    logging.getLogger().setLevel(logging.ERROR)
+    # The benchmarks inject their own LLM client; never reach a configured host
+    os.environ["TEST_MODE"] = "true"
+
+    bot_counts = [int(count) for count in args.bot_counts.split(",") if count]
+    results = asyncio.run(run_benchmarks(args.backend, args.iterations, bot_counts,
+                                         args.latency, args.tokens_per_second))
+    Path(args.output).write_text(json.dumps(results, indent=2))
+
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else None
+    print_results(results, baseline)
+    print(f"\nResults written to {args.output}")
+
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(results, indent=2))
+        print(f"Baseline saved to {baseline_path}")
+        return 0
+    if baseline is None:
+        print("No baseline to compare against")
+        return 0
+    mismatched = [key for key in COMPARABLE_SETTINGS if baseline["meta"].get(key) != results["meta"][key]]
+    if mismatched:
+        print(f"Baseline was recorded with different {', '.join(mismatched)}; not comparing")
+        return 0
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print(f"No regressions against {baseline_path}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
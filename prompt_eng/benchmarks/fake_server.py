@@ -0,0 +1,277 @@
+import argparse
+import asyncio
+import hashlib
+import inspect
+import json
+import logging
+import random
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Union
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# Builds the reply text from the request's messages
+Responder = Callable[[List[Dict[str, Any]]], Union[str, Awaitable[str]]]
+
+def echo_reply(messages: List[Dict[str, Any]]) -> str:
+    """Default reply: the start of the last message, and of the system prompt if there is one"""
+    messages = messages or [{}]
+    reply = {"echo": messages[-1].get("content", "")[:50]}
+    if messages[0].get("role") == "system":
+        reply["system"] = messages[0]["content"][:50]
+    return json.dumps(reply)
+
+def _tokens(text: str) -> List[str]:
+    """Split a reply into the pieces streamed as tokens"""
+    return re.findall(r"\s*\S+", text) or [text]
+
+class FakeLLMServer:
+    """
+    Local stand-in for an OpenWebUI/Ollama endpoint.
+    Serves canned responses so the real HTTP path of the clients can be measured
+    without a GPU box. Binds to an ephemeral port unless one is given.
+
+    Implements OpenWebUI's /api/models and /api/chat/completions (streamed
+    as server-sent events), Ollama's native /api/tags and /api/chat
+    (streamed as NDJSON), and /api/embeddings. response_delay is the time
+    to first token and token_delay the time per further token. At most max_concurrency
+    requests are served at once; others queue, and once max_queue are
+    waiting further requests get a 503 like a busy Ollama server. A
+    fraction error_rate of requests fails with one of error_statuses, drawn
+    from a generator seeded with seed; fail_next() scripts failures instead.
+    Every request is recorded in requests.
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, model_id: str = "fake-model",
+                 response_delay: float = 0.0, token_delay: float = 0.0,
+                 max_concurrency: Optional[int] = None, max_queue: Optional[int] = None,
+                 error_rate: float = 0.0, error_statuses: Sequence[int] = (502, 503),
+                 seed: Optional[int] = None, responder: Optional[Responder] = None,
+                 embedding_dim: int = 32):
+        self.host = host
+        self.port = port
+        self.model_id = model_id
+        self.response_delay = response_delay
+        self.token_delay = token_delay
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.responder = responder or echo_reply
+        self.embedding_dim = embedding_dim
+        self.request_count = 0
+        self.last_request: Optional[dict] = None
+        self.requests: List[Dict[str, Any]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._rng = random.Random(seed)
+        self._scripted_errors: List[int] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def fail_next(self, status: int = 503, count: int = 1) -> None:
+        """Answer the next count requests with status"""
+        self._scripted_errors.extend([status] * count)
+
+    def _build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/api/models", self._handle_models)
+        app.router.add_get("/api/tags", self._handle_tags)
+        app.router.add_post("/api/chat/completions", self._handle_chat_completions)
+        app.router.add_post("/api/chat", self._handle_chat)
+        app.router.add_post("/api/embeddings", self._handle_embeddings)
+        return app
+
+    async def start(self) -> str:
+        """Start serving and return the base URL"""
+        self._slots = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else None
+        self._runner = web.AppRunner(self._build_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Resolve the ephemeral port picked by the OS
+        self.port = self._runner.addresses[0][1]
+        logger.info(f"Fake LLM server listening on {self.url}")
+        return self.url
+
+    async def stop(self):
+        """Stop serving"""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    async def _handle_models(self, request: web.Request) -> web.Response:
+        return web.json_response({"data": [{"id": self.model_id, "name": self.model_id}]})
+
+    async def _handle_tags(self, request: web.Request) -> web.Response:
+        return web.json_response({"models": [{"name": self.model_id, "model": self.model_id}]})
+
+    async def _handle_chat_completions(self, request: web.Request) -> web.StreamResponse:
+        return await self._serve(request, self._openai_reply)
+
+    async def _handle_chat(self, request: web.Request) -> web.StreamResponse:
+        return await self._serve(request, self._ollama_reply)
+
+    async def _handle_embeddings(self, request: web.Request) -> web.StreamResponse:
+        return await self._serve(request, self._embeddings_reply)
+
+    async def _serve(self, request: web.Request,
+                     reply: Callable[[web.Request, Dict[str, Any]], Awaitable[web.StreamResponse]]) -> web.StreamResponse:
+        """Log the request, inject errors, hold a concurrency slot and build the reply"""
+        self.request_count += 1
+        body = await request.json()
+        self.last_request = body
+        entry = {
+            "path": request.path,
+            "model": body.get("model"),
+            "stream": bool(body.get("stream")),
+            "status": 200,
+            "queued": 0.0,
+            "duration": 0.0
+        }
+        self.requests.append(entry)
+        started = time.monotonic()
+        try:
+            status = self._injected_error()
+            if status is None and self._slots is not None and self._slots.locked() \
+                    and self.max_queue is not None and self._waiting >= self.max_queue:
+                status = 503
+            if status is not None:
+                entry["status"] = status
+                return web.json_response({"error": f"injected error {status}"}, status=status)
+
+            self._waiting += 1
+            try:
+                if self._slots is not None:
+                    await self._slots.acquire()
+            finally:
+                self._waiting -= 1
+            entry["queued"] = time.monotonic() - started
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                return await reply(request, body)
+            finally:
+                self.in_flight -= 1
+                if self._slots is not None:
+                    self._slots.release()
+        finally:
+            entry["duration"] = time.monotonic() - started
+            logger.debug(f"{entry['path']} {entry['status']} in {entry['duration'] * 1000:.1f}ms")
+
+    def _injected_error(self) -> Optional[int]:
+        if self._scripted_errors:
+            return self._scripted_errors.pop(0)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            return self._rng.choice(self.error_statuses)
+        return None
+
+    async def _reply_text(self, body: Dict[str, Any]) -> str:
+        content = self.responder(body.get("messages", []))
+        if inspect.isawaitable(content):
+            content = await content
+        return content
+
+    async def _generate(self, tokens: List[str]):
+        """Yield tokens at the configured pace"""
+        await asyncio.sleep(self.response_delay)
+        for i, token in enumerate(tokens):
+            if i and self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            yield token
+
+    async def _openai_reply(self, request: web.Request, body: Dict[str, Any]) -> web.StreamResponse:
+        tokens = _tokens(await self._reply_text(body))
+        model = body.get("model", self.model_id)
+        if not body.get("stream"):
+            content = "".join([token async for token in self._generate(tokens)])
+            return web.json_response({
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}],
+                "usage": {"completion_tokens": len(tokens)}
+            })
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        async for token in self._generate(tokens):
+            chunk = {"model": model, "choices": [{"index": 0, "delta": {"content": token}}]}
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def _ollama_reply(self, request: web.Request, body: Dict[str, Any]) -> web.StreamResponse:
+        tokens = _tokens(await self._reply_text(body))
+        model = body.get("model", self.model_id)
+        # Ollama streams unless told otherwise
+        if body.get("stream") is False:
+            content = "".join([token async for token in self._generate(tokens)])
+            return web.json_response({
+                "model": model,
+                "message": {"role": "assistant", "content": content},
+                "done": True,
+                "eval_count": len(tokens)
+            })
+
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        async for token in self._generate(tokens):
+            chunk = {"model": model, "message": {"role": "assistant", "content": token}, "done": False}
+            await response.write((json.dumps(chunk) + "\n").encode())
+        final = {"model": model, "message": {"role": "assistant", "content": ""}, "done": True,
+                 "eval_count": len(tokens)}
+        await response.write((json.dumps(final) + "\n").encode())
+        await response.write_eof()
+        return response
+
+    async def _embeddings_reply(self, request: web.Request, body: Dict[str, Any]) -> web.StreamResponse:
+        await asyncio.sleep(self.response_delay)
+        # OpenAI-style requests send "input" (a string or a list), Ollama's send "prompt"
+        if "input" in body:
+            inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+            return web.json_response({
+                "model": body.get("model", self.model_id),
+                "data": [{"index": i, "embedding": self._embed(text)} for i, text in enumerate(inputs)]
+            })
+        return web.json_response({"embedding": self._embed(body.get("prompt", ""))})
+
+    def _embed(self, text: str) -> List[float]:
+        """A deterministic unit vector derived from the text"""
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+        rng = random.Random(seed)
+        vector = [rng.uniform(-1, 1) for _ in range(self.embedding_dim)]
+        norm = sum(v * v for v in vector) ** 0.5 or 1.0
+        return [v / norm for v in vector]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a fake LLM server for offline benchmarks")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--response-delay", type=float, default=0.0, help="time to first token in seconds")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="seconds per further token")
+    parser.add_argument("--max-concurrency", type=int, default=None)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    async def main():
+        async with FakeLLMServer(port=args.port, response_delay=args.response_delay, token_delay=args.token_delay,
+                                 max_concurrency=args.max_concurrency, error_rate=args.error_rate,
+                                 seed=args.seed) as server:
+            print(f"Serving on {server.url} (Ctrl+C to stop)")
+            await asyncio.Event().wait()
+
+    asyncio.run(main())
@@ -23,7 +23,7 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-async def interactive_mode(storage_dir: str = "generated_bots", use_llm: bool = True):
+async def interactive_mode(storage_dir: str = "generated_bots", use_llm: bool = True, stream: bool = True):
     """Run the master bot in interactive mode"""
     print("Starting Master Bot in interactive mode...")
     print("Initializing...")
@@ -41,27 +41,45 @@ async def interactive_mode(storage_dir: str = "generated_bots", use_llm: bool =
     print("Type 'exit' or 'quit' to end the session.")
     print("Type 'help' to see available commands.")
     
-    while True:
-        try:
-            # Get user input
-            user_input = input("\nYou: ").strip()
-            
-            # Check if user wants to exit
-            if user_input.lower() in ["exit", "quit", "bye"]:
-                print("\nThank you for using Master Bot. Goodbye!")
+    try:
+        while True:
+            try:
+                # Get user input
+                user_input = input("\nYou: ").strip()
+                
+                # Check if user wants to exit
+                if user_input.lower() in ["exit", "quit", "bye"]:
+                    print("\nThank you for using Master Bot. Goodbye!")
+                    break
+                
+                # Process the message
+                if user_input:
+                    streamed = []
+                    
+                    def print_token(token: str):
+                        if not streamed:
+                            print("\nMaster Bot: ", end="")
+                        print(token, end="", flush=True)
+                        streamed.append(token)
+                    
+                    response = await master_bot.process_message(user_input, on_token=print_token if stream else None)
+                    if not streamed:
+                        print(f"\nMaster Bot: {response}")
+                    elif response.strip() != "".join(streamed).strip():
+                        # An action replaced the streamed reply with its own result
+                        print(f"\n\n{response}")
+                    else:
+                        print()
+                
+            except KeyboardInterrupt:
+                print("\nSession interrupted. Exiting...")
                 break
-            
-            # Process the message
-            if user_input:
-                response = await master_bot.process_message(user_input)
-                print(f"\nMaster Bot: {response}")
-            
-        except KeyboardInterrupt:
-            print("\nSession interrupted. Exiting...")
-            break
-        except Exception as e:
-            logger.error(f"Error processing message: {str(e)}")
-            print(f"\nAn error occurred: {str(e)}")
+            except Exception as e:
+                logger.error(f"Error processing message: {str(e)}")
+                print(f"\nAn error occurred: {str(e)}")
+    finally:
+        # Close pooled LLM connections before the event loop shuts down
+        await master_bot.aclose()
 
 def main():
     """Main entry point for the CLI"""
@@ -92,6 +110,11 @@ def main():
         action="store_true",
         help="Disable LLM-powered mode (use rule-based processing only)"
     )
+    parser.add_argument(
+        "--no-stream",
+        action="store_true",
+        help="Wait for complete LLM responses instead of printing tokens as they arrive"
+    )
     
     args = parser.parse_args()
     
@@ -117,7 +140,7 @@ def main():
     os.makedirs(args.storage_dir, exist_ok=True)
     
     # Run in interactive mode
-    asyncio.run(interactive_mode(args.storage_dir, use_llm=not args.no_llm))
+    asyncio.run(interactive_mode(args.storage_dir, use_llm=not args.no_llm, stream=not args.no_stream))
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
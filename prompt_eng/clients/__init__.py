@@ -1,63 +1,371 @@
-from typing import Tuple, Dict, Any, List, Optional
+from typing import Tuple, Dict, Any, List, Optional, AsyncIterator, Union
 import logging
 import json
 import aiohttp
-from .models import AIModel, ModelOptions
+from .models import AIModel, ModelOptions, options_for
+from .streaming import ChatStream, parse_stream_line
+from .cache import ResponseCache, CachedChatbotClient, cache_enabled, create_response_cache
+from .coalesce import SingleFlight, CoalescingChatbotClient
+from .limiter import AdaptiveLimiter, get_host_limiter, host_limiter_metrics
+from .batch import run_chat_batch
+from .catalog import ModelCatalog, get_model_catalog
+from .registry import ClientRegistry, default_registry
+from .balancer import LoadBalancedClient
+from .hedging import HedgeBudget, HedgedChatbotClient, has_hedge_target
+from .warmup import ModelWarmer, warm_up_models
+from .metrics import (
+    MetricsRegistry, RequestMetrics, call_site, completion_size, create_trace_config,
+    current_call_site, estimate_tokens, get_metrics_registry
+)
+from .simulation import MALFORMED, TIMEOUT, FaultModel, LatencyModel, malform, mock_options
+from .resilience import (
+    RETRYABLE_STATUSES, CircuitBreaker, CircuitOpenError, RequestRejectedError, RetryPolicy,
+    endpoint_resilience_metrics, get_endpoint_resilience, is_endpoint_failure, parse_retry_after
+)
 from ..config import config_factory
 import re
 import asyncio
+import contextlib
 import os
+import random
+import time
 
 logger = logging.getLogger(__name__)
 
-async def bootstrap_client_and_model(preferred_model: str = None) -> Tuple[Any, AIModel]:
-    """Initialize a client and select a model based on configuration"""
+async def bootstrap_client_and_model(preferred_model: str = None, coalesce: bool = True) -> Tuple[Any, AIModel]:
+    """Initialize a client and select a model based on configuration.
+    With coalesce enabled, identical concurrent requests share one upstream call.
+    Setting llm_hedge_percentile enables hedged requests.
+    The endpoint type and model list come from the process-wide model catalog,
+    so only the first bootstrap per host waits on the server.
+    """
     config = config_factory.load_config()
     
     # For testing, use mock client
     if config["chatbot_api_host"] == "mock" or os.environ.get("TEST_MODE") == "true":
         logger.info("Using MockChatbotClient for testing")
-        client = MockChatbotClient("mock")
+        client = MockChatbotClient("mock", **mock_options(config))
         return client, AIModel(id="mock")
     
     # Initialize appropriate client based on configuration
+    client = None
     try:
-        client = ChatbotClientFactory.create_client(config)
+        catalog = get_model_catalog()
+        if config.get("model_catalog_ttl"):
+            catalog.ttl = float(config["model_catalog_ttl"])
+        
+        client_type = await catalog.get_endpoint_type(
+            config["chatbot_api_host"],
+            lambda: ChatbotClientFactory.probe_client_type(config)
+        )
+        client = ChatbotClientFactory.create_client(config, client_type)
         
         # Get available models
-        models = await client.get_models()
+        models = await catalog.get_models(client.host, client.get_models)
         
-        # If preferred model is specified, try to find it
-        if preferred_model:
-            for model in models:
-                model_id = model.id if hasattr(model, 'id') else model.name
-                if model_id.lower() == preferred_model.lower():
-                    return client, model
+        # Optionally duplicate slow requests to another replica or an alternate model
+        if config.get("llm_hedge_percentile"):
+            hedge_model = select_model(models, config["llm_hedge_model"]) if config.get("llm_hedge_model") else None
+            if has_hedge_target(client, hedge_model=hedge_model):
+                client = HedgedChatbotClient(
+                    client,
+                    hedge_model=hedge_model,
+                    percentile=float(config["llm_hedge_percentile"]) / 100,
+                    budget=HedgeBudget(ratio=float(config.get("llm_hedge_budget") or 0.1))
+                )
+            else:
+                logger.warning("llm_hedge_percentile needs several hosts or llm_hedge_model; not hedging")
+        if coalesce:
+            client = CoalescingChatbotClient(client)
         
-        # Otherwise, return the first available model
-        if models:
-            return client, models[0]
+        model = select_model(models, preferred_model)
+        if model is not None:
+            # Periodically log latency and throughput per model and call site
+            get_metrics_registry().start_summary_log(float(config.get("llm_metrics_log_interval") or 300))
+            return client, model
         
         # If no models available, fall back to mock
         logger.warning("No models available, falling back to mock client")
-        client = MockChatbotClient("mock")
-        return client, AIModel(id="mock")
     except Exception as e:
         logger.error(f"Error initializing client: {str(e)}, falling back to mock client")
-        client = MockChatbotClient("mock")
-        return client, AIModel(id="mock")
+    
+    # Listing models opened the discarded client's pooled session; close it (and any wrappers)
+    if client is not None:
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.debug(f"Closing the discarded client failed: {e}")
+    client = MockChatbotClient("mock", **mock_options(config))
+    return client, AIModel(id="mock")
+
+def select_model(models: List[AIModel], preferred_model: Optional[str] = None) -> Optional[AIModel]:
+    """Pick the preferred model if available, otherwise the first one"""
+    if preferred_model:
+        for model in models:
+            model_id = model.id if hasattr(model, 'id') else model.name
+            if model_id.lower() == preferred_model.lower():
+                return model
+    return models[0] if models else None
 
 class ChatbotClient:
-    def __init__(self):
+    def __init__(self, pool_size: int = 10, keepalive_timeout: float = 30.0, dns_cache_ttl: int = 300):
         self._system_prompt: str = ""
+        # Connection pool settings for the shared session
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.timeout: Optional[float] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._limiter: Optional[AdaptiveLimiter] = None
+        self._limiter_options: Dict[str, Any] = {}
+        # Retries, circuit breaking and adaptive timeouts for _post_json/_stream_post
+        self.retry_policy = RetryPolicy()
+        self._resilience_options: Dict[str, Any] = {}
+        # Answer from MockChatbotClient when the endpoint is unavailable (opt-in)
+        self.fallback_to_mock = False
+    
+    @property
+    def limiter(self) -> AdaptiveLimiter:
+        """Concurrency limiter shared by every client talking to the same host"""
+        if self._limiter is None:
+            self._limiter = get_host_limiter(self.host, **self._limiter_options)
+        return self._limiter
+    
+    @limiter.setter
+    def limiter(self, limiter: AdaptiveLimiter) -> None:
+        self._limiter = limiter
     
     async def get_models(self) -> List[AIModel]:
         pass
 
-    async def chat_completion(self, message: str, model: AIModel, options: Optional[ModelOptions] = None) -> Tuple[int, str]:
+    def _endpoint(self, path: str):
+        """Breaker and latency state shared by every client calling this URL"""
+        options = {"default_timeout": self.timeout or 60.0, **self._resilience_options}
+        return get_endpoint_resilience(f"{self.host}{path}", **options)
+
+    async def _post_json(self, path: str, data: Dict[str, Any],
+                         headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """POST a JSON request and return the decoded 200 response.
+
+        Rate limiting, gateway errors, timeouts and connection errors are
+        retried with full-jitter backoff, honouring Retry-After. Server errors
+        count against the endpoint's circuit breaker; while it is open this
+        raises CircuitOpenError without sending anything. The timeout follows
+        the observed p99 latency of the current call site on this endpoint. Timings, sizes and retries are
+        recorded in the metrics registry.
+        """
+        endpoint = self._endpoint(path)
+        policy = self.retry_policy
+        metrics = RequestMetrics(data.get("model", ""), data.get("messages", ""))
+        latency = endpoint.latency(current_call_site.get())
+        error = ""
+        try:
+            for attempt in range(policy.max_retries + 1):
+                if not endpoint.breaker.allow_request():
+                    raise CircuitOpenError(endpoint.name, endpoint.breaker.retry_in())
+                
+                retry_after = None
+                request_timeout = latency.timeout()
+                queued_at = time.monotonic()
+                try:
+                    # Hold a host slot only while the request is on the wire, not while backing off
+                    async with self.limiter.slot() as slot:
+                        metrics.queued(time.monotonic() - queued_at)
+                        started = time.monotonic()
+                        session = await self._get_session()
+                        async with session.post(
+                            f"{self.host}{path}",
+                            json=data,
+                            headers=headers,
+                            timeout=aiohttp.ClientTimeout(total=request_timeout),
+                            trace_request_ctx=metrics.trace_ctx
+                        ) as response:
+                            status = response.status
+                            if status == 200:
+                                result = await response.json()
+                                latency.observe(time.monotonic() - started)
+                                endpoint.breaker.record_success()
+                                metrics.finish("ok", *completion_size(result))
+                                return result
+                            if status in RETRYABLE_STATUSES:
+                                slot.mark_overloaded()
+                                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    
+                    if not is_endpoint_failure(status):
+                        # The endpoint is up; the request itself was rejected
+                        endpoint.breaker.record_success()
+                        raise RequestRejectedError(status)
+                    endpoint.breaker.record_failure()
+                    if status not in RETRYABLE_STATUSES:
+                        raise Exception(f"Chat completion failed: {status}")
+                    error = f"HTTP {status}"
+                except asyncio.TimeoutError:
+                    # Count the timeout as a sample so a slower call site raises its own timeout
+                    latency.observe(request_timeout)
+                    endpoint.breaker.record_failure()
+                    error = f"timed out after {request_timeout:.1f}s"
+                except aiohttp.ClientConnectionError as e:
+                    endpoint.breaker.record_failure()
+                    error = f"connection error: {e}"
+                
+                if attempt < policy.max_retries:
+                    delay = policy.delay(attempt, retry_after)
+                    logger.warning(f"Request to {endpoint.name} failed ({error}), "
+                                   f"retrying in {delay:.2f}s ({attempt + 1}/{policy.max_retries})...")
+                    metrics.retry()
+                    await asyncio.sleep(delay)
+            
+            raise Exception(f"Chat completion failed after {policy.max_retries + 1} attempts: {error}")
+        except CircuitOpenError:
+            metrics.finish("circuit_open")
+            raise
+        except asyncio.CancelledError:
+            metrics.finish("cancelled")
+            raise
+        except Exception:
+            metrics.finish("error")
+            raise
+
+    async def _stream_post(self, path: str, data: Dict[str, Any],
+                           headers: Optional[Dict[str, str]] = None) -> AsyncIterator[str]:
+        """POST a streaming request and yield text deltas.
+        Streams are not retried once started, but they respect and feed the circuit breaker.
+        """
+        endpoint = self._endpoint(path)
+        metrics = RequestMetrics(data.get("model", ""), data.get("messages", ""))
+        if not endpoint.breaker.allow_request():
+            metrics.finish("circuit_open")
+            raise CircuitOpenError(endpoint.name, endpoint.breaker.retry_in())
+        
+        # Bound the wait between chunks rather than the whole generation
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=endpoint.latency(current_call_site.get()).timeout())
+        status = None
+        text = ""
+        try:
+            queued_at = time.monotonic()
+            async with self.limiter.slot() as slot:
+                metrics.queued(time.monotonic() - queued_at)
+                session = await self._get_session()
+                async with session.post(f"{self.host}{path}", json=data, headers=headers, timeout=timeout,
+                                        trace_request_ctx=metrics.trace_ctx) as response:
+                    status = response.status
+                    if status != 200:
+                        if status in RETRYABLE_STATUSES:
+                            slot.mark_overloaded()
+                        if not is_endpoint_failure(status):
+                            raise RequestRejectedError(status)
+                        raise Exception(f"Chat completion failed: {status}")
+                    async for content in self._read_stream(response):
+                        if not text:
+                            metrics.first_token()
+                        text += content
+                        yield content
+        except BaseException as e:
+            if isinstance(e, Exception):
+                if status is None or status == 200 or is_endpoint_failure(status):
+                    endpoint.breaker.record_failure()
+                else:
+                    endpoint.breaker.record_success()
+            metrics.finish("error" if isinstance(e, Exception) else "cancelled")
+            raise
+        endpoint.breaker.record_success()
+        metrics.finish("ok", text)
+
+    async def _unavailable(self, error: Exception, message: str, model: AIModel, options: Optional[ModelOptions],
+                           system_prompt: Optional[str], history: Optional[List[Dict[str, str]]]) -> Tuple[int, str]:
+        """Result for a request the endpoint could not serve"""
+        # A rejected request would not become valid elsewhere, so its status is passed on
+        rejected = isinstance(error, RequestRejectedError)
+        get_metrics_registry().inc(
+            "llm_fallbacks_total",
+            kind="mock" if self.fallback_to_mock and not rejected else "error",
+            model=model.id,
+            call_site=current_call_site.get()
+        )
+        if rejected:
+            return error.status, str(error)
+        if self.fallback_to_mock:
+            logger.warning(f"Endpoint unavailable ({error}), answering from MockChatbotClient")
+            return await MockChatbotClient().chat_completion(
+                message, model, options, system_prompt=system_prompt, history=history
+            )
+        return (503 if isinstance(error, CircuitOpenError) else 500), str(error)
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, creating it on first use.
+
+        A session is bound to the event loop it was created on, so a new one is
+        created if the client is reused from a different loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            timeout = aiohttp.ClientTimeout(total=self.timeout)
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=timeout, trace_configs=[create_trace_config()]
+            )
+            self._session_loop = loop
+        return self._session
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP session and release pooled connections"""
+        session = self._session
+        self._session = None
+        self._session_loop = None
+        if session is not None and not session.closed:
+            await session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def chat_completion(self, message: str, model: AIModel, options: Optional[ModelOptions] = None,
+                              system_prompt: Optional[str] = None,
+                              history: Optional[List[Dict[str, str]]] = None) -> Tuple[int, str]:
         pass
 
+    async def chat_completion_many(self, prompts: List[str], model: AIModel, options: Optional[ModelOptions] = None,
+                                   max_concurrency: int = 4, system_prompt: Optional[str] = None) -> List[Tuple[int, str]]:
+        """Send independent prompts with bounded parallelism.
+        Results come back in prompt order; a failed prompt yields (500, error)
+        instead of failing the whole batch.
+        """
+        return await run_chat_batch(self.chat_completion, prompts, model, options, max_concurrency,
+                                    system_prompt=system_prompt)
+
+    def stream_chat_completion(self, message: str, model: AIModel, options: Optional[ModelOptions] = None,
+                               system_prompt: Optional[str] = None,
+                               history: Optional[List[Dict[str, str]]] = None) -> ChatStream:
+        """Stream the response as it is generated.
+        Clients without native streaming yield the whole response as one chunk.
+        """
+        return ChatStream(self._stream_chunks(message, model, options, system_prompt=system_prompt, history=history))
+
+    async def _stream_chunks(self, message: str, model: AIModel, options: Optional[ModelOptions] = None,
+                             system_prompt: Optional[str] = None,
+                             history: Optional[List[Dict[str, str]]] = None) -> AsyncIterator[str]:
+        status, content = await self.chat_completion(message, model, options, system_prompt=system_prompt, history=history)
+        if status != 200:
+            raise Exception(f"Chat completion failed: {content}")
+        yield content
+
+    async def _read_stream(self, response: aiohttp.ClientResponse) -> AsyncIterator[str]:
+        """Yield text deltas from a streaming HTTP response"""
+        async for raw_line in response.content:
+            content = parse_stream_line(raw_line.decode("utf-8"))
+            if content:
+                yield content
+
     def set_system_prompt(self, prompt: str) -> None:
+        """Set the default system prompt, used when a call does not pass its own"""
         if prompt:
             self._system_prompt = prompt
 
@@ -67,23 +375,124 @@ class ChatbotClient:
         else:
             return {}
 
+    def _build_messages(self, message: str, system_prompt: Optional[str] = None,
+                        history: Optional[List[Dict[str, str]]] = None) -> List[Dict[str, str]]:
+        """Assemble the messages for one request.
+        A per-call system_prompt replaces the default for that call only, so
+        concurrent callers sharing this client never see each other's prompts.
+        """
+        system_prompt = self._system_prompt if system_prompt is None else system_prompt
+        messages = [{"role": "system", "content": system_prompt}] if system_prompt else []
+        messages.extend(history or [])
+        messages.append({"role": "user", "content": message})
+        return messages
+
+    def _request_body(self, message: str, model: AIModel, options: Optional[ModelOptions], stream: bool,
+                      system_prompt: Optional[str] = None,
+                      history: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
+        """OpenAI-compatible chat completion request, with generation options as top-level fields"""
+        data = {
+            "model": model.id,
+            "messages": self._build_messages(message, system_prompt, history),
+            "stream": stream
+        }
+        if options:
+            data.update(options.to_openai_params())
+        return data
+
 class ChatbotClientFactory:
     @classmethod
-    def create_client(cls, config: Dict[str, str]) -> ChatbotClient:
-        client_type = cls._detect_client_type(config)
+    def create_client(cls, config: Dict[str, str], client_type: Optional[str] = None) -> ChatbotClient:
+        client_type = client_type or cls._detect_client_type(config)
         host = config["chatbot_api_host"]
         
+        # A comma-separated host list is served by replicas behind a load balancer
+        hosts = [h.strip() for h in host.split(",") if h.strip()]
+        if len(hosts) > 1:
+            replicas = [cls.create_client({**config, "chatbot_api_host": h}, client_type) for h in hosts]
+            return LoadBalancedClient(
+                replicas,
+                health_interval=float(config.get("llm_health_interval") or 10.0)
+            )
+        
+        pool_options = cls._pool_options(config)
+        
         if client_type == "openwebui":
-            return OpenWebUIClient(host=host, bearer=config["bearer"])
+            client = OpenWebUIClient(host=host, bearer=config["bearer"], **pool_options)
         elif client_type == "ollama":
-            return OllamaClient(host=host)
+            client = OllamaClient(host=host, **pool_options)
+            if config.get("llm_keep_alive"):
+                # Ollama reads a bare number as seconds, but rejects it as a string
+                keep_alive = str(config["llm_keep_alive"]).strip()
+                client.keep_alive = int(keep_alive) if keep_alive.lstrip("-").isdigit() else keep_alive
         else:
             raise ValueError(f"Unknown client type: {client_type}")
+        
+        client._limiter_options = cls._limiter_options(config)
+        cls._apply_resilience_options(client, config)
+        return client
     
     @classmethod
-    def _detect_client_type(cls, config: Dict[str, str]):
-        # check if host is explicitly specified
-        host = config["chatbot_api_host"].lower()
+    def _pool_options(cls, config: Dict[str, str]) -> Dict[str, Any]:
+        """Read optional connection pool settings from the configuration"""
+        options = {}
+        if config.get("http_pool_size"):
+            options["pool_size"] = int(config["http_pool_size"])
+        if config.get("http_keepalive_timeout"):
+            options["keepalive_timeout"] = float(config["http_keepalive_timeout"])
+        if config.get("http_dns_cache_ttl"):
+            options["dns_cache_ttl"] = int(config["http_dns_cache_ttl"])
+        return options
+    
+    @classmethod
+    def _limiter_options(cls, config: Dict[str, str]) -> Dict[str, Any]:
+        """Read optional per-host concurrency limits from the configuration"""
+        options = {}
+        if config.get("llm_initial_concurrency"):
+            options["initial_limit"] = int(config["llm_initial_concurrency"])
+        if config.get("llm_max_concurrency"):
+            options["max_limit"] = int(config["llm_max_concurrency"])
+        if config.get("llm_latency_target"):
+            options["latency_target"] = float(config["llm_latency_target"])
+        return options
+    
+    @classmethod
+    def _apply_resilience_options(cls, client: ChatbotClient, config: Dict[str, str]) -> None:
+        """Read optional retry, circuit breaker and fallback settings from the configuration"""
+        client.retry_policy = RetryPolicy(
+            max_retries=int(config.get("llm_max_retries") or 3),
+            base_delay=float(config.get("llm_retry_base_delay") or 0.5),
+            max_delay=float(config.get("llm_retry_max_delay") or 30.0)
+        )
+        if config.get("llm_breaker_failures"):
+            client._resilience_options["failure_threshold"] = int(config["llm_breaker_failures"])
+        if config.get("llm_breaker_recovery"):
+            client._resilience_options["recovery_timeout"] = float(config["llm_breaker_recovery"])
+        client.fallback_to_mock = str(config.get("llm_mock_fallback", "")).lower() in ("1", "true", "yes")
+    
+    @classmethod
+    async def probe_client_type(cls, config: Dict[str, str]) -> str:
+        """Detect the client type, asking the server when the host name is not conclusive"""
+        client_type = cls._client_type_from_host(config["chatbot_api_host"])
+        if client_type:
+            return client_type
+        
+        # Ollama answers its root URL with "Ollama is running"; replicas are assumed alike
+        host = config["chatbot_api_host"].split(",")[0].strip()
+        url = host if host.startswith(('http://', 'https://')) else f"http://{host}"
+        try:
+            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5)) as session:
+                async with session.get(url) as response:
+                    if "ollama" in (await response.text()).lower():
+                        logger.info("Detected Ollama client by probing host: " + host)
+                        return "ollama"
+        except Exception as e:
+            logger.debug(f"Endpoint probe for {host} failed: {e}")
+        return cls._detect_client_type(config)
+    
+    @classmethod
+    def _client_type_from_host(cls, host: str) -> Optional[str]:
+        host = host.lower()
         
         # try openwebui first
         if "fau" in host or "chat.hpc" in host or "openwebui" in host:
@@ -94,6 +503,14 @@ class ChatbotClientFactory:
         if "ollama" in host or "localhost" in host:
             logger.info("Detected Ollama client from host: " + host)
             return "ollama"
+        return None
+    
+    @classmethod
+    def _detect_client_type(cls, config: Dict[str, str]):
+        # check if host is explicitly specified
+        client_type = cls._client_type_from_host(config["chatbot_api_host"])
+        if client_type:
+            return client_type
         
         # default to openwebui if bearer token is provided
         if config.get("bearer"):
@@ -105,143 +522,219 @@ class ChatbotClientFactory:
         return "ollama"
 
 class OpenWebUIClient(ChatbotClient):
-    def __init__(self, host: str, bearer: str):
-        super().__init__()
+    def __init__(self, host: str, bearer: str, **pool_options):
+        super().__init__(**pool_options)
         # Ensure the host has a scheme
         if not host.startswith(('http://', 'https://')):
             self.host = f"https://{host}"
         else:
             self.host = host
         self.bearer = bearer
-        self.max_retries = 3
         self.timeout = 60  # Increase timeout to 60 seconds
     
     async def get_models(self) -> List[AIModel]:
         """Get available models from OpenWebUI"""
         try:
             headers = {"Authorization": f"Bearer {self.bearer}"}
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.host}/api/models", headers=headers, timeout=self.timeout) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        logger.info(f"Successfully fetched models from {self.host}")
-                        return [AIModel(id=model["id"]) for model in data.get("data", [])]
-                    else:
-                        logger.error(f"Failed to get models: {response.status}")
-                        raise Exception(f"Failed to get models: {response.status}")
+            session = await self._get_session()
+            async with session.get(f"{self.host}/api/models", headers=headers) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    logger.info(f"Successfully fetched models from {self.host}")
+                    return [AIModel(id=model["id"]) for model in data.get("data", [])]
+                else:
+                    logger.error(f"Failed to get models: {response.status}")
+                    raise Exception(f"Failed to get models: {response.status}")
         except Exception as e:
             logger.error(f"Failed to get models: {e}")
             return []
     
-    async def chat_completion(self, message: str, model: AIModel, options: Optional[ModelOptions] = None) -> Tuple[int, str]:
-        """Send chat completion request to OpenWebUI with retry logic"""
-        retry_count = 0
-        while retry_count < self.max_retries:
-            try:
-                headers = {
-                    "Authorization": f"Bearer {self.bearer}",
-                    "Content-Type": "application/json"
-                }
-                
-                data = {
-                    "model": model.id,
-                    "messages": [{"role": "user", "content": message}],
-                    "stream": False
-                }
-                
-                # Add system prompt if available
-                if self._system_prompt:
-                    data["messages"].insert(0, {"role": "system", "content": self._system_prompt})
-                
-                logger.debug(f"Request to {self.host}/api/chat/completions: {data}")
-                
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(
-                        f"{self.host}/api/chat/completions", 
-                        json=data, 
-                        headers=headers,
-                        timeout=self.timeout
-                    ) as response:
-                        if response.status == 200:
-                            result = await response.json()
-                            return 200, result["choices"][0]["message"]["content"]
-                        elif response.status in [502, 503, 504]:  # Gateway errors
-                            retry_count += 1
-                            logger.warning(f"Gateway error {response.status}, retrying ({retry_count}/{self.max_retries})...")
-                            await asyncio.sleep(2 * retry_count)  # Exponential backoff
-                            continue
-                        else:
-                            logger.error(f"Chat completion failed: {response.status}")
-                            raise Exception(f"Chat completion failed: {response.status}")
-            except asyncio.TimeoutError:
-                retry_count += 1
-                logger.warning(f"Request timed out, retrying ({retry_count}/{self.max_retries})...")
-                await asyncio.sleep(2 * retry_count)  # Exponential backoff
-                continue
-            except Exception as e:
-                logger.error(f"Chat completion failed: {e}")
-                return 500, str(e)
+    async def chat_completion(self, message: str, model: AIModel, options: Optional[ModelOptions] = None,
+                              system_prompt: Optional[str] = None,
+                              history: Optional[List[Dict[str, str]]] = None) -> Tuple[int, str]:
+        """Send chat completion request to OpenWebUI with retries and circuit breaking"""
+        headers = {
+            "Authorization": f"Bearer {self.bearer}",
+            "Content-Type": "application/json"
+        }
+        data = self._request_body(message, model, options, False, system_prompt, history)
+        logger.debug(f"Request to {self.host}/api/chat/completions: {data}")
         
-        # If we've exhausted all retries, fall back to mock response
-        logger.warning("Exhausted all retries, falling back to mock response")
-        mock_client = MockChatbotClient()
-        if self._system_prompt:
-            mock_client.set_system_prompt(self._system_prompt)
-        return await mock_client.chat_completion(message, model, options)
+        try:
+            result = await self._post_json("/api/chat/completions", data, headers)
+            return 200, result["choices"][0]["message"]["content"]
+        except Exception as e:
+            logger.error(f"Chat completion failed: {e}")
+            return await self._unavailable(e, message, model, options, system_prompt, history)
+
+    async def _stream_chunks(self, message: str, model: AIModel, options: Optional[ModelOptions] = None,
+                             system_prompt: Optional[str] = None,
+                             history: Optional[List[Dict[str, str]]] = None) -> AsyncIterator[str]:
+        """Stream a chat completion from OpenWebUI as server-sent events"""
+        headers = {
+            "Authorization": f"Bearer {self.bearer}",
+            "Content-Type": "application/json"
+        }
+        data = self._request_body(message, model, options, True, system_prompt, history)
+        
+        logger.debug(f"Streaming request to {self.host}/api/chat/completions: {data}")
+        async for content in self._stream_post("/api/chat/completions", data, headers):
+            yield content
 
 class OllamaClient(ChatbotClient):
-    def __init__(self, host: str):
-        super().__init__()
+    def __init__(self, host: str, **pool_options):
+        super().__init__(**pool_options)
         self.host = host
+        # How long the server keeps a model loaded after a request, e.g. "30m", or seconds (-1 keeps it loaded)
+        self.keep_alive: Optional[Union[str, int]] = None
+
+    def _request_body(self, message: str, model: AIModel, options: Optional[ModelOptions], stream: bool,
+                      system_prompt: Optional[str] = None,
+                      history: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
+        """A native /api/chat request; options go under Ollama's own names, which covers num_ctx, num_batch and the like"""
+        data = {
+            "model": model.id,
+            "messages": self._build_messages(message, system_prompt, history),
+            "stream": stream
+        }
+        if options:
+            ollama_options = options.to_ollama_options()
+            if ollama_options:
+                data["options"] = ollama_options
+        if self.keep_alive is not None:
+            data["keep_alive"] = self.keep_alive
+        return data
     
-    async def chat_completion(self, message: str, model: AIModel, options: Optional[ModelOptions] = None) -> Tuple[int, str]:
-        """Send chat completion request to Ollama"""
+    async def chat_completion(self, message: str, model: AIModel, options: Optional[ModelOptions] = None,
+                              system_prompt: Optional[str] = None,
+                              history: Optional[List[Dict[str, str]]] = None) -> Tuple[int, str]:
+        """Send chat completion request to Ollama with retries and circuit breaking"""
+        data = self._request_body(message, model, options, False, system_prompt, history)
+        logger.debug(f"Request to {self.host}/api/chat: {data}")
+        
         try:
-            data = {
-                "model": model.id,
-                "messages": [{"role": "user", "content": message}],
-                "stream": False
-            }
-            logger.debug(f"Request to {self.host}/api/chat/completions: {data}")
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(f"{self.host}/api/chat/completions", json=data) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        return 200, result["choices"][0]["message"]["content"]
-                    else:
-                        raise Exception(f"Chat completion failed: {response.status}")
+            result = await self._post_json("/api/chat", data)
+            return 200, result["message"]["content"]
         except Exception as e:
             logger.debug(f"Chat completion failed: {e}")
-            return 500, str(e)
+            return await self._unavailable(e, message, model, options, system_prompt, history)
+    
+    async def _stream_chunks(self, message: str, model: AIModel, options: Optional[ModelOptions] = None,
+                             system_prompt: Optional[str] = None,
+                             history: Optional[List[Dict[str, str]]] = None) -> AsyncIterator[str]:
+        """Stream a chat completion from Ollama as NDJSON"""
+        data = self._request_body(message, model, options, True, system_prompt, history)
+        logger.debug(f"Streaming request to {self.host}/api/chat: {data}")
+        
+        async for content in self._stream_post("/api/chat", data):
+            yield content
     
     async def get_models(self) -> List[AIModel]:
-        """Get available models from Ollama"""
+        """Get the locally available models from Ollama's native /api/tags"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"{self.host}/api/models") as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return [AIModel(id=model["id"]) for model in data["models"]]
-                    else:
-                        raise Exception(f"Failed to get models: {response.status}")
+            session = await self._get_session()
+            async with session.get(f"{self.host}/api/tags") as response:
+                if response.status == 200:
+                    data = await response.json()
+                    return [AIModel(id=model["name"]) for model in data.get("models", [])]
+                else:
+                    raise Exception(f"Failed to get models: {response.status}")
         except Exception as e:
             logger.debug(f"Failed to get models: {e}")
             return []
 
 class MockChatbotClient:
-    def __init__(self, model_name: str = "mock"):
+    """
+    Answers with canned responses, instantly unless a simulation is configured.
+
+    For load tests the mock can stand in for a real endpoint: latency sets the
+    time to first token, tokens_per_second paces generation (and streaming),
+    faults injects timeouts, gateway errors and malformed responses, and
+    max_concurrency caps how many requests are served at once. Failed
+    requests are retried per retry_policy like the HTTP clients do, and
+    simulated requests are recorded in the metrics registry. All random draws
+    come from one generator seeded with seed, so a run is reproducible.
+    """
+    def __init__(self, model_name: str = "mock", latency: Optional[LatencyModel] = None,
+                 tokens_per_second: Optional[float] = None, faults: Optional[FaultModel] = None,
+                 max_concurrency: Optional[int] = None, seed: Optional[int] = None):
         self.model_name = model_name
         self._system_prompt = ""
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.faults = faults
+        self.max_concurrency = max_concurrency
+        self.retry_policy = RetryPolicy()
+        self._rng = random.Random(seed)
+        self._slots: Optional[asyncio.Semaphore] = None
+    
+    @property
+    def simulated(self) -> bool:
+        return any(value is not None for value in (self.latency, self.tokens_per_second, self.faults,
+                                                   self.max_concurrency))
 
     def set_system_prompt(self, prompt: str) -> None:
         """Set the system prompt for the chat session"""
         if prompt:
             self._system_prompt = prompt
 
-    async def chat_completion(self, message: str, model: AIModel, options: Optional[ModelOptions] = None) -> Tuple[int, str]:
-        prompt = message
+    async def chat_completion(self, message: str, model: AIModel, options: Optional[ModelOptions] = None,
+                              system_prompt: Optional[str] = None,
+                              history: Optional[List[Dict[str, str]]] = None) -> Tuple[int, str]:
+        content = await self._respond(message)
+        if not self.simulated:
+            return 200, content
         
+        metrics = RequestMetrics(model.id, message)
+        policy = self.retry_policy
+        for attempt in range(policy.max_retries + 1):
+            status, text = await self._serve(content, metrics)
+            if status == 200:
+                metrics.finish("ok", text)
+                return status, text
+            if status not in RETRYABLE_STATUSES:
+                break
+            if attempt < policy.max_retries:
+                metrics.retry()
+                await asyncio.sleep(policy.delay(attempt))
+        metrics.finish("error")
+        return 500, f"Chat completion failed after {attempt + 1} attempts: {text}"
+    
+    async def _serve(self, content: str, metrics: RequestMetrics) -> Tuple[int, str]:
+        """One simulated attempt: wait for a slot, the first token and the generation"""
+        # Draw before waiting so the sequence of draws follows the order of requests
+        fault = self.faults.pick(self._rng) if self.faults else None
+        latency = self.latency.sample(self._rng) if self.latency else 0.0
+        queued_at = time.monotonic()
+        async with self._slot():
+            metrics.queued(time.monotonic() - queued_at)
+            if fault == TIMEOUT:
+                await asyncio.sleep(self.faults.timeout)
+                return 504, f"timed out after {self.faults.timeout:.1f}s"
+            await asyncio.sleep(latency)
+            if isinstance(fault, int):
+                return fault, f"HTTP {fault}"
+            metrics.first_token()
+            if fault == MALFORMED:
+                content = malform(content)
+            await asyncio.sleep(self._generation_time(content))
+            return 200, content
+    
+    def _slot(self):
+        """Hold one of the simulated server's request slots"""
+        if not self.max_concurrency:
+            return contextlib.nullcontext()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._slots
+    
+    def _generation_time(self, text: str) -> float:
+        if not self.tokens_per_second:
+            return 0.0
+        return estimate_tokens(text) / self.tokens_per_second
+    
+    async def _respond(self, prompt: str) -> str:
+        """The canned response for a prompt"""
         # If this is a Master Bot LLM prompt (check for specific format markers)
         if "INTENT:" in prompt or "Based on this context and the user's message" in prompt:
             return await self._handle_master_bot_prompt(prompt)
@@ -297,9 +790,9 @@ class MockChatbotClient:
         else:
             response = {"error": "Unknown prompt type"}
 
-        return 200, json.dumps(response)
+        return json.dumps(response)
     
-    async def _handle_master_bot_prompt(self, prompt: str) -> Tuple[int, str]:
+    async def _handle_master_bot_prompt(self, prompt: str) -> str:
         """Handle prompts for the Master Bot LLM integration"""
         # Extract the user message from the prompt
         user_message = ""
@@ -410,7 +903,61 @@ ACTION: provide_help
 RESPONSE: I'm not sure what you're asking for. I can help you create and manage bots. Would you like to create a new bot, list your existing bots, or get help?
 """
             
-        return 200, response
+        return response
+
+    async def chat_completion_many(self, prompts: List[str], model: AIModel, options: Optional[ModelOptions] = None,
+                                   max_concurrency: int = 4, system_prompt: Optional[str] = None) -> List[Tuple[int, str]]:
+        """Answer several prompts concurrently, in prompt order"""
+        return await run_chat_batch(self.chat_completion, prompts, model, options, max_concurrency,
+                                    system_prompt=system_prompt)
+
+    def stream_chat_completion(self, message: str, model: AIModel, options: Optional[ModelOptions] = None,
+                               system_prompt: Optional[str] = None,
+                               history: Optional[List[Dict[str, str]]] = None) -> ChatStream:
+        """Stream the canned response word by word, at tokens_per_second if set"""
+        return ChatStream(self._stream_chunks(message, model, options, system_prompt=system_prompt, history=history))
+
+    async def _stream_chunks(self, message: str, model: AIModel, options: Optional[ModelOptions] = None,
+                             system_prompt: Optional[str] = None,
+                             history: Optional[List[Dict[str, str]]] = None) -> AsyncIterator[str]:
+        content = await self._respond(message)
+        if not self.simulated:
+            for piece in re.findall(r"\s*\S+", content):
+                yield piece
+                await asyncio.sleep(0)
+            return
+        
+        # Like the HTTP clients, streams fail before the first token and are not retried
+        metrics = RequestMetrics(model.id, message)
+        fault = self.faults.pick(self._rng) if self.faults else None
+        latency = self.latency.sample(self._rng) if self.latency else 0.0
+        text = ""
+        try:
+            queued_at = time.monotonic()
+            async with self._slot():
+                metrics.queued(time.monotonic() - queued_at)
+                if fault == TIMEOUT:
+                    await asyncio.sleep(self.faults.timeout)
+                    raise asyncio.TimeoutError(f"timed out after {self.faults.timeout:.1f}s")
+                await asyncio.sleep(latency)
+                if isinstance(fault, int):
+                    raise Exception(f"Chat completion failed: {fault}")
+                if fault == MALFORMED:
+                    content = malform(content)
+                for piece in re.findall(r"\s*\S+", content):
+                    if not text:
+                        metrics.first_token()
+                    text += piece
+                    yield piece
+                    await asyncio.sleep(self._generation_time(piece))
+        except BaseException as e:
+            metrics.finish("error" if isinstance(e, Exception) else "cancelled")
+            raise
+        metrics.finish("ok", text)
 
     async def get_models(self):
-        return [AIModel(id=self.model_name)] 
\ No newline at end of file
+        return [AIModel(id=self.model_name)]
+
+    async def aclose(self) -> None:
+        """The mock client holds no connections"""
+        pass 
\ No newline at end of file
@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from .batch import run_chat_batch
+from .metrics import current_call_site, get_metrics_registry
+from .models import AIModel, ModelOptions
+from .resilience import RequestRejectedError, is_endpoint_failure
+from .streaming import ChatStream
+
+logger = logging.getLogger(__name__)
+
+class Backend:
+    """One endpoint behind a LoadBalancedClient and what we have observed about it"""
+    def __init__(self, client: Any):
+        self.client = client
+        self.outstanding = 0
+        self.ewma_latency: Optional[float] = None
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.requests = 0
+
+    @property
+    def host(self) -> str:
+        return getattr(self.client, "host", repr(self.client))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "ewma_latency": self.ewma_latency,
+            "requests": self.requests
+        }
+
+class LoadBalancedClient:
+    """
+    Spreads requests over several clients serving the same models.
+
+    Each request goes to the healthy backend with the lowest
+    (outstanding requests + 1) * EWMA latency, so slow or busy replicas get
+    proportionally less traffic. Backends that fail repeatedly are taken out
+    of rotation. A background probe calls get_models on every backend and
+    puts it back once it answers again.
+    """
+    def __init__(self, clients: List[Any], health_interval: float = 10.0, ewma_alpha: float = 0.3,
+                 max_failures: int = 3):
+        if not clients:
+            raise ValueError("LoadBalancedClient needs at least one client")
+        self.backends = [Backend(client) for client in clients]
+        self.health_interval = health_interval
+        self.ewma_alpha = ewma_alpha
+        self.max_failures = max_failures
+        self._system_prompt = ""
+        self._health_task: Optional[asyncio.Task] = None
+
+    @property
+    def host(self) -> str:
+        return ",".join(backend.host for backend in self.backends)
+
+    def set_system_prompt(self, prompt: str) -> None:
+        if prompt:
+            self._system_prompt = prompt
+            for backend in self.backends:
+                backend.client.set_system_prompt(prompt)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Routing state of every backend, keyed by host"""
+        return {backend.host: backend.snapshot() for backend in self.backends}
+
+    def _pick(self, exclude: Tuple[Backend, ...] = ()) -> Backend:
+        candidates = [b for b in self.backends if b.healthy and b not in exclude]
+        if not candidates:
+            # Nothing known to be healthy: try anything rather than fail without a request
+            candidates = [b for b in self.backends if b not in exclude] or self.backends
+        known = [b.ewma_latency for b in candidates if b.ewma_latency is not None]
+        # Backends without samples yet are scored as average so they still get traffic
+        default_latency = sum(known) / len(known) if known else 1.0
+        return min(
+            candidates,
+            key=lambda b: (b.outstanding + 1) * (b.ewma_latency if b.ewma_latency is not None else default_latency)
+        )
+
+    def has_backend_outside(self, route: List[Backend]) -> bool:
+        """Whether a healthy backend not yet used by this route is left"""
+        return any(b.healthy and b not in route for b in self.backends)
+
+    def _record(self, backend: Backend, latency: float, status: int) -> None:
+        """Update a backend from a request's status. Only server errors, 429, timeouts
+        and connection errors (500 from the client) count as failures."""
+        if not is_endpoint_failure(status):
+            # The backend answered, even if it rejected the request
+            backend.consecutive_failures = 0
+            if status != 200:
+                return
+            if backend.ewma_latency is None:
+                backend.ewma_latency = latency
+            else:
+                backend.ewma_latency += self.ewma_alpha * (latency - backend.ewma_latency)
+            return
+        backend.consecutive_failures += 1
+        if backend.healthy and backend.consecutive_failures >= self.max_failures:
+            backend.healthy = False
+            logger.warning(f"Taking {backend.host} out of rotation after {backend.consecutive_failures} failures")
+
+    async def chat_completion(self, message: str, model: AIModel, options: Optional[ModelOptions] = None,
+                              system_prompt: Optional[str] = None,
+                              history: Optional[List[Dict[str, str]]] = None,
+                              route: Optional[List[Backend]] = None) -> Tuple[int, str]:
+        """
+        Send the request to the best backend, trying another one if it fails.
+        Backends are appended to route as they are tried and backends already
+        in it are avoided, so a hedge sharing the primary's route goes elsewhere.
+        """
+        self._ensure_health_checks()
+        route = [] if route is None else route
+        result: Tuple[int, str] = (503, "No backend available")
+        for _ in range(min(2, len(self.backends))):
+            backend = self._pick(exclude=tuple(route))
+            route.append(backend)
+            backend.outstanding += 1
+            backend.requests += 1
+            started = time.monotonic()
+            try:
+                result = await backend.client.chat_completion(
+                    message, model, options, system_prompt=system_prompt, history=history
+                )
+            finally:
+                backend.outstanding -= 1
+            self._record(backend, time.monotonic() - started, result[0])
+            if not is_endpoint_failure(result[0]):
+                return result
+            logger.warning(f"Backend {backend.host} failed with {result[0]}, trying another")
+            get_metrics_registry().inc(
+                "llm_fallbacks_total", kind="failover", model=model.id, call_site=current_call_site.get()
+            )
+        return result
+
+    async def chat_completion_many(self, prompts: List[str], model: AIModel, options: Optional[ModelOptions] = None,
+                                   max_concurrency: int = 4, system_prompt: Optional[str] = None) -> List[Tuple[int, str]]:
+        return await run_chat_batch(self.chat_completion, prompts, model, options, max_concurrency,
+                                    system_prompt=system_prompt)
+
+    def stream_chat_completion(self, message: str, model: AIModel, options: Optional[ModelOptions] = None,
+                               system_prompt: Optional[str] = None,
+                               history: Optional[List[Dict[str, str]]] = None) -> ChatStream:
+        return ChatStream(self._stream_chunks(message, model, options, system_prompt, history))
+
+    async def _stream_chunks(self, message: str, model: AIModel, options: Optional[ModelOptions],
+                             system_prompt: Optional[str], history: Optional[List[Dict[str, str]]]) -> AsyncIterator[str]:
+        self._ensure_health_checks()
+        backend = self._pick()
+        backend.outstanding += 1
+        backend.requests += 1
+        started = time.monotonic()
+        # Timeouts and connection errors count as 500; a reader that stops early counts as nothing
+        status: Optional[int] = 500
+        try:
+            async for chunk in backend.client.stream_chat_completion(
+                message, model, options, system_prompt=system_prompt, history=history
+            ):
+                yield chunk
+            status = 200
+        except RequestRejectedError as e:
+            status = e.status
+            raise
+        except (GeneratorExit, asyncio.CancelledError):
+            status = None
+            raise
+        finally:
+            backend.outstanding -= 1
+            if status is not None:
+                self._record(backend, time.monotonic() - started, status)
+
+    async def get_models(self) -> List[AIModel]:
+        """Models of the first healthy backend that answers"""
+        for backend in sorted(self.backends, key=lambda b: not b.healthy):
+            models = await backend.client.get_models()
+            if models:
+                return models
+        return []
+
+    async def check_health(self) -> None:
+        """Probe every backend once and update its rotation status"""
+        async def probe(backend: Backend) -> None:
+            try:
+                healthy = bool(await backend.client.get_models())
+            except Exception as e:
+                logger.debug(f"Health probe for {backend.host} failed: {e}")
+                healthy = False
+            if healthy and not backend.healthy:
+                logger.info(f"{backend.host} recovered, returning it to rotation")
+                backend.consecutive_failures = 0
+            elif not healthy and backend.healthy:
+                logger.warning(f"{backend.host} failed its health probe, taking it out of rotation")
+            backend.healthy = healthy
+
+        await asyncio.gather(*[probe(backend) for backend in self.backends])
+
+    def _ensure_health_checks(self) -> None:
+        if self.health_interval <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        task = self._health_task
+        if task is None or task.done() or task.get_loop() is not loop:
+            self._health_task = loop.create_task(self._health_loop())
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_interval)
+            await self.check_health()
+
+    async def aclose(self) -> None:
+        """Stop health probing and close every backend client"""
+        task, self._health_task = self._health_task, None
+        if task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        for backend in self.backends:
+            if hasattr(backend.client, "aclose"):
+                await backend.client.aclose()
@@ -0,0 +1,29 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from .models import AIModel, ModelOptions
+
+logger = logging.getLogger(__name__)
+
+ChatCompletionFn = Callable[..., Awaitable[Tuple[int, str]]]
+
+async def run_chat_batch(chat_completion: ChatCompletionFn, prompts: List[str], model: AIModel,
+                         options: Optional[ModelOptions] = None, max_concurrency: int = 4,
+                         **request_kwargs) -> List[Tuple[int, str]]:
+    """Run independent chat completions with at most max_concurrency in flight.
+    Results are returned in prompt order. A prompt that raises yields
+    (500, error message) so one failure does not fail the batch.
+    request_kwargs (e.g. system_prompt) are passed to every call.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def complete(index: int, prompt: str) -> Tuple[int, str]:
+        async with semaphore:
+            try:
+                return await chat_completion(prompt, model, options, **request_kwargs)
+            except Exception as e:
+                logger.error(f"Batch item {index} failed: {e}")
+                return 500, str(e)
+
+    return list(await asyncio.gather(*[complete(i, prompt) for i, prompt in enumerate(prompts)]))
@@ -0,0 +1,236 @@
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from dataclasses import asdict, is_dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from .batch import run_chat_batch
+from .models import AIModel, ModelOptions
+from .streaming import ChatStream
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "mother_of_bots" / "llm_responses.sqlite"
+
+def make_request_key(model_id: str, system_prompt: str, message: str, options: Any = None,
+                     history: Optional[List[Dict[str, str]]] = None) -> str:
+    """Build a stable key for a chat completion request"""
+    if options is not None and is_dataclass(options):
+        options = asdict(options)
+    payload = {
+        "model": model_id,
+        "system_prompt": system_prompt or "",
+        "message": message,
+        "options": options
+    }
+    if history:
+        payload["history"] = history
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+class ResponseCache:
+    """
+    Two-tier cache for LLM responses.
+    A bounded in-memory LRU with TTL sits in front of an optional SQLite file
+    that survives restarts. Entries found on disk are promoted to memory.
+    """
+    def __init__(self, max_entries: int = 512, ttl: float = 24 * 3600,
+                 path: Optional[Union[str, Path]] = DEFAULT_CACHE_PATH):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = Path(path) if path else None
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0}
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses "
+                    "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+                )
+
+    @property
+    def hits(self) -> int:
+        return self.stats["memory_hits"] + self.stats["disk_hits"]
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.stats["misses"]
+        return self.hits / total if total else 0.0
+
+    async def get(self, key: str) -> Optional[str]:
+        """Look up a response, checking memory first and then disk"""
+        entry = self._memory.get(key)
+        if entry is not None:
+            created_at, value = entry
+            if time.time() - created_at < self.ttl:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return value
+            del self._memory[key]
+
+        if self.path:
+            entry = await asyncio.to_thread(self._disk_get, key)
+            if entry is not None:
+                created_at, value = entry
+                self._remember(key, value, created_at)
+                self.stats["disk_hits"] += 1
+                return value
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: str) -> None:
+        """Store a response in both tiers"""
+        created_at = time.time()
+        self._remember(key, value, created_at)
+        if self.path:
+            await asyncio.to_thread(self._disk_set, key, value, created_at)
+        self.stats["writes"] += 1
+
+    async def clear(self) -> None:
+        """Drop every cached response"""
+        self._memory.clear()
+        if self.path:
+            await asyncio.to_thread(self._disk_clear)
+
+    def _remember(self, key: str, value: str, created_at: float) -> None:
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection per operation keeps the disk tier safe to use from worker threads
+        return sqlite3.connect(self.path, timeout=5)
+
+    def _disk_get(self, key: str) -> Optional[Tuple[float, str]]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT created_at, value FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if time.time() - row[0] >= self.ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            return row[0], row[1]
+
+    def _disk_set(self, key: str, value: str, created_at: float) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at) VALUES (?, ?, ?)",
+                (key, value, created_at)
+            )
+
+    def _disk_clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+def cache_enabled(use_cache: Optional[bool], config: Optional[Dict[str, Any]] = None) -> bool:
+    """use_cache if it is set, otherwise the llm_cache setting; caching is off by default"""
+    if use_cache is not None:
+        return use_cache
+    return str((config or {}).get("llm_cache", "false")).lower() in ("1", "true", "yes")
+
+def create_response_cache(config: Optional[Dict[str, Any]] = None) -> ResponseCache:
+    """Create a response cache from optional llm_cache_* configuration keys.
+    Setting llm_cache_path to "none" keeps the cache in memory only.
+    """
+    config = config or {}
+    path = config.get("llm_cache_path", DEFAULT_CACHE_PATH)
+    if isinstance(path, str) and path.lower() in ("", "none", "memory"):
+        path = None
+    return ResponseCache(
+        max_entries=int(config.get("llm_cache_size", 512)),
+        ttl=float(config.get("llm_cache_ttl", 24 * 3600)),
+        path=path
+    )
+
+class CachedChatbotClient:
+    """
+    Wraps any chatbot client and serves repeated chat completions from a
+    ResponseCache. Requests are keyed by model id, system prompt, message and
+    options; only successful responses are stored.
+    """
+    def __init__(self, client: Any, cache: Optional[ResponseCache] = None):
+        self.client = client
+        self.cache = cache or ResponseCache()
+
+    def __getattr__(self, name: str) -> Any:
+        # Anything not handled here (host, get_models, ...) goes to the wrapped client
+        return getattr(self.client, name)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return self.cache.stats
+
+    def set_system_prompt(self, prompt: str) -> None:
+        self.client.set_system_prompt(prompt)
+
+    def _key(self, message: str, model: AIModel, options: Optional[ModelOptions],
+             system_prompt: Optional[str], history: Optional[List[Dict[str, str]]]) -> str:
+        if system_prompt is None:
+            system_prompt = getattr(self.client, "_system_prompt", "")
+        return make_request_key(model.id, system_prompt, message, options, history)
+
+    async def chat_completion(self, message: str, model: AIModel, options: Optional[ModelOptions] = None,
+                              system_prompt: Optional[str] = None, history: Optional[List[Dict[str, str]]] = None,
+                              use_cache: bool = True) -> Tuple[int, str]:
+        """Return a cached response if available, otherwise call the wrapped client.
+        Pass use_cache=False to bypass the cache for a single call.
+        """
+        if not use_cache:
+            return await self.client.chat_completion(message, model, options, system_prompt=system_prompt, history=history)
+
+        key = self._key(message, model, options, system_prompt=system_prompt, history=history)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            logger.debug(f"Response cache hit for model {model.id}")
+            return 200, cached
+
+        status, content = await self.client.chat_completion(message, model, options, system_prompt=system_prompt, history=history)
+        if status == 200:
+            await self.cache.set(key, content)
+        return status, content
+
+    async def chat_completion_many(self, prompts: List[str], model: AIModel, options: Optional[ModelOptions] = None,
+                                   max_concurrency: int = 4, system_prompt: Optional[str] = None) -> List[Tuple[int, str]]:
+        """Batch chat completions, serving cached prompts without an upstream call"""
+        return await run_chat_batch(self.chat_completion, prompts, model, options, max_concurrency,
+                                    system_prompt=system_prompt)
+
+    def stream_chat_completion(self, message: str, model: AIModel, options: Optional[ModelOptions] = None,
+                               system_prompt: Optional[str] = None, history: Optional[List[Dict[str, str]]] = None,
+                               use_cache: bool = True) -> ChatStream:
+        """Stream a response, replaying cached responses as a single chunk"""
+        return ChatStream(self._stream_chunks(message, model, options, system_prompt, history, use_cache))
+
+    async def _stream_chunks(self, message: str, model: AIModel, options: Optional[ModelOptions],
+                             system_prompt: Optional[str], history: Optional[List[Dict[str, str]]],
+                             use_cache: bool) -> AsyncIterator[str]:
+        if not use_cache:
+            async for chunk in self.client.stream_chat_completion(message, model, options, system_prompt=system_prompt, history=history):
+                yield chunk
+            return
+
+        key = self._key(message, model, options, system_prompt=system_prompt, history=history)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+        parts = []
+        async for chunk in self.client.stream_chat_completion(message, model, options, system_prompt=system_prompt, history=history):
+            parts.append(chunk)
+            yield chunk
+        await self.cache.set(key, "".join(parts))
+
+    async def aclose(self) -> None:
+        if hasattr(self.client, "aclose"):
+            await self.client.aclose()
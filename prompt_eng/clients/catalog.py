@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .coalesce import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+class ModelCatalog:
+    """
+    Process-wide cache of the models each LLM host serves, and of each host's
+    endpoint type.
+
+    Model lists are fresh for ttl seconds. After that the stale list is still
+    returned immediately while one background refresh fetches a new one, so
+    only the very first lookup per host waits on the server's model list. Empty lists are
+    never cached because they usually mean the host was unreachable.
+    """
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self._models: Dict[str, Tuple[float, List[Any]]] = {}
+        self._endpoint_types: Dict[str, str] = {}
+        self._group = SingleFlight()
+        self._refreshing: set = set()
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0}
+
+    def _lookup(self, host: str) -> Tuple[Optional[List[Any]], bool]:
+        entry = self._models.get(host)
+        if entry is None:
+            return None, False
+        fetched_at, models = entry
+        return models, time.monotonic() - fetched_at >= self.ttl
+
+    def _store(self, host: str, models: List[Any]) -> List[Any]:
+        if models:
+            self._models[host] = (time.monotonic(), list(models))
+        return models
+
+    async def get_models(self, host: str, fetch: Callable[[], Awaitable[List[Any]]]) -> List[Any]:
+        """Return the models for a host, fetching them only when not cached"""
+        models, stale = self._lookup(host)
+        if models is None:
+            self.stats["misses"] += 1
+            # Concurrent first lookups for the same host share one fetch
+            return self._store(host, await self._group.do(host, fetch))
+
+        if stale:
+            self.stats["stale_hits"] += 1
+            if host not in self._refreshing:
+                self._refreshing.add(host)
+                task = asyncio.ensure_future(self._refresh(host, fetch))
+                task.add_done_callback(lambda _: self._refreshing.discard(host))
+        else:
+            self.stats["hits"] += 1
+        return list(models)
+
+    async def _refresh(self, host: str, fetch: Callable[[], Awaitable[List[Any]]]) -> None:
+        self.stats["refreshes"] += 1
+        try:
+            self._store(host, await fetch())
+        except Exception as e:
+            logger.warning(f"Background model refresh for {host} failed: {e}")
+
+    async def get_endpoint_type(self, host: str, probe: Callable[[], Awaitable[str]]) -> str:
+        """Return the endpoint type for a host, probing it at most once per process"""
+        endpoint_type = self._endpoint_types.get(host)
+        if endpoint_type is None:
+            endpoint_type = await self._group.do(f"endpoint-type:{host}", probe)
+            self._endpoint_types[host] = endpoint_type
+        return endpoint_type
+
+    def invalidate(self, host: Optional[str] = None) -> None:
+        """Forget cached models and endpoint types for one host, or for all hosts"""
+        if host is None:
+            self._models.clear()
+            self._endpoint_types.clear()
+        else:
+            self._models.pop(host, None)
+            self._endpoint_types.pop(host, None)
+
+_catalog: Optional[ModelCatalog] = None
+
+def get_model_catalog() -> ModelCatalog:
+    """Return the process-wide model catalog, creating it on first use"""
+    global _catalog
+    if _catalog is None:
+        _catalog = ModelCatalog()
+    return _catalog
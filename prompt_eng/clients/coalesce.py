@@ -0,0 +1,88 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from .batch import run_chat_batch
+from .cache import make_request_key
+from .models import AIModel, ModelOptions
+from .streaming import ChatStream
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time. Callers arriving while a call is
+    in flight wait for it and share its result (or exception) instead of
+    starting their own.
+    """
+    def __init__(self):
+        self._inflight: Dict[str, "asyncio.Future[Any]"] = {}
+        self.stats = {"calls": 0, "upstream_calls": 0, "collapsed": 0}
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        self.stats["calls"] += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats["upstream_calls"] += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.stats["collapsed"] += 1
+            logger.debug(f"Coalesced request onto in-flight call ({self.stats['collapsed']} collapsed so far)")
+        # Shield the shared call so one caller being cancelled does not cancel it for the others
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: "asyncio.Future[Any]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+class CoalescingChatbotClient:
+    """
+    Wraps any chatbot client so that concurrent chat completions with the same
+    model, system prompt, message and options share one upstream call.
+    """
+    def __init__(self, client: Any, group: Optional[SingleFlight] = None):
+        self.client = client
+        self.group = group or SingleFlight()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return self.group.stats
+
+    def set_system_prompt(self, prompt: str) -> None:
+        self.client.set_system_prompt(prompt)
+
+    async def chat_completion(self, message: str, model: AIModel, options: Optional[ModelOptions] = None,
+                              system_prompt: Optional[str] = None,
+                              history: Optional[List[Dict[str, str]]] = None) -> Tuple[int, str]:
+        effective_prompt = getattr(self.client, "_system_prompt", "") if system_prompt is None else system_prompt
+        key = make_request_key(model.id, effective_prompt, message, options, history)
+        return await self.group.do(
+            key, lambda: self.client.chat_completion(message, model, options, system_prompt=system_prompt, history=history)
+        )
+
+    async def chat_completion_many(self, prompts: List[str], model: AIModel, options: Optional[ModelOptions] = None,
+                                   max_concurrency: int = 4, system_prompt: Optional[str] = None) -> List[Tuple[int, str]]:
+        """Batch chat completions; duplicate prompts in the batch share one call"""
+        return await run_chat_batch(self.chat_completion, prompts, model, options, max_concurrency,
+                                    system_prompt=system_prompt)
+
+    def stream_chat_completion(self, message: str, model: AIModel, options: Optional[ModelOptions] = None,
+                               system_prompt: Optional[str] = None,
+                               history: Optional[List[Dict[str, str]]] = None) -> ChatStream:
+        # Streams are consumed incrementally by one reader, so they are not shared
+        return self.client.stream_chat_completion(message, model, options, system_prompt=system_prompt, history=history)
+
+    async def aclose(self) -> None:
+        if hasattr(self.client, "aclose"):
+            await self.client.aclose()
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .balancer import LoadBalancedClient
+from .batch import run_chat_batch
+from .models import AIModel, ModelOptions
+from .resilience import LatencyTracker
+from .streaming import ChatStream
+
+logger = logging.getLogger(__name__)
+
+class HedgeBudget:
+    """
+    Token bucket that caps hedges to a fraction of requests.
+    Every request earns ratio tokens (up to burst) and every hedge spends one,
+    so hedging can add at most ratio extra load over time.
+    """
+    def __init__(self, ratio: float = 0.1, burst: float = 5.0):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = 0.0
+
+    def earn(self) -> None:
+        self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def spend(self) -> bool:
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        return False
+
+def has_hedge_target(client: Any, hedge_client: Optional[Any] = None, hedge_model: Optional[AIModel] = None) -> bool:
+    """Whether a hedge could go somewhere other than the primary endpoint and model"""
+    return (hedge_client is not None and hedge_client is not client) or hedge_model is not None \
+        or isinstance(client, LoadBalancedClient)
+
+class HedgedChatbotClient:
+    """
+    Wraps a chatbot client and hedges slow chat completions.
+
+    If a request is still running after the given percentile of recent
+    latencies, a duplicate is sent to hedge_client (another endpoint) and/or
+    hedge_model. Whichever answers successfully first wins and the other
+    request is cancelled. Without either, only a LoadBalancedClient is
+    hedged: the duplicate goes to a healthy replica other than the one
+    serving the primary, and is skipped when there is none, since a
+    duplicate to the same endpoint and model would only add load. Hedging
+    starts once min_samples primary latencies have been seen and is limited by a
+    HedgeBudget. Streams are passed through unhedged.
+    """
+    def __init__(self, client: Any, hedge_client: Optional[Any] = None, hedge_model: Optional[AIModel] = None,
+                 percentile: float = 0.95, budget: Optional[HedgeBudget] = None, min_samples: int = 20):
+        self.client = client
+        self.hedge_client = hedge_client or client
+        self.hedge_model = hedge_model
+        self.enabled = has_hedge_target(client, hedge_client, hedge_model)
+        # Duplicates through the primary's balancer share its route to avoid its replica
+        self.balancer = client if isinstance(client, LoadBalancedClient) and self.hedge_client is client else None
+        self.percentile = percentile
+        self.budget = budget or HedgeBudget()
+        self.latency = LatencyTracker(min_samples=min_samples)
+        self.stats = {"requests": 0, "hedged": 0, "hedge_wins": 0, "budget_exhausted": 0, "no_target": 0}
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    def set_system_prompt(self, prompt: str) -> None:
+        self.client.set_system_prompt(prompt)
+        if self.hedge_client is not self.client:
+            self.hedge_client.set_system_prompt(prompt)
+
+    def _hedge_delay(self) -> Optional[float]:
+        if not self.enabled or self.latency.sample_count < self.latency.min_samples:
+            return None
+        return self.latency.percentile(self.percentile)
+
+    async def chat_completion(self, message: str, model: AIModel, options: Optional[ModelOptions] = None,
+                              system_prompt: Optional[str] = None,
+                              history: Optional[List[Dict[str, str]]] = None) -> Tuple[int, str]:
+        self.stats["requests"] += 1
+        self.budget.earn()
+        started = time.monotonic()
+        routing: Dict[str, Any] = {"route": []} if self.balancer else {}
+        primary = asyncio.ensure_future(
+            self.client.chat_completion(message, model, options, system_prompt=system_prompt, history=history, **routing)
+        )
+        tasks = [primary]
+        try:
+            delay = self._hedge_delay()
+            if delay is not None:
+                await asyncio.wait({primary}, timeout=delay)
+                if not primary.done():
+                    if self.balancer and self.hedge_model is None and not self.balancer.has_backend_outside(routing["route"]):
+                        self.stats["no_target"] += 1
+                    elif self.budget.spend():
+                        self.stats["hedged"] += 1
+                        logger.debug(f"Hedging request still running after {delay:.2f}s")
+                        tasks.append(asyncio.ensure_future(self.hedge_client.chat_completion(
+                            message, self.hedge_model or model, options,
+                            system_prompt=system_prompt, history=history, **routing
+                        )))
+                    else:
+                        self.stats["budget_exhausted"] += 1
+
+            winner, result = await self._first_success(tasks)
+            if winner is not primary:
+                self.stats["hedge_wins"] += 1
+            # Only primary attempts set the hedge delay; a hedge's time says nothing about the primary
+            if winner is primary and result[0] == 200:
+                self.latency.observe(time.monotonic() - started)
+            return result
+        finally:
+            # Cancel whichever request lost (or every request if we were cancelled)
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _first_success(self, tasks: List["asyncio.Future[Tuple[int, str]]"]) -> Tuple[Any, Tuple[int, str]]:
+        """Wait for the first successful result; if every task fails, return the primary's result"""
+        pending = set(tasks)
+        results: Dict[Any, Tuple[int, str]] = {}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    results[task] = task.result()
+                except Exception as e:
+                    results[task] = (500, str(e))
+                if results[task][0] == 200:
+                    return task, results[task]
+        return tasks[0], results[tasks[0]]
+
+    async def chat_completion_many(self, prompts: List[str], model: AIModel, options: Optional[ModelOptions] = None,
+                                   max_concurrency: int = 4, system_prompt: Optional[str] = None) -> List[Tuple[int, str]]:
+        return await run_chat_batch(self.chat_completion, prompts, model, options, max_concurrency,
+                                    system_prompt=system_prompt)
+
+    def stream_chat_completion(self, message: str, model: AIModel, options: Optional[ModelOptions] = None,
+                               system_prompt: Optional[str] = None,
+                               history: Optional[List[Dict[str, str]]] = None) -> ChatStream:
+        return self.client.stream_chat_completion(message, model, options, system_prompt=system_prompt, history=history)
+
+    async def aclose(self) -> None:
+        if hasattr(self.client, "aclose"):
+            await self.client.aclose()
+        if self.hedge_client is not self.client and hasattr(self.hedge_client, "aclose"):
+            await self.hedge_client.aclose()
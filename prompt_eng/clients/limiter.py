@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class LimiterSlot:
+    """Handle for one admitted request; mark it overloaded on gateway errors"""
+    def __init__(self, wait_time: float):
+        self.wait_time = wait_time
+        self.overloaded = False
+
+    def mark_overloaded(self) -> None:
+        self.overloaded = True
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit for a single LLM host.
+
+    Each healthy response that completes while the limiter is saturated grows
+    the limit by 1/limit (about +1 per full window). Gateway errors and
+    timeouts multiply it by backoff_ratio, at most once per round trip, so a
+    burst of failures from one overload counts once. A response is healthy
+    when it succeeds within latency_target seconds (any success if unset).
+    """
+    def __init__(self, initial_limit: int = 4, min_limit: int = 1, max_limit: int = 64,
+                 backoff_ratio: float = 0.5, latency_target: Optional[float] = None):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_target = latency_target
+        self._limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self._inflight = 0
+        self._waiters: Deque["asyncio.Future[None]"] = deque()
+        self._last_decrease = 0.0
+        self.stats = {
+            "admitted": 0,
+            "queue_wait_total": 0.0,
+            "queue_wait_max": 0.0,
+            "increases": 0,
+            "decreases": 0
+        }
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current limit, load and queue wait metrics"""
+        admitted = self.stats["admitted"]
+        return {
+            "limit": self.limit,
+            "inflight": self._inflight,
+            "queued": self.queued,
+            "queue_wait_avg": self.stats["queue_wait_total"] / admitted if admitted else 0.0,
+            **self.stats
+        }
+
+    async def acquire(self) -> float:
+        """Wait for a free slot and return the time spent queued in seconds"""
+        start = time.monotonic()
+        if self._inflight < self.limit and not self._waiters:
+            self._inflight += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # The slot was granted just as we were cancelled; hand it on
+                    self._inflight -= 1
+                    self._wake_waiters()
+                else:
+                    self._waiters.remove(waiter)
+                raise
+
+        wait_time = time.monotonic() - start
+        self.stats["admitted"] += 1
+        self.stats["queue_wait_total"] += wait_time
+        self.stats["queue_wait_max"] = max(self.stats["queue_wait_max"], wait_time)
+        return wait_time
+
+    def release(self, latency: float, outcome: str, started_at: Optional[float] = None) -> None:
+        """Return a slot and adapt the limit.
+        outcome is "ok", "overload" or "error"; errors leave the limit unchanged.
+        """
+        saturated = self._inflight >= self.limit
+        self._inflight -= 1
+
+        if outcome == "overload":
+            # Only back off once per round trip: ignore failures of requests sent before the last decrease
+            if started_at is None or started_at > self._last_decrease:
+                previous = self.limit
+                self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+                self._last_decrease = time.monotonic()
+                self.stats["decreases"] += 1
+                logger.warning(f"Host overloaded, concurrency limit {previous} -> {self.limit}")
+        elif outcome == "ok" and saturated:
+            if self.latency_target is None or latency <= self.latency_target:
+                previous = self.limit
+                self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+                self.stats["increases"] += 1
+                if self.limit != previous:
+                    logger.debug(f"Concurrency limit raised to {self.limit}")
+
+        self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        while self._waiters and self._inflight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._inflight += 1
+                waiter.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[LimiterSlot]:
+        """Hold a slot for the duration of one request.
+        Timeouts and slots marked overloaded shrink the limit.
+        """
+        wait_time = await self.acquire()
+        started_at = time.monotonic()
+        slot = LimiterSlot(wait_time)
+        outcome = "error"
+        try:
+            yield slot
+            outcome = "ok"
+        except asyncio.TimeoutError:
+            outcome = "overload"
+            raise
+        finally:
+            if slot.overloaded:
+                outcome = "overload"
+            self.release(time.monotonic() - started_at, outcome, started_at)
+
+_host_limiters: Dict[str, AdaptiveLimiter] = {}
+
+def get_host_limiter(host: str, **limiter_options) -> AdaptiveLimiter:
+    """Return the process-wide limiter for a host, creating it on first use"""
+    limiter = _host_limiters.get(host)
+    if limiter is None:
+        limiter = AdaptiveLimiter(**limiter_options)
+        _host_limiters[host] = limiter
+    return limiter
+
+def host_limiter_metrics() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of every host limiter, keyed by host"""
+    return {host: limiter.snapshot() for host, limiter in _host_limiters.items()}
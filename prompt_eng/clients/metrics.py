@@ -0,0 +1,265 @@
+import asyncio
+import bisect
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Which part of the application issued the current request, e.g. "intent" or "code"
+current_call_site: ContextVar[str] = ContextVar("current_call_site", default="default")
+
+@contextmanager
+def call_site(name: str) -> Iterator[None]:
+    """Label every LLM request made inside the block with this call site"""
+    token = current_call_site.set(name)
+    try:
+        yield
+    finally:
+        current_call_site.reset(token)
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text and JSON)"""
+    return (len(text) + 3) // 4
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 4096, 16384)
+RATE_BUCKETS = (1, 5, 10, 20, 50, 100, 200, 500)
+
+# name -> (help text, bucket bounds); histograms not listed here use LATENCY_BUCKETS
+HISTOGRAMS: Dict[str, Tuple[str, Sequence[float]]] = {
+    "llm_queue_seconds": ("Time spent waiting for a host concurrency slot", LATENCY_BUCKETS),
+    "llm_connect_seconds": ("Time to open a new connection", LATENCY_BUCKETS),
+    "llm_ttft_seconds": ("Time to the first streamed token", LATENCY_BUCKETS),
+    "llm_request_seconds": ("Total request latency including retries", LATENCY_BUCKETS),
+    "llm_prompt_tokens": ("Prompt size in tokens", TOKEN_BUCKETS),
+    "llm_response_tokens": ("Response size in tokens", TOKEN_BUCKETS),
+    "llm_tokens_per_second": ("Response tokens per second of request time", RATE_BUCKETS)
+}
+
+COUNTERS: Dict[str, str] = {
+    "llm_requests_total": "Requests by outcome",
+    "llm_retries_total": "Retried attempts",
+    "llm_fallbacks_total": "Requests answered by a fallback or failed after all retries",
+    "llm_connections_total": "Connections used, new or reused"
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+    """Cumulative histogram with fixed bucket upper bounds, as Prometheus expects"""
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th observation (inf past the last bucket)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = [
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in pairs
+    ]
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+class MetricsRegistry:
+    """In-process histograms and counters keyed by metric name and labels"""
+    def __init__(self):
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._counter_help: Dict[str, str] = dict(COUNTERS)
+        self._summary_task: Optional[asyncio.Task] = None
+
+    def register_counter(self, name: str, help: str) -> None:
+        """Describe a counter defined outside the client layer, for the Prometheus output"""
+        self._counter_help[name] = help
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        series = self._histograms.setdefault(name, {})
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram(HISTOGRAMS.get(name, ("", LATENCY_BUCKETS))[1])
+        histogram.observe(value)
+
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        series = self._counters.setdefault(name, {})
+        series[key] = series.get(key, 0) + amount
+
+    def histogram(self, name: str, **labels: str) -> Optional[Histogram]:
+        return self._histograms.get(name, {}).get(tuple(sorted(labels.items())))
+
+    def counter(self, name: str, **labels: str) -> float:
+        return self._counters.get(name, {}).get(tuple(sorted(labels.items())), 0)
+
+    def reset(self) -> None:
+        self._histograms.clear()
+        self._counters.clear()
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+        for name, series in sorted(self._histograms.items()):
+            lines.append(f"# HELP {name} {HISTOGRAMS.get(name, (name,))[0]}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in sorted(series.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, ('le', _format_bound(bound)))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        for name, series in sorted(self._counters.items()):
+            lines.append(f"# HELP {name} {self._counter_help.get(name, name)}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in sorted(series.items()):
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """One line per model and call site: request count, latency percentiles, TTFT and tokens/sec"""
+        requests = self._histograms.get("llm_request_seconds", {})
+        if not requests:
+            return "no LLM requests recorded"
+        lines = []
+        for labels, histogram in sorted(requests.items()):
+            label_dict = dict(labels)
+            ttft = self.histogram("llm_ttft_seconds", **label_dict)
+            rate = self.histogram("llm_tokens_per_second", **label_dict)
+            retries = self.counter("llm_retries_total", **label_dict)
+            parts = [
+                f"{label_dict.get('model', '?')}/{label_dict.get('call_site', '?')}:",
+                f"n={histogram.count}",
+                f"mean={histogram.sum / histogram.count:.2f}s",
+                f"p50<={histogram.quantile(0.5)}s",
+                f"p99<={histogram.quantile(0.99)}s"
+            ]
+            if ttft and ttft.count:
+                parts.append(f"ttft_p50<={ttft.quantile(0.5)}s")
+            if rate and rate.count:
+                parts.append(f"tok/s={rate.sum / rate.count:.1f}")
+            if retries:
+                parts.append(f"retries={retries:g}")
+            lines.append(" ".join(parts))
+        return "\n".join(lines)
+
+    def log_summary(self) -> None:
+        logger.info("LLM metrics:\n" + self.summary())
+
+    def start_summary_log(self, interval: float) -> None:
+        """Log the summary every interval seconds on the running loop"""
+        if interval <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        task = self._summary_task
+        if task is None or task.done() or task.get_loop() is not loop:
+            self._summary_task = loop.create_task(self._summary_loop(interval))
+
+    async def _summary_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            self.log_summary()
+
+_registry = MetricsRegistry()
+
+def get_metrics_registry() -> MetricsRegistry:
+    """The process-wide metrics registry"""
+    return _registry
+
+def create_trace_config() -> aiohttp.TraceConfig:
+    """
+    Trace hooks that time new connections. The request's trace_request_ctx
+    must be a dict with "model" and "call_site" keys for the labels.
+    """
+    async def on_create_start(session, context, params):
+        context.connect_started = time.monotonic()
+
+    async def on_create_end(session, context, params):
+        labels = _trace_labels(context)
+        _registry.observe("llm_connect_seconds", time.monotonic() - context.connect_started, **labels)
+        _registry.inc("llm_connections_total", reused="false", **labels)
+
+    async def on_reuse(session, context, params):
+        _registry.inc("llm_connections_total", reused="true", **_trace_labels(context))
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_connection_create_start.append(on_create_start)
+    trace_config.on_connection_create_end.append(on_create_end)
+    trace_config.on_connection_reuseconn.append(on_reuse)
+    return trace_config
+
+def _trace_labels(context: Any) -> Dict[str, str]:
+    ctx = context.trace_request_ctx if isinstance(context.trace_request_ctx, dict) else {}
+    return {"model": ctx.get("model", "unknown"), "call_site": ctx.get("call_site", current_call_site.get())}
+
+class RequestMetrics:
+    """Records one LLM request's timings and sizes under its model and call site"""
+    def __init__(self, model: str, prompt: Any):
+        self.labels = {"model": model or "unknown", "call_site": current_call_site.get()}
+        self.started = time.monotonic()
+        self._finished = False
+        _registry.observe("llm_prompt_tokens", estimate_tokens(str(prompt)), **self.labels)
+
+    @property
+    def trace_ctx(self) -> Dict[str, str]:
+        return dict(self.labels)
+
+    def queued(self, seconds: float) -> None:
+        _registry.observe("llm_queue_seconds", seconds, **self.labels)
+
+    def first_token(self) -> None:
+        _registry.observe("llm_ttft_seconds", time.monotonic() - self.started, **self.labels)
+
+    def retry(self) -> None:
+        _registry.inc("llm_retries_total", **self.labels)
+
+    def finish(self, outcome: str, response: str = "", response_tokens: Optional[int] = None) -> None:
+        if self._finished:
+            return
+        self._finished = True
+        elapsed = time.monotonic() - self.started
+        _registry.observe("llm_request_seconds", elapsed, **self.labels)
+        _registry.inc("llm_requests_total", outcome=outcome, **self.labels)
+        if outcome != "ok":
+            return
+        tokens = response_tokens if response_tokens is not None else estimate_tokens(response)
+        _registry.observe("llm_response_tokens", tokens, **self.labels)
+        if elapsed > 0:
+            _registry.observe("llm_tokens_per_second", tokens / elapsed, **self.labels)
+
+def completion_size(result: Dict[str, Any]) -> Tuple[str, Optional[int]]:
+    """Response text and, if the server reported it, the completion token count"""
+    try:
+        text = result["choices"][0]["message"]["content"] or ""
+    except (KeyError, IndexError, TypeError):
+        text = (result.get("message") or {}).get("content", "")
+    usage = result.get("usage") or {}
+    # OpenAI-style usage, or Ollama's eval_count
+    return text, usage.get("completion_tokens", result.get("eval_count"))
@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, fields, replace
+from typing import Any, Dict, List, Optional
 
 @dataclass
 class AIModel:
@@ -17,6 +17,14 @@ class ModelOptions:
     top_k: Optional[int] = None
     seed: Optional[int] = None
     context_window_size: Optional[int] = None
+    stop: Optional[List[str]] = None
+    repeat_penalty: Optional[float] = None
+    presence_penalty: Optional[float] = None
+    frequency_penalty: Optional[float] = None
+    num_batch: Optional[int] = None
+    num_thread: Optional[int] = None
+    num_gpu: Optional[int] = None
+    num_keep: Optional[int] = None
     
     def validate(self):
         """Validate the options"""
@@ -29,4 +37,40 @@ class ModelOptions:
         if self.max_tokens is not None and self.max_tokens < 0:
             raise ValueError("Max tokens must be positive")
         if self.context_window_size is not None and self.context_window_size < 0:
-            raise ValueError("Context window size must be positive") 
\ No newline at end of file
+            raise ValueError("Context window size must be positive")
+
+    def to_openai_params(self) -> Dict[str, Any]:
+        """Top-level fields of an OpenAI-compatible chat completion request"""
+        params = {
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+            "top_p": self.top_p,
+            "seed": self.seed,
+            "stop": self.stop,
+            "presence_penalty": self.presence_penalty,
+            "frequency_penalty": self.frequency_penalty
+        }
+        return {key: value for key, value in params.items() if value is not None}
+
+    def to_ollama_options(self) -> Dict[str, Any]:
+        """The "options" object of a native Ollama request, using Ollama's parameter names"""
+        renamed = {"max_tokens": "num_predict", "context_window_size": "num_ctx"}
+        return {
+            renamed.get(field.name, field.name): getattr(self, field.name)
+            for field in fields(self)
+            if getattr(self, field.name) is not None
+        }
+
+# Generation budgets per kind of call. Short answers get a small budget so
+# cheap calls (intent parsing, classification) cannot run to the model's
+# default length; code generation gets room for whole files.
+CALL_SITE_BUDGETS: Dict[str, ModelOptions] = {
+    "intent": ModelOptions(max_tokens=384, temperature=0.1),
+    "chat": ModelOptions(max_tokens=512, temperature=0.7),
+    "analysis": ModelOptions(max_tokens=1024, temperature=0.3),
+    "code": ModelOptions(max_tokens=4096, temperature=0.2, context_window_size=8192)
+}
+
+def options_for(call_site: str, **overrides) -> ModelOptions:
+    """Default options for a call site, with any fields overridden"""
+    return replace(CALL_SITE_BUDGETS.get(call_site, ModelOptions()), **overrides)
@@ -0,0 +1,83 @@
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from .coalesce import SingleFlight
+from .models import AIModel
+
+logger = logging.getLogger(__name__)
+
+class ClientRegistry:
+    """
+    Hands out shared clients so that agents built together reuse one client,
+    connection pool and model catalog per host instead of bootstrapping their own.
+
+    Lookups are keyed by (host, model): the first lookup for a host bootstraps
+    its client, later lookups for other models only resolve the model against
+    the cached model list. Concurrent first lookups share one bootstrap per
+    host, whichever models they ask for. The
+    registry owns the clients it creates; close them with aclose().
+    """
+    def __init__(self, coalesce: bool = True):
+        self.coalesce = coalesce
+        self._clients: Dict[str, Any] = {}
+        self._entries: Dict[Tuple[str, str], Tuple[Any, AIModel]] = {}
+        self._group = SingleFlight()
+
+    async def get(self, preferred_model: Optional[str] = None) -> Tuple[Any, AIModel]:
+        """Return the shared async client for the configured host and the selected model"""
+        from ..config import config_factory
+
+        host = config_factory.load_config()["chatbot_api_host"]
+        key = (host, (preferred_model or "").lower())
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = await self._group.do(f"{host}|{key[1]}", lambda: self._create(key, preferred_model))
+        return entry
+
+    async def _create(self, key: Tuple[str, str], preferred_model: Optional[str]) -> Tuple[Any, AIModel]:
+        from ..config import config_factory
+        from . import MockChatbotClient, get_model_catalog, mock_options, select_model
+
+        host = key[0]
+        client = self._clients.get(host)
+        if client is None:
+            # Keyed by host alone, so first lookups for different models share one client
+            client = await self._group.do(host, lambda: self._bootstrap(host, preferred_model))
+        if isinstance(client, MockChatbotClient):
+            model = AIModel(id="mock")
+        else:
+            models = await get_model_catalog().get_models(client.host, client.get_models)
+            model = select_model(models, preferred_model)
+            if model is None:
+                logger.warning(f"No models available on {host}, falling back to mock client")
+                client, model = MockChatbotClient("mock", **mock_options(config_factory.load_config())), AIModel(id="mock")
+
+        self._entries[key] = (client, model)
+        logger.info(f"Registered client for {host} with model {model.id}")
+        return client, model
+
+    async def _bootstrap(self, host: str, preferred_model: Optional[str]) -> Any:
+        """Create the client for host; its model list lands in the model catalog"""
+        from . import bootstrap_client_and_model
+
+        client, _ = await bootstrap_client_and_model(preferred_model, coalesce=self.coalesce)
+        self._clients[host] = client
+        return client
+
+    async def aclose(self) -> None:
+        """Close every async client created by the registry"""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        self._entries.clear()
+        for client in clients:
+            if hasattr(client, "aclose"):
+                await client.aclose()
+
+_default_registry: Optional[ClientRegistry] = None
+
+def default_registry() -> ClientRegistry:
+    """Return the process-wide client registry, creating it on first use"""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = ClientRegistry()
+    return _default_registry
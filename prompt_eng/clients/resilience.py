@@ -0,0 +1,205 @@
+import logging
+import random
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying: rate limiting and gateway errors
+RETRYABLE_STATUSES = {429, 502, 503, 504}
+
+def is_endpoint_failure(status: int) -> bool:
+    """Whether a response status says the endpoint, not the request, is in trouble"""
+    return status >= 500 or status == 429
+
+class RequestRejectedError(Exception):
+    """The endpoint answered but refused the request itself, e.g. with a 400 or 404"""
+    def __init__(self, status: int):
+        super().__init__(f"Chat completion failed: {status}")
+        self.status = status
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while an endpoint's circuit is open"""
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(f"Circuit open for {endpoint}, retry in {retry_in:.1f}s")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+def backoff_delay(attempt: int, base_delay: float = 0.5, max_delay: float = 30.0,
+                  rng: Callable[[float, float], float] = random.uniform) -> float:
+    """Full-jitter exponential backoff: a random delay in [0, min(max_delay, base_delay * 2^attempt)]"""
+    return rng(0, min(max_delay, base_delay * (2 ** attempt)))
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds or as an HTTP date"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+class RetryPolicy:
+    """How often and how long to back off before retrying a failed request"""
+    def __init__(self, max_retries: int = 3, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before the next attempt; a server-provided Retry-After wins over jitter"""
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return backoff_delay(attempt, self.base_delay, self.max_delay)
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit breaker.
+
+    closed: requests flow; failure_threshold consecutive failures open the circuit.
+    open: requests fail fast until recovery_timeout has passed.
+    half-open: up to half_open_max_calls trial requests are let through; a
+    success closes the circuit, a failure opens it again.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 half_open_max_calls: int = 1, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._trial_started_at = 0.0
+        self.stats = {"opened": 0, "rejected": 0}
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._half_open_calls = 0
+        return self._state
+
+    def retry_in(self) -> float:
+        """Seconds until an open circuit lets a trial request through"""
+        return max(0.0, self.recovery_timeout - (self._clock() - self._opened_at))
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN:
+            # A trial that never reported back (e.g. cancelled) must not block the circuit forever
+            if self._half_open_calls >= self.half_open_max_calls and \
+                    self._clock() - self._trial_started_at >= self.recovery_timeout:
+                self._half_open_calls = 0
+            if self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                self._trial_started_at = self._clock()
+                return True
+        self.stats["rejected"] += 1
+        return False
+
+    def record_success(self) -> None:
+        if self._state != self.CLOSED:
+            logger.info("Circuit closed after successful trial request")
+        self._state = self.CLOSED
+        self._failures = 0
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                self.stats["opened"] += 1
+                logger.warning(f"Circuit opened after {self._failures} consecutive failures")
+            self._state = self.OPEN
+            self._opened_at = self._clock()
+
+class LatencyTracker:
+    """
+    Derives a request timeout from recent latencies: headroom times the
+    observed p99, clamped to [min_timeout, max_timeout]. Until min_samples
+    latencies have been seen, default_timeout is used.
+    """
+    def __init__(self, default_timeout: float = 60.0, min_timeout: float = 5.0, max_timeout: float = 300.0,
+                 headroom: float = 2.0, window: int = 200, min_samples: int = 20):
+        self.default_timeout = default_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.headroom = headroom
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    @property
+    def sample_count(self) -> int:
+        return len(self._samples)
+
+    def observe(self, latency: float) -> None:
+        self._samples.append(latency)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def timeout(self) -> float:
+        if self.sample_count < self.min_samples:
+            return self.default_timeout
+        return max(self.min_timeout, min(self.max_timeout, self.percentile(0.99) * self.headroom))
+
+class EndpointResilience:
+    """
+    Circuit breaker and latency trackers for one endpoint URL.
+    Latency is tracked per call site: a short intent call and a long code
+    generation hit the same URL, but must not share a timeout.
+    """
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 default_timeout: float = 60.0):
+        self.name = name
+        self.breaker = CircuitBreaker(failure_threshold, recovery_timeout)
+        self.default_timeout = default_timeout
+        self._latency: Dict[str, LatencyTracker] = {}
+
+    def latency(self, call_site: str) -> LatencyTracker:
+        tracker = self._latency.get(call_site)
+        if tracker is None:
+            tracker = LatencyTracker(default_timeout=self.default_timeout)
+            self._latency[call_site] = tracker
+        return tracker
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.breaker.state,
+            "timeouts": {site: tracker.timeout() for site, tracker in sorted(self._latency.items())},
+            "p99": {site: tracker.percentile(0.99) for site, tracker in sorted(self._latency.items())},
+            **self.breaker.stats
+        }
+
+_endpoints: Dict[str, EndpointResilience] = {}
+
+def get_endpoint_resilience(endpoint: str, **options) -> EndpointResilience:
+    """Return the process-wide breaker and latency state for an endpoint, creating it on first use"""
+    resilience = _endpoints.get(endpoint)
+    if resilience is None:
+        resilience = EndpointResilience(endpoint, **options)
+        _endpoints[endpoint] = resilience
+    return resilience
+
+def endpoint_resilience_metrics() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of every endpoint's circuit state and timeout, keyed by endpoint"""
+    return {name: resilience.snapshot() for name, resilience in _endpoints.items()}
@@ -0,0 +1,146 @@
+import json
+import logging
+import math
+import random
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+logger = logging.getLogger(__name__)
+
+# Faults a simulated request can hit; error statuses are drawn from FaultModel.error_statuses
+TIMEOUT = "timeout"
+MALFORMED = "malformed"
+
+class LatencyModel:
+    """
+    Time to first token of a simulated request, in seconds.
+
+    fixed() always returns the same latency, lognormal() draws from a
+    lognormal distribution with the given median and shape, and replay()
+    cycles through recorded latencies in order.
+    """
+    def __init__(self, kind: str = "fixed", value: float = 0.0, sigma: float = 0.0,
+                 samples: Optional[Sequence[float]] = None):
+        if kind not in ("fixed", "lognormal", "replay"):
+            raise ValueError(f"Unknown latency model: {kind}")
+        if kind == "replay" and not samples:
+            raise ValueError("Replay latency model needs at least one recorded latency")
+        self.kind = kind
+        self.value = value
+        self.sigma = sigma
+        self.samples = [float(s) for s in samples or []]
+        self._next = 0
+
+    @classmethod
+    def fixed(cls, seconds: float) -> "LatencyModel":
+        return cls("fixed", value=seconds)
+
+    @classmethod
+    def lognormal(cls, median: float, sigma: float = 0.5) -> "LatencyModel":
+        return cls("lognormal", value=median, sigma=sigma)
+
+    @classmethod
+    def replay(cls, samples: Union[Sequence[float], str, Path]) -> "LatencyModel":
+        """Replay latencies given directly or loaded from a file (see load_timings)"""
+        if isinstance(samples, (str, Path)):
+            samples = load_timings(samples)
+        return cls("replay", samples=samples)
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        """Build a model from a config value: "0.5", "fixed:0.5", "lognormal:1.2,0.6" or "replay:timings.json" """
+        kind, _, args = spec.strip().partition(":")
+        if not args:
+            return cls.fixed(float(kind))
+        if kind == "fixed":
+            return cls.fixed(float(args))
+        if kind == "lognormal":
+            median, _, sigma = args.partition(",")
+            return cls.lognormal(float(median), float(sigma) if sigma else 0.5)
+        if kind == "replay":
+            return cls.replay(args)
+        raise ValueError(f"Unknown latency model: {spec}")
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "lognormal":
+            return rng.lognormvariate(math.log(self.value), self.sigma) if self.value > 0 else 0.0
+        if self.kind == "replay":
+            latency = self.samples[self._next % len(self.samples)]
+            self._next += 1
+            return latency
+        return self.value
+
+def load_timings(path: Union[str, Path]) -> List[float]:
+    """
+    Read recorded latencies in seconds: a JSON list, a JSON object with a
+    "latencies" list, or one number per line.
+    """
+    text = Path(path).read_text()
+    if text.lstrip().startswith(("[", "{")):
+        data = json.loads(text)
+        if isinstance(data, dict):
+            data = data["latencies"]
+        return [float(value) for value in data]
+    return [float(line) for line in text.split() if line]
+
+class FaultModel:
+    """
+    Per-request failure odds for a simulated endpoint.
+
+    A request times out with probability timeout_rate (after waiting timeout
+    seconds), fails with one of error_statuses with probability error_rate,
+    or returns a truncated, unparseable response with probability
+    malformed_rate.
+    """
+    def __init__(self, timeout_rate: float = 0.0, error_rate: float = 0.0, malformed_rate: float = 0.0,
+                 timeout: float = 30.0, error_statuses: Sequence[int] = (502, 503)):
+        if timeout_rate + error_rate + malformed_rate > 1.0:
+            raise ValueError("Fault rates add up to more than 1")
+        self.timeout_rate = timeout_rate
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.timeout = timeout
+        self.error_statuses = tuple(error_statuses)
+
+    def pick(self, rng: random.Random) -> Optional[Union[str, int]]:
+        """The fault for the next request, or None if it succeeds"""
+        roll = rng.random()
+        if roll < self.timeout_rate:
+            return TIMEOUT
+        roll -= self.timeout_rate
+        if roll < self.error_rate:
+            return rng.choice(self.error_statuses)
+        roll -= self.error_rate
+        if roll < self.malformed_rate:
+            return MALFORMED
+        return None
+
+def malform(content: str) -> str:
+    """Cut a response off halfway, as a dropped connection or runaway stop sequence would"""
+    return content[:len(content) // 2]
+
+def mock_options(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Read MockChatbotClient's simulation settings from the configuration.
+    Nothing is simulated unless one of the mock_* settings is present.
+    """
+    options: Dict[str, Any] = {}
+    if config.get("mock_latency"):
+        options["latency"] = LatencyModel.parse(config["mock_latency"])
+    if config.get("mock_tokens_per_second"):
+        options["tokens_per_second"] = float(config["mock_tokens_per_second"])
+    rates = {
+        "timeout_rate": config.get("mock_timeout_rate"),
+        "error_rate": config.get("mock_error_rate"),
+        "malformed_rate": config.get("mock_malformed_rate")
+    }
+    if any(rates.values()):
+        options["faults"] = FaultModel(
+            timeout=float(config.get("mock_timeout") or 30.0),
+            **{name: float(rate) for name, rate in rates.items() if rate}
+        )
+    if config.get("mock_max_concurrency"):
+        options["max_concurrency"] = int(config["mock_max_concurrency"])
+    if config.get("mock_seed"):
+        options["seed"] = int(config["mock_seed"])
+    return options
@@ -0,0 +1,60 @@
+import json
+import logging
+import time
+from typing import AsyncIterator, Optional
+
+logger = logging.getLogger(__name__)
+
+class ChatStream:
+    """
+    Async iterator over the text chunks of a streamed chat completion.
+    Records time-to-first-token and total latency separately; both are in
+    milliseconds and measured from the first read of the stream.
+    """
+    def __init__(self, chunks: AsyncIterator[str]):
+        self._chunks = chunks
+        self._start: Optional[float] = None
+        self.ttft_ms: Optional[float] = None
+        self.total_ms: Optional[float] = None
+        self.text = ""
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> str:
+        if self._start is None:
+            self._start = time.perf_counter()
+        try:
+            chunk = await self._chunks.__anext__()
+        except StopAsyncIteration:
+            if self.total_ms is None:
+                self.total_ms = (time.perf_counter() - self._start) * 1000
+                logger.debug(f"Stream finished: ttft={self.ttft_ms}ms total={self.total_ms:.0f}ms")
+            raise
+        if self.ttft_ms is None:
+            self.ttft_ms = (time.perf_counter() - self._start) * 1000
+        self.text += chunk
+        return chunk
+
+    async def aclose(self) -> None:
+        """Stop reading and release the underlying response"""
+        await self._chunks.aclose()
+
+def parse_stream_line(line: str) -> Optional[str]:
+    """Extract the text delta from one SSE (OpenAI-style) or NDJSON (Ollama) line"""
+    line = line.strip()
+    if not line or line.startswith(":") or line.startswith("event:"):
+        return None
+    if line.startswith("data:"):
+        payload = line[len("data:"):].strip()
+        if payload == "[DONE]":
+            return None
+        chunk = json.loads(payload)
+    else:
+        chunk = json.loads(line)
+    
+    # Native Ollama chunks carry the text in "message"
+    if "message" in chunk:
+        return chunk["message"].get("content")
+    choices = chunk.get("choices") or [{}]
+    return choices[0].get("delta", {}).get("content")
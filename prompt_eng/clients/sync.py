@@ -0,0 +1,84 @@
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Dict, List, Optional, Tuple, TypeVar
+
+from .models import AIModel, ModelOptions
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class _BackgroundLoop:
+    """An event loop running forever on a daemon thread, started on first use"""
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or not self._thread.is_alive():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="llm-client-loop", daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+_background = _BackgroundLoop()
+
+def run_sync(awaitable: Awaitable[T], timeout: Optional[float] = None) -> T:
+    """
+    Run a coroutine on the shared background loop and block until it finishes.
+
+    Clients used through run_sync all live on that one loop, so their pooled
+    connections are reused across calls. Calling this from a coroutine would
+    block the caller's event loop for the whole request, so that raises
+    RuntimeError; await the async client there instead.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise RuntimeError("run_sync() called from a running event loop; await the async client instead")
+    future = asyncio.run_coroutine_threadsafe(awaitable, _background.get())
+    return future.result(timeout)
+
+class SyncChatbotClient:
+    """
+    Blocking facade over an async chatbot client, for scripts and other
+    synchronous code. Every call runs on the shared background loop.
+    """
+    def __init__(self, client: Any):
+        self.client = client
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    def get_models(self) -> List[AIModel]:
+        return run_sync(self.client.get_models())
+
+    def chat_completion(self, message: str, model: AIModel, options: Optional[ModelOptions] = None,
+                        system_prompt: Optional[str] = None,
+                        history: Optional[List[Dict[str, str]]] = None) -> Tuple[int, str]:
+        return run_sync(self.client.chat_completion(
+            message, model, options, system_prompt=system_prompt, history=history
+        ))
+
+    def chat_completion_many(self, prompts: List[str], model: AIModel, options: Optional[ModelOptions] = None,
+                             max_concurrency: int = 4, system_prompt: Optional[str] = None) -> List[Tuple[int, str]]:
+        return run_sync(self.client.chat_completion_many(
+            prompts, model, options, max_concurrency, system_prompt=system_prompt
+        ))
+
+    def set_system_prompt(self, prompt: str) -> None:
+        self.client.set_system_prompt(prompt)
+
+    def close(self) -> None:
+        """Release the async client's pooled connections"""
+        if hasattr(self.client, "aclose"):
+            run_sync(self.client.aclose())
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from .metrics import call_site
+from .models import AIModel, ModelOptions
+from ..config import config_factory
+
+logger = logging.getLogger(__name__)
+
+# Smallest request that still makes the server load the model
+PING_OPTIONS = ModelOptions(max_tokens=1)
+
+class ModelWarmer:
+    """
+    Preloads models and keeps them resident.
+
+    warm_up() pings every model concurrently. The first ping pays the
+    model-load cost and is reported as the cold latency; a second ping right
+    after gives the warm latency. start() then keeps pinging in the background
+    every ping_interval seconds so the server does not unload the models
+    while the process is active.
+    """
+    def __init__(self, client: Any, models: List[AIModel], ping_interval: float = 240.0):
+        self.client = client
+        self.models = list(models)
+        self.ping_interval = ping_interval
+        self.latencies: Dict[str, Dict[str, Any]] = {
+            model.id: {"cold": None, "warm": None, "pings": 0, "failures": 0} for model in self.models
+        }
+        self._task: Optional[asyncio.Task] = None
+
+    async def _ping(self, model: AIModel) -> Optional[float]:
+        started = time.monotonic()
+        try:
+            with call_site("warmup"):
+                status, _ = await self.client.chat_completion("ping", model, PING_OPTIONS)
+        except Exception as e:
+            logger.debug(f"Warm-up ping for {model.id} failed: {e}")
+            status = 500
+        entry = self.latencies[model.id]
+        entry["pings"] += 1
+        if status != 200:
+            entry["failures"] += 1
+            return None
+        return time.monotonic() - started
+
+    async def _warm(self, model: AIModel) -> None:
+        entry = self.latencies[model.id]
+        entry["cold"] = await self._ping(model)
+        if entry["cold"] is None:
+            logger.warning(f"Could not warm up {model.id}")
+            return
+        entry["warm"] = await self._ping(model)
+        warm = f"{entry['warm']:.2f}s" if entry["warm"] is not None else "n/a"
+        logger.info(f"Warmed up {model.id}: cold {entry['cold']:.2f}s, warm {warm}")
+
+    async def warm_up(self) -> Dict[str, Dict[str, Any]]:
+        """Load every model concurrently and return cold and warm latencies per model"""
+        await asyncio.gather(*[self._warm(model) for model in self.models])
+        return self.latencies
+
+    def start(self) -> None:
+        """Start pinging the models in the background"""
+        if self.ping_interval <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._keep_alive_loop())
+
+    async def _keep_alive_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            latencies = await asyncio.gather(*[self._ping(model) for model in self.models])
+            for model, latency in zip(self.models, latencies):
+                if latency is not None:
+                    self.latencies[model.id]["warm"] = latency
+
+    async def aclose(self) -> None:
+        """Stop background pinging"""
+        task, self._task = self._task, None
+        if task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+async def warm_up_models(client: Any, models: List[AIModel]) -> Optional[ModelWarmer]:
+    """
+    Warm up models and start keeping them loaded, as configured.
+    Returns None when warm-up is disabled (llm_warmup = false) or the mock
+    client is in use; llm_warmup_interval sets the ping interval.
+    """
+    config = config_factory.load_config()
+    if config["chatbot_api_host"] == "mock" or os.environ.get("TEST_MODE") == "true":
+        return None
+    if str(config.get("llm_warmup", "true")).lower() in ("false", "0", "no"):
+        return None
+
+    warmer = ModelWarmer(client, models, ping_interval=float(config.get("llm_warmup_interval") or 240.0))
+    await warmer.warm_up()
+    warmer.start()
+    return warmer
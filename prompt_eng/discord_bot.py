@@ -2,6 +2,7 @@ import discord
 from discord.ext import commands
 import logging
 from clients import bootstrap_client_and_model
+from clients.catalog import get_model_catalog
 from models import ModelOptions
 from model_orchestrator import ModelOrchestrator
 
@@ -114,22 +115,22 @@ async def change_model(ctx, new_model=None):
     if new_model:
         try:
             # Test if model exists
-            client, model = bootstrap_client_and_model(preferred_model=new_model)
+            client, model = await bootstrap_client_and_model(preferred_model=new_model)
             current_model = new_model
             await ctx.send(f"✅ Switched to model: {model.name}")
         except Exception as e:
             await ctx.send(f"❌ Error changing model: {str(e)}")
     else:
         # Show current model
-        client, model = bootstrap_client_and_model(preferred_model=current_model)
+        client, model = await bootstrap_client_and_model(preferred_model=current_model)
         await ctx.send(f"Current model: {model.name}")
 
 @bot.command(name='models')
 async def list_models(ctx):
     """List available models"""
     try:
-        client, _ = bootstrap_client_and_model()
-        models = client.get_models()
+        client, _ = await bootstrap_client_and_model()
+        models = await get_model_catalog().get_models(client.host, client.get_models)
         
         # Create embed with model list
         embed = discord.Embed(
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Union
+
+from ..clients.metrics import get_metrics_registry
+from .pipeline import fingerprint
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARTIFACT_PATH = Path.home() / ".cache" / "mother_of_bots" / "artifacts"
+
+get_metrics_registry().register_counter(
+    "generation_artifacts_total", "Generation stage artifact lookups by stage and outcome (hit or miss)"
+)
+
+def _empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+def canonical(value: Any) -> Any:
+    """Normalise a requirement value so equivalent spellings fingerprint alike"""
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    if isinstance(value, dict):
+        return {str(key).lower(): canonical(item) for key, item in value.items() if not _empty(item)}
+    if isinstance(value, (list, tuple, set)):
+        # Order carries no meaning in feature and API lists, and duplicates add nothing
+        items = {json.dumps(canonical(item), sort_keys=True): canonical(item) for item in value if not _empty(item)}
+        return [items[key] for key in sorted(items)]
+    return value
+
+def requirement_subset(requirements: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+    """The canonical form of the requirement fields a stage reads; other fields are dropped"""
+    return {field: canonical(requirements[field]) for field in fields if not _empty(requirements.get(field))}
+
+class ArtifactStore:
+    """
+    Content-addressed store for generation stage outputs.
+    An artifact is keyed by a hash of the stage name and everything the stage
+    consumed, so any bot whose stage inputs match reuses it. Artifacts are kept
+    as JSON in a bounded in-memory LRU and, unless path is None, as one file
+    per key on disk. Every lookup returns a fresh copy, so bots never share
+    mutable flows or rules. Hits and misses are counted per stage.
+    """
+    def __init__(self, path: Optional[Union[str, Path]] = DEFAULT_ARTIFACT_PATH, max_entries: int = 512):
+        self.path = Path(path) if path else None
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def key(self, stage: str, inputs: Dict[str, Any]) -> str:
+        return fingerprint({"stage": stage, "inputs": inputs})
+
+    def _file(self, key: str) -> Path:
+        return self.path / key[:2] / f"{key}.json"
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Look up an artifact, checking memory first and then disk"""
+        data = self._memory.get(key)
+        if data is None and self.path:
+            data = await asyncio.to_thread(self._disk_get, key)
+        if data is None:
+            return None
+        self._remember(key, data)
+        return json.loads(data)
+
+    async def put(self, stage: str, key: str, artifact: Any) -> None:
+        try:
+            data = json.dumps(artifact)
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Not storing {stage} artifact: {e}")
+            return
+        self._remember(key, data)
+        if self.path:
+            await asyncio.to_thread(self._disk_put, stage, key, data)
+
+    def _remember(self, key: str, data: str) -> None:
+        self._memory[key] = data
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        try:
+            with open(self._file(key), "r") as f:
+                return json.dumps(json.load(f)["artifact"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _disk_put(self, stage: str, key: str, data: str) -> None:
+        path = self._file(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so concurrent readers never see a partial file
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"stage": stage, "artifact": json.loads(data), "created_at": time.time()}, f)
+        os.replace(tmp_path, path)
+
+    def _record(self, stage: str, outcome: str) -> None:
+        counts = self.stats.setdefault(stage, {"hits": 0, "misses": 0})
+        counts["hits" if outcome == "hit" else "misses"] += 1
+        get_metrics_registry().inc("generation_artifacts_total", stage=stage, outcome=outcome)
+
+    async def get_or_create(self, stage: str, inputs: Dict[str, Any], create: Callable[[], Awaitable[Any]],
+                            cacheable: Callable[[Any], bool] = lambda artifact: not _empty(artifact)) -> Any:
+        """Return the stored artifact for these inputs, or create it and store it if cacheable"""
+        key = self.key(stage, inputs)
+        artifact = await self.get(key)
+        if artifact is not None:
+            self._record(stage, "hit")
+            return artifact
+        self._record(stage, "miss")
+        artifact = await create()
+        if cacheable(artifact):
+            await self.put(stage, key, artifact)
+        return artifact
+
+    def hit_rate(self, stage: str) -> float:
+        counts = self.stats.get(stage, {"hits": 0, "misses": 0})
+        total = counts["hits"] + counts["misses"]
+        return counts["hits"] / total if total else 0.0
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Hits, misses and hit rate for every stage looked up so far"""
+        return {stage: dict(counts, hit_rate=self.hit_rate(stage)) for stage, counts in sorted(self.stats.items())}
+
+def create_artifact_store(config: Optional[Dict[str, Any]] = None) -> ArtifactStore:
+    """Create an artifact store from optional artifact_cache_* configuration keys.
+    Setting artifact_cache_path to "none" keeps artifacts in memory only.
+    """
+    config = config or {}
+    path = config.get("artifact_cache_path", DEFAULT_ARTIFACT_PATH)
+    if isinstance(path, str) and path.lower() in ("", "none", "memory"):
+        path = None
+    return ArtifactStore(path, max_entries=int(config.get("artifact_cache_size", 512)))
@@ -1,7 +1,16 @@
+import asyncio
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Any, Tuple
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
 import json
 import logging
+import time
+
+from ..clients.metrics import call_site, get_metrics_registry
+from ..clients.models import options_for
+from .artifacts import ArtifactStore, requirement_subset
+from .patching import PatchError, apply_edit, extract_code
+from .pipeline import DEFAULT_FAN_OUT, GenerationPipeline, Stage
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.DEBUG)
@@ -13,10 +22,50 @@ class GeneratedBot:
     conversation_flow: Dict
     business_rules: List[Dict]
 
+get_metrics_registry().register_counter(
+    "generation_edits_total", "Bot code updates applied as LLM edits, or regenerated after an edit failed"
+)
+
+# Files generated from the requirements alone, alongside the bot code
+SUPPORT_FILES = ("config.py", "api_utils.py", "db_utils.py")
+
+# Requirement fields each generation stage reads. A stage only sees these
+# fields, so bots that agree on them share the stage's cached artifact
+STAGE_REQUIREMENTS = {
+    "flow": ("type", "features"),
+    "rules": ("type", "features"),
+    "config": ("name", "type", "features", "platform", "language", "apis", "database"),
+    "api_utils": ("apis",),
+    "db_utils": ("database",),
+    "bot_code": ("name", "type", "features", "platform", "language", "apis", "database", "async_support", "error_handling")
+}
+
+def describe_changes(old_requirements: Dict, requirements: Dict) -> str:
+    """A change request listing the requirement fields that differ, one per line"""
+    changes = []
+    for field in sorted(set(old_requirements) | set(requirements)):
+        old, new = old_requirements.get(field), requirements.get(field)
+        if old == new:
+            continue
+        if isinstance(old, list) and isinstance(new, list):
+            added = [json.dumps(item) for item in new if item not in old]
+            removed = [json.dumps(item) for item in old if item not in new]
+            if added:
+                changes.append(f"- Add {field}: {', '.join(added)}")
+            if removed:
+                changes.append(f"- Remove {field}: {', '.join(removed)}")
+        elif new in (None, "", [], {}):
+            changes.append(f"- Remove {field} {json.dumps(old)}")
+        else:
+            changes.append(f"- Change {field} from {json.dumps(old)} to {json.dumps(new)}")
+    return "\n".join(changes)
+
 class CodeGenerator:
     def __init__(self):
         self.client = None
         self.model = None
+        # Update existing bot code through LLM edits rather than regenerating it (generation_edit_mode)
+        self.edit_mode = True
         # Basic code templates for fallback
         self.templates = {
             "weather": {
@@ -377,44 +426,62 @@ MAX_SEARCH_HISTORY = 10
     async def generate(self, requirements: Dict, flow: Dict, rules: List[Dict], ui_design: Optional[Dict] = None) -> Dict[str, str]:
         """Generate bot code based on requirements, flow and rules"""
         try:
-            code = {}
-            
-            # Try to generate bot code
-            bot_code = await self._generate_bot_code(requirements, flow, rules)
-            config_code = await self._generate_config(requirements)
-            
-            # Check if we got valid responses
-            if "import" not in bot_code.lower() or len(bot_code) < 100:
-                logger.warning("Generated bot code doesn't look valid, using fallback template")
-                code = self._get_fallback_code(requirements)
-            else:
-                code = {
-                    f"bot.{requirements.get('language', 'py').lower()}": bot_code,
-                    "config.py": config_code
-                }
-                
-                # Add API utilities if needed
-                if requirements.get("apis"):
-                    api_utils = await self._generate_api_utils(requirements["apis"])
-                    if "import" in api_utils.lower() and len(api_utils) > 50:
-                        code["api_utils.py"] = api_utils
-                
-                # Add database utilities if needed
-                if requirements.get("database"):
-                    db_utils = await self._generate_db_utils(requirements["database"])
-                    if "import" in db_utils.lower() and len(db_utils) > 50:
-                        code["db_utils.py"] = db_utils
-            
-            # Add UI code if provided
-            if ui_design:
-                code["ui.jsx"] = ui_design.get("ui_code", "")
-            
-            return code
+            # The support files only need the requirements, so they are generated alongside the bot code
+            bot_code, *support = await asyncio.gather(
+                self._generate_bot_code(requirements, flow, rules),
+                *[self.generate_support_file(filename, requirements) for filename in SUPPORT_FILES]
+            )
+            return self.assemble(requirements, bot_code, dict(zip(SUPPORT_FILES, support)), ui_design)
         except Exception as e:
             logger.error(f"Failed to generate code: {str(e)}")
             return self._get_fallback_code(requirements)
     
-    async def _generate_bot_code(self, requirements: Dict, flow: Dict, rules: List[Dict]) -> str:
+    async def generate_support_file(self, filename: str, requirements: Dict) -> str:
+        """Generate one of SUPPORT_FILES, or return "" if the requirements do not call for it"""
+        if filename == "config.py":
+            return await self._generate_config(requirements)
+        
+        # Add API utilities if needed
+        if filename == "api_utils.py" and requirements.get("apis"):
+            return await self._generate_api_utils(requirements["apis"])
+        
+        # Add database utilities if needed
+        if filename == "db_utils.py" and requirements.get("database"):
+            return await self._generate_db_utils(requirements["database"])
+        return ""
+    
+    def assemble(self, requirements: Dict, bot_code: str, support_files: Dict[str, str],
+                 ui_design: Optional[Dict] = None) -> Dict[str, str]:
+        """Put the generated files together, or use the fallback template if the bot code is unusable"""
+        # Check if we got valid responses
+        if "import" not in bot_code.lower() or len(bot_code) < 100:
+            logger.warning("Generated bot code doesn't look valid, using fallback template")
+            code = self._get_fallback_code(requirements)
+        else:
+            code = {f"bot.{requirements.get('language', 'py').lower()}": bot_code}
+            for filename, content in support_files.items():
+                if filename == "config.py" or ("import" in content.lower() and len(content) > 50):
+                    code[filename] = content
+        
+        # Add UI code if provided
+        if ui_design:
+            code["ui.jsx"] = ui_design.get("ui_code", "")
+        
+        return code
+    
+    async def _generate_bot_code(self, requirements: Dict, flow: Dict, rules: List[Dict],
+                                 previous: Optional[Dict] = None) -> str:
+        # On an update, edit the current code; writing out only the changes takes far fewer output tokens
+        if previous and previous.get("bot_code") and self.edit_mode:
+            try:
+                code = await self.edit_code(previous["bot_code"], describe_changes(previous["requirements"], requirements),
+                                            requirements.get("language", "python"), flow, rules)
+                get_metrics_registry().inc("generation_edits_total", outcome="applied")
+                return code
+            except PatchError as e:
+                get_metrics_registry().inc("generation_edits_total", outcome="regenerated")
+                logger.warning(f"Could not apply the bot code edit, regenerating the file: {str(e)}")
+        
         try:
             # Generate prompt for bot code
             prompt = f"""Generate a complete {requirements.get('language', 'Python')} bot implementation based on:
@@ -425,13 +492,50 @@ MAX_SEARCH_HISTORY = 10
             Generate the bot code."""
             
             # Get response from LLM
-            _, code_str = await self.client.chat_completion(prompt, self.model)
+            with call_site("code"):
+                status, code_str = await self.client.chat_completion(prompt, self.model, options_for("code"))
+            if status != 200:
+                raise Exception(code_str)
             
-            return code_str
+            # Store the code alone, so the file runs and later edits can parse it
+            return extract_code(code_str)
         except Exception as e:
             logger.error(f"Failed to generate bot code: {str(e)}")
             return ""
     
+    async def edit_code(self, code: str, change_request: str, language: str = "python",
+                        flow: Optional[Dict] = None, rules: Optional[List[Dict]] = None) -> str:
+        """
+        Ask the LLM for the changes to code only, as a unified diff or replacement
+        functions, and apply them. Raises PatchError if the reply cannot be
+        applied or the edited code does not validate.
+        """
+        # Bots stored before their code was extracted still hold the whole reply
+        code = extract_code(code)
+        prompt = f"""Here is the current {language} bot implementation:
+            ```{language}
+            {code}
+            ```
+            
+            Change it as follows:
+            {change_request}
+            """
+        if flow is not None:
+            prompt += f"""
+            The conversation flow is now: {json.dumps(flow, indent=2)}
+            The business rules are now: {json.dumps(rules, indent=2)}
+            """
+        prompt += """
+            Do not repeat the whole file. Reply with only the changes: either a unified diff
+            against the file above, or the complete new version of each function or class
+            you change or add, each in its own code block."""
+        
+        with call_site("code_edit"):
+            status, response = await self.client.chat_completion(prompt, self.model, options_for("code"))
+        if status != 200:
+            raise PatchError(f"edit request failed: {response}")
+        return apply_edit(code, response, language)
+    
     async def _generate_config(self, requirements: Dict) -> str:
         try:
             # Generate prompt for config code
@@ -441,7 +545,10 @@ MAX_SEARCH_HISTORY = 10
             Generate the config code."""
             
             # Get response from LLM
-            _, config_str = await self.client.chat_completion(prompt, self.model)
+            with call_site("config"):
+                status, config_str = await self.client.chat_completion(prompt, self.model, options_for("code", max_tokens=1024))
+            if status != 200:
+                raise Exception(config_str)
             
             return config_str
         except Exception as e:
@@ -457,7 +564,10 @@ MAX_SEARCH_HISTORY = 10
             Generate the API utilities."""
             
             # Get response from LLM
-            _, api_utils_str = await self.client.chat_completion(prompt, self.model)
+            with call_site("api_utils"):
+                status, api_utils_str = await self.client.chat_completion(prompt, self.model, options_for("code", max_tokens=2048))
+            if status != 200:
+                raise Exception(api_utils_str)
             
             return api_utils_str
         except Exception as e:
@@ -472,7 +582,10 @@ MAX_SEARCH_HISTORY = 10
             Generate the database utilities."""
             
             # Get response from LLM
-            _, db_utils_str = await self.client.chat_completion(prompt, self.model)
+            with call_site("db_utils"):
+                status, db_utils_str = await self.client.chat_completion(prompt, self.model, options_for("code", max_tokens=2048))
+            if status != 200:
+                raise Exception(db_utils_str)
             
             return db_utils_str
         except Exception as e:
@@ -572,7 +685,8 @@ class FlowDesigner:
             Design the conversation flow."""
             
             # Get response from LLM
-            _, flow_str = await self.client.chat_completion(prompt, self.model)
+            with call_site("flow"):
+                _, flow_str = await self.client.chat_completion(prompt, self.model, options_for("analysis"))
             
             logger.debug(f"Flow response: {flow_str}")
             
@@ -653,7 +767,8 @@ class RuleEngine:
             Design the business rules."""
             
             # Get response from LLM
-            _, rules_str = await self.client.chat_completion(prompt, self.model)
+            with call_site("rules"):
+                _, rules_str = await self.client.chat_completion(prompt, self.model, options_for("analysis"))
             
             logger.debug(f"Rules response: {rules_str}")
             
@@ -697,22 +812,59 @@ class RuleEngine:
         return template
 
 class DynamicBotGenerator:
-    def __init__(self, preferred_model: Optional[str] = None):
+    def __init__(self, preferred_model: Optional[str] = None, use_cache: Optional[bool] = None, registry: Optional[Any] = None,
+                 max_concurrency: Optional[int] = None, artifacts: Optional[ArtifactStore] = None):
         self.preferred_model = preferred_model
+        # Response and artifact caching; None follows the llm_cache setting, which is off by default
+        self.use_cache = use_cache
+        # Stage outputs shared across bots; created from the config in initialize() when caching is on
+        self.artifacts = artifacts
+        # Generation stages that may call the LLM at once; generation_max_concurrency in the config
+        self.max_concurrency = max_concurrency
+        # With a ClientRegistry the client is shared and owned by the registry
+        self.registry = registry
         self.code_generator = CodeGenerator()
         self.flow_designer = FlowDesigner()
         self.rule_engine = RuleEngine()
         self.client = None
         self.model = None
+        self.warmer = None
+        self.pipeline = self._build_pipeline()
+        # Seconds spent in each stage of the last generate_bot call, the stages restored from
+        # checkpoints, and the stages an update_bot call kept from the previous bot
+        self.stage_timings: Dict[str, float] = {}
+        self.resumed_stages: List[str] = []
+        self.reused_stages: List[str] = []
     
     async def initialize(self):
         """Initialize the client and model if not already initialized"""
         if self.client is None:
             # Import bootstrap_client_and_model here to avoid circular dependencies
-            from ..clients import bootstrap_client_and_model
+            from ..clients import bootstrap_client_and_model, warm_up_models
             
             # Initialize client and model
-            self.client, self.model = await bootstrap_client_and_model(self.preferred_model)
+            if self.registry is not None:
+                self.client, self.model = await self.registry.get(self.preferred_model)
+            else:
+                self.client, self.model = await bootstrap_client_and_model(self.preferred_model)
+            
+            # Load the model before the first generation, bypassing the response cache
+            self.warmer = await warm_up_models(self.client, [self.model])
+            
+            # Serve repeated generation prompts from the response cache
+            from ..clients import cache_enabled
+            from ..config import load_config
+            if cache_enabled(self.use_cache, load_config()):
+                from ..clients import CachedChatbotClient, create_response_cache
+                self.client = CachedChatbotClient(self.client, create_response_cache(load_config()))
+                if self.artifacts is None:
+                    from .artifacts import create_artifact_store
+                    self.artifacts = create_artifact_store(load_config())
+            
+            if self.max_concurrency is None:
+                self.max_concurrency = int(load_config().get("generation_max_concurrency") or DEFAULT_FAN_OUT)
+            if str(load_config().get("generation_edit_mode", "true")).lower() in ("false", "0", "no"):
+                self.code_generator.edit_mode = False
             
             # Set client and model for components
             self.code_generator.client = self.client
@@ -722,29 +874,156 @@ class DynamicBotGenerator:
             self.rule_engine.client = self.client
             self.rule_engine.model = self.model
     
-    async def generate_bot(self, requirements: Dict) -> GeneratedBot:
-        """Generate a complete bot based on requirements"""
+    async def aclose(self):
+        """Release the client's pooled connections unless the registry owns them"""
+        if self.warmer is not None:
+            await self.warmer.aclose()
+            self.warmer = None
+        if self.client is not None and self.registry is None and hasattr(self.client, "aclose"):
+            await self.client.aclose()
+        self.client = None
+    
+    def _build_pipeline(self) -> GenerationPipeline:
+        """
+        requirements -> flow, rules, config, api_utils, db_utils
+        flow, rules -> bot_code -> code
+        previous is the bot code being updated, if any, which bot_code edits instead of rewriting
+        """
+        code_generator = self.code_generator
+        
+        def assemble(requirements: Dict, bot_code: str, config: str, api_utils: str, db_utils: str) -> Dict[str, str]:
+            support = {"config.py": config, "api_utils.py": api_utils, "db_utils.py": db_utils}
+            return code_generator.assemble(requirements, bot_code, support)
+        
+        def support_file(filename: str):
+            return lambda requirements: code_generator.generate_support_file(filename, requirements)
+        
+        # Fallback templates are not stored, so a later bot gets another chance at a generated flow
+        flow_templates = self.flow_designer.templates.values()
+        rule_templates = self.rule_engine.templates.values()
+        
+        return GenerationPipeline([
+            self._stage("flow", self.flow_designer.design, cacheable=lambda flow: flow not in flow_templates),
+            self._stage("rules", self.rule_engine.generate_rules, cacheable=lambda rules: rules not in rule_templates),
+            self._stage("config", support_file("config.py")),
+            self._stage("api_utils", support_file("api_utils.py")),
+            self._stage("db_utils", support_file("db_utils.py")),
+            self._stage("bot_code", code_generator._generate_bot_code, ["flow", "rules", "previous"]),
+            Stage("code", assemble, ["requirements", "bot_code", "config", "api_utils", "db_utils"], checkpoint=False)
+        ])
+    
+    def _stage(self, name: str, produce: Callable[..., Awaitable[Any]], upstream: Sequence[str] = (),
+               cacheable: Callable[[Any], bool] = bool) -> Stage:
+        """
+        A stage that passes produce only the requirement fields in STAGE_REQUIREMENTS,
+        and serves its output from the artifact store when one is set.
+        Outputs that are not cacheable (fallbacks) are not checkpointed either.
+        """
+        fields = STAGE_REQUIREMENTS[name]
+        
+        async def run(requirements: Dict, **inputs: Any) -> Any:
+            # Prompts get the fields as written; only the key uses their canonical form
+            inputs["requirements"] = {field: requirements[field] for field in fields if field in requirements}
+            subset = requirement_subset(requirements, fields)
+            # Without any of its fields set (no APIs, no database) a stage has nothing worth looking up
+            if self.artifacts is None or not subset:
+                return await produce(**inputs)
+            # Different models give different answers, so the model is part of the key
+            key_inputs = dict(inputs, requirements=subset, model=getattr(self.model, "id", None))
+            return await self.artifacts.get_or_create(name, key_inputs, lambda: produce(**inputs), cacheable)
+        
+        return Stage(name, run, ["requirements", *upstream], checkpoint=cacheable)
+    
+    async def generate_bot(self, requirements: Dict, checkpoint_dir: Optional[Union[str, Path]] = None) -> GeneratedBot:
+        """
+        Generate a complete bot based on requirements.
+        Independent stages run concurrently. With a checkpoint_dir, each
+        stage's output is saved there and a rerun after a failure resumes
+        from the stages that already completed.
+        """
         try:
-            # Initialize client with preferred model
-            await self.initialize()
-            
-            # Design conversation flow
-            flow = await self.flow_designer.design(requirements)
-            
-            # Generate business rules
-            rules = await self.rule_engine.generate_rules(requirements)
-            
-            # Generate code
-            code = await self.code_generator.generate(requirements, flow, rules)
-            
-            return GeneratedBot(
-                name=requirements["name"],
-                code=code,
-                conversation_flow=flow,
-                business_rules=rules
-            )
+            return await self._run(requirements, checkpoint_dir)
         except Exception as e:
             raise Exception(f"Failed to generate bot: {str(e)}")
+    
+    def uses_fallback(self, bot: GeneratedBot) -> bool:
+        """Whether any part of bot is a fallback template rather than generated"""
+        return (bot.code in self.code_generator.templates.values()
+                or bot.conversation_flow in self.flow_designer.templates.values()
+                or bot.business_rules in self.rule_engine.templates.values())
+    
+    def affected_stages(self, old_requirements: Dict, new_requirements: Dict) -> List[str]:
+        """Stages whose requirement fields differ between the two, and every stage downstream of them"""
+        changed = [stage for stage, fields in STAGE_REQUIREMENTS.items()
+                   if requirement_subset(old_requirements, fields) != requirement_subset(new_requirements, fields)]
+        affected = self.pipeline.downstream(changed)
+        return [stage for stage in self.pipeline.order if stage in affected]
+    
+    def stage_outputs(self, bot: GeneratedBot, requirements: Dict) -> Dict[str, Any]:
+        """Recover the stage outputs a bot was assembled from; stages that cannot be recovered are left out"""
+        outputs = {
+            "flow": bot.conversation_flow,
+            "rules": bot.business_rules,
+            # assemble() leaves out support files that were not needed or not usable
+            "config": bot.code.get("config.py", ""),
+            "api_utils": bot.code.get("api_utils.py", ""),
+            "db_utils": bot.code.get("db_utils.py", "")
+        }
+        # A bot built from a fallback template has no generated bot code to reuse
+        bot_code = bot.code.get(f"bot.{requirements.get('language', 'py').lower()}")
+        if bot_code is not None:
+            outputs["bot_code"] = bot_code
+        return outputs
+    
+    async def update_bot(self, bot: GeneratedBot, old_requirements: Dict, requirements: Dict,
+                         checkpoint_dir: Optional[Union[str, Path]] = None) -> GeneratedBot:
+        """
+        Regenerate only what a change of requirements affects.
+        Stages whose requirement fields are unchanged, and that do not depend
+        on a stage that changed, keep their output from bot, so the cost of an
+        update grows with the size of the change rather than the size of the bot.
+        """
+        try:
+            affected = self.affected_stages(old_requirements, requirements)
+            outputs = self.stage_outputs(bot, old_requirements)
+            reuse = {stage: output for stage, output in outputs.items() if stage not in affected}
+            previous = None
+            if "bot_code" in affected and "bot_code" in outputs:
+                previous = {
+                    "requirements": {field: old_requirements[field] for field in STAGE_REQUIREMENTS["bot_code"]
+                                     if field in old_requirements},
+                    "bot_code": outputs["bot_code"]
+                }
+            logger.info(f"Updating {requirements['name']}: regenerating {', '.join(affected) or 'nothing'}")
+            return await self._run(requirements, checkpoint_dir, reuse, previous)
+        except Exception as e:
+            raise Exception(f"Failed to update bot: {str(e)}")
+    
+    async def _run(self, requirements: Dict, checkpoint_dir: Optional[Union[str, Path]] = None,
+                   reuse: Optional[Dict[str, Any]] = None, previous: Optional[Dict[str, Any]] = None) -> GeneratedBot:
+        # Initialize client with preferred model
+        await self.initialize()
+        
+        started = time.perf_counter()
+        inputs = {"requirements": requirements, "previous": previous}
+        result = await self.pipeline.run(inputs, checkpoint_dir, self.max_concurrency, reuse)
+        flow, rules, code = (result.outputs[name] for name in ("flow", "rules", "code"))
+        
+        self.stage_timings = dict(result.timings, total=time.perf_counter() - started)
+        self.resumed_stages = result.resumed
+        self.reused_stages = result.reused
+        logger.debug(f"Generated {requirements['name']}: " +
+                     ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in self.stage_timings.items()))
+        if self.artifacts is not None:
+            logger.debug("Artifact hit rates: " +
+                         ", ".join(f"{stage} {counts['hit_rate']:.0%}" for stage, counts in self.artifacts.report().items()))
+        
+        return GeneratedBot(
+            name=requirements["name"],
+            code=code,
+            conversation_flow=flow,
+            business_rules=rules
+        )
 
 # Example usage
 if __name__ == "__main__":
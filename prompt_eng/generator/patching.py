@@ -0,0 +1,191 @@
+import ast
+import re
+import textwrap
+from typing import List, Optional, Tuple
+
+class PatchError(Exception):
+    """An LLM edit could not be applied, or applying it produced invalid code"""
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,\d+)? \+\d+(?:,\d+)? @@")
+_FENCE = re.compile(r"```[\w+-]*\n(.*?)```", re.DOTALL)
+
+def code_blocks(response: str) -> List[str]:
+    """The fenced code blocks of a response, or the whole response if it has none"""
+    blocks = _FENCE.findall(response)
+    return blocks if blocks else [response]
+
+def extract_code(response: str) -> str:
+    """The code of a generated file: the largest fenced block, without the prose and fences around it"""
+    code = max(code_blocks(response), key=len)
+    return code.strip("\n") + "\n" if code.strip() else code
+
+def is_python(language: str) -> bool:
+    return language.lower() in ("python", "py")
+
+def apply_edit(original: str, response: str, language: str = "python") -> str:
+    """
+    Apply an LLM edit to original: a unified diff if the response has hunks,
+    otherwise (for Python) replacement definitions. The result is validated.
+    """
+    if any(_HUNK_HEADER.match(line) for line in response.splitlines()):
+        edited = apply_unified_diff(original, response)
+    elif is_python(language):
+        edited = replace_definitions(original, response)
+    else:
+        raise PatchError("response is not a unified diff")
+    validate(edited, language)
+    return edited
+
+def validate(code: str, language: str = "python") -> None:
+    if not code.strip():
+        raise PatchError("edit left the file empty")
+    if is_python(language):
+        try:
+            ast.parse(code)
+        except SyntaxError as e:
+            raise PatchError(f"edited code does not parse: {e}")
+
+def _parse_hunks(diff: str) -> List[Tuple[int, List[str], List[str]]]:
+    """(line hint, old lines, new lines) for every hunk of a unified diff"""
+    hunks = []
+    current: Optional[Tuple[int, List[str], List[str]]] = None
+    for line in diff.splitlines():
+        header = _HUNK_HEADER.match(line)
+        if header:
+            current = (int(header.group(1)), [], [])
+            hunks.append(current)
+        elif current is None or line.startswith(("--- ", "+++ ", "```", "\\")):
+            continue
+        elif line.startswith("+"):
+            current[2].append(line[1:])
+        elif line.startswith("-"):
+            current[1].append(line[1:])
+        else:
+            # Models often drop the leading space of blank context lines
+            context = line[1:] if line.startswith(" ") else line
+            current[1].append(context)
+            current[2].append(context)
+    return hunks
+
+def _find(lines: List[str], block: List[str], start: int, hint: int) -> Optional[int]:
+    """Where block occurs in lines at or after start, nearest to the hinted index; trailing whitespace is ignored"""
+    wanted = [line.rstrip() for line in block]
+    matches = [i for i in range(start, len(lines) - len(block) + 1)
+               if [line.rstrip() for line in lines[i:i + len(block)]] == wanted]
+    return min(matches, key=lambda i: abs(i - hint)) if matches else None
+
+def apply_unified_diff(original: str, diff: str) -> str:
+    """
+    Apply a unified diff. Hunks are located by their content, searching
+    near the line number in the header, because model-written line numbers
+    are often off.
+    """
+    hunks = _parse_hunks(diff)
+    if not hunks:
+        raise PatchError("diff has no hunks")
+    lines = original.splitlines()
+    result: List[str] = []
+    position = 0
+    for hint, old, new in hunks:
+        if old:
+            start = _find(lines, old, position, hint - 1)
+            if start is None:
+                raise PatchError(f"hunk at line {hint} does not match the file")
+        else:
+            start = min(max(hint - 1, position), len(lines))
+        result.extend(lines[position:start])
+        result.extend(new)
+        position = start + len(old)
+    result.extend(lines[position:])
+    return "\n".join(result) + ("\n" if original.endswith("\n") else "")
+
+_DEFINITIONS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+def _span(node: ast.AST) -> Tuple[int, int]:
+    """0-based [start, end) line range of a definition, decorators included"""
+    start = min([node.lineno] + [decorator.lineno for decorator in node.decorator_list])
+    return start - 1, node.end_lineno
+
+def _reindent(source: str, indent: str) -> List[str]:
+    return [indent + line if line.strip() else "" for line in textwrap.dedent(source).splitlines()]
+
+def replace_definitions(original: str, response: str) -> str:
+    """
+    Apply replacement functions and classes. Each definition replaces the one
+    of the same name in original. A new definition is inserted after the
+    definition before it in the same block, or at module level when nothing
+    in its block exists yet. New imports go after the existing ones.
+    """
+    try:
+        tree = ast.parse(original)
+    except SyntaxError as e:
+        raise PatchError(f"original code does not parse: {e}")
+    existing = {}
+    for node in ast.walk(tree):
+        if isinstance(node, _DEFINITIONS):
+            existing.setdefault(node.name, []).append(node)
+    lines = original.splitlines()
+
+    # (start, end, replacement lines) in original line numbers; end == start inserts
+    edits: List[Tuple[int, int, List[str]]] = []
+    imports: List[str] = []
+    for block in code_blocks(response):
+        block = textwrap.dedent(block)
+        try:
+            nodes = ast.parse(block).body
+        except SyntaxError as e:
+            raise PatchError(f"replacement does not parse: {e}")
+        block_lines = block.splitlines()
+        anchor: Optional[Tuple[int, str]] = None
+        pending: List[List[str]] = []
+        for node in nodes:
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                imports.extend(block_lines[node.lineno - 1:node.end_lineno])
+                continue
+            if not isinstance(node, _DEFINITIONS):
+                raise PatchError(f"unexpected {type(node).__name__} statement in replacement")
+            start, end = _span(node)
+            source = "\n".join(block_lines[start:end])
+            matches = existing.get(node.name, [])
+            if len(matches) > 1:
+                raise PatchError(f"{node.name} is defined more than once")
+            if matches:
+                target_start, target_end = _span(matches[0])
+                indent = re.match(r"\s*", lines[target_start]).group(0)
+                edits.append((target_start, target_end, _reindent(source, indent)))
+                anchor = (target_end, indent)
+                # Definitions that came before the first match go in front of it
+                for new_lines in pending:
+                    edits.append((target_start, target_start, _reindent("\n".join(new_lines), indent) + [""]))
+                pending = []
+            elif anchor is not None:
+                edits.append((anchor[0], anchor[0], [""] + _reindent(source, anchor[1])))
+            else:
+                pending.append(source.splitlines())
+        # Nothing in the block exists yet: new module level definitions
+        for new_lines in pending:
+            position = _module_end(tree, lines)
+            edits.append((position, position, [""] + new_lines + [""]))
+
+    present = {line.strip() for line in lines}
+    new_imports = [line for line in imports if line.strip() not in present]
+    if new_imports:
+        position = max((node.end_lineno for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))), default=0)
+        edits.append((position, position, new_imports))
+    if not edits:
+        raise PatchError("response has no replacement definitions")
+
+    edits.sort(key=lambda edit: (edit[0], edit[1]))
+    for previous, edit in zip(edits, edits[1:]):
+        if edit[0] < previous[1]:
+            raise PatchError("replacements overlap")
+    for start, end, replacement in reversed(edits):
+        lines[start:end] = replacement
+    return "\n".join(lines) + ("\n" if original.endswith("\n") else "")
+
+def _module_end(tree: ast.Module, lines: List[str]) -> int:
+    """Where new module level code goes: before an `if __name__ == "__main__":` block, else at the end"""
+    for node in tree.body:
+        if isinstance(node, ast.If) and "__name__" in ast.unparse(node.test):
+            return node.lineno - 1
+    return len(lines)
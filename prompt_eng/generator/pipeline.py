@@ -0,0 +1,204 @@
+import asyncio
+import hashlib
+import inspect
+import json
+import logging
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, TypeVar, Union
+
+import networkx as nx
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Default number of stages running at once
+DEFAULT_FAN_OUT = 4
+
+class StageRunner:
+    """
+    Runs the stages of one pipeline run, at most max_concurrency at a time,
+    and records how long each stage took (excluding time spent waiting for a slot)
+    """
+    def __init__(self, max_concurrency: Optional[int] = None):
+        self._slots = asyncio.Semaphore(max_concurrency or DEFAULT_FAN_OUT)
+        self.timings: Dict[str, float] = {}
+
+    async def run(self, name: str, stage: Awaitable[T]) -> T:
+        async with self._slots:
+            started = time.perf_counter()
+            try:
+                return await stage
+            finally:
+                self.timings[name] = time.perf_counter() - started
+
+@dataclass
+class Stage:
+    """
+    One node of a pipeline. run is called with the outputs of the stages (or
+    pipeline inputs) named in inputs as keyword arguments, and may be sync or
+    async. Outputs must be JSON-serializable to be checkpointed. checkpoint may
+    also be a predicate on the output, e.g. to leave out fallback outputs.
+    """
+    name: str
+    run: Callable[..., Any]
+    inputs: List[str] = field(default_factory=list)
+    checkpoint: Union[bool, Callable[[Any], bool]] = True
+
+@dataclass
+class PipelineResult:
+    outputs: Dict[str, Any]
+    timings: Dict[str, float]
+    resumed: List[str]
+    reused: List[str] = field(default_factory=list)
+
+class PipelineError(Exception):
+    """A stage failed; stages that did not depend on it have still been checkpointed"""
+    def __init__(self, stage: str, error: BaseException):
+        super().__init__(f"Stage {stage} failed: {error}")
+        self.stage = stage
+        self.error = error
+
+_MISSING = object()
+
+class CheckpointStore:
+    """Stage outputs saved as one JSON file per stage, keyed by a hash of the stage's inputs"""
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+
+    def _path(self, stage: str) -> Path:
+        return self.directory / f"{stage}.json"
+
+    def load(self, stage: str, key: str) -> Any:
+        """The saved output, or _MISSING if there is none for these inputs"""
+        try:
+            with open(self._path(stage), "r") as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return _MISSING
+        if checkpoint.get("inputs") != key:
+            return _MISSING
+        return checkpoint["output"]
+
+    def save(self, stage: str, key: str, output: Any) -> None:
+        try:
+            data = json.dumps({"stage": stage, "inputs": key, "output": output, "saved_at": str(datetime.now())})
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Not checkpointing {stage}: {e}")
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so an interrupted write never leaves a truncated checkpoint
+        tmp_path = self._path(stage).with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(stage))
+
+    def clear(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+def fingerprint(values: Dict[str, Any]) -> str:
+    """Stable hash of a stage's inputs"""
+    data = json.dumps(values, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+class GenerationPipeline:
+    """
+    A graph of stages, each started as soon as its inputs are ready.
+
+    With a checkpoint_dir, every stage's output is saved as it completes.
+    A later run with the same checkpoint_dir reuses a saved output when the
+    stage's inputs are unchanged, so a failed or interrupted run resumes
+    from its last good stages instead of repeating their LLM calls.
+    Checkpoints are removed once a run succeeds.
+    """
+    def __init__(self, stages: List[Stage]):
+        self.stages = {stage.name: stage for stage in stages}
+        self.graph = nx.DiGraph()
+        for stage in stages:
+            self.graph.add_node(stage.name)
+            for name in stage.inputs:
+                self.graph.add_edge(name, stage.name)
+        if not nx.is_directed_acyclic_graph(self.graph):
+            raise ValueError(f"Pipeline stages form a cycle: {nx.find_cycle(self.graph)}")
+        self.order = [name for name in nx.topological_sort(self.graph) if name in self.stages]
+        # Inputs no stage produces must be passed to run()
+        self.inputs = sorted(name for name in self.graph if name not in self.stages)
+
+    def downstream(self, names: Iterable[str]) -> Set[str]:
+        """The named stages or inputs and every stage that depends on them, directly or not"""
+        affected = set()
+        for name in names:
+            affected.add(name)
+            affected.update(nx.descendants(self.graph, name))
+        return affected & set(self.stages)
+
+    async def run(self, inputs: Dict[str, Any], checkpoint_dir: Optional[Union[str, Path]] = None,
+                  max_concurrency: Optional[int] = None, reuse: Optional[Dict[str, Any]] = None) -> PipelineResult:
+        """
+        Run every stage and return their outputs. Stages named in reuse are
+        not run; their given output is passed on as is, e.g. when updating a
+        bot whose change does not reach them.
+        """
+        missing = [name for name in self.inputs if name not in inputs]
+        if missing:
+            raise ValueError(f"Missing pipeline inputs: {', '.join(missing)}")
+        reuse = reuse or {}
+
+        store = CheckpointStore(checkpoint_dir) if checkpoint_dir else None
+        runner = StageRunner(max_concurrency)
+        resumed: List[str] = []
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(stage: Stage) -> Any:
+            if stage.name in reuse:
+                return reuse[stage.name]
+            args = {name: inputs[name] if name in inputs else await tasks[name] for name in stage.inputs}
+            try:
+                key = fingerprint(args)
+                if store is not None and stage.checkpoint:
+                    output = store.load(stage.name, key)
+                    if output is not _MISSING:
+                        resumed.append(stage.name)
+                        return output
+                output = await runner.run(stage.name, _call(stage.run, args))
+                if store is not None and _keep(stage, output):
+                    store.save(stage.name, key, output)
+                return output
+            except Exception as e:
+                raise PipelineError(stage.name, e) from e
+
+        # Created in dependency order, so every task a stage awaits already exists
+        for name in self.order:
+            tasks[name] = asyncio.ensure_future(run_stage(self.stages[name]))
+        try:
+            results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+        # Report the first failure in dependency order; dependents fail with the same error
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+        if resumed:
+            logger.info(f"Resumed stages from checkpoints: {', '.join(resumed)}")
+        if store is not None:
+            store.clear()
+        return PipelineResult(outputs=dict(zip(tasks, results)), timings=runner.timings, resumed=resumed,
+                              reused=[name for name in self.order if name in reuse])
+
+def _keep(stage: Stage, output: Any) -> bool:
+    """Whether a stage's output should be checkpointed"""
+    return stage.checkpoint(output) if callable(stage.checkpoint) else stage.checkpoint
+
+async def _call(function: Callable[..., Any], args: Dict[str, Any]) -> Any:
+    result = function(**args)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
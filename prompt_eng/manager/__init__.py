@@ -1,5 +1,6 @@
 from .bot_manager import BotManager
 from .requirements_collector import RequirementsCollector
 from .master_bot import MasterBot
+from .prompt_builder import PromptBuilder
 
-__all__ = ["BotManager", "RequirementsCollector", "MasterBot"] 
\ No newline at end of file
+__all__ = ["BotManager", "RequirementsCollector", "MasterBot", "PromptBuilder"] 
\ No newline at end of file
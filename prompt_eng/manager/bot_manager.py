@@ -1,4 +1,5 @@
 import asyncio
+import copy
 import json
 import os
 from pathlib import Path
@@ -20,6 +21,8 @@ class BotManager:
         self.storage_dir = Path(storage_dir)
         self.storage_dir.mkdir(exist_ok=True, parents=True)
         self.active_bots: Dict[str, GeneratedBot] = {}
+        # Requirements each bot was generated from, so updates can tell what changed
+        self.bot_requirements: Dict[str, Dict[str, Any]] = {}
         self.bot_generator = DynamicBotGeneratorAgent()
     
     async def initialize(self):
@@ -27,6 +30,10 @@ class BotManager:
         await self.bot_generator.initialize()
         await self._load_stored_bots()
     
+    async def aclose(self):
+        """Release resources held by the bot generator"""
+        await self.bot_generator.aclose()
+    
     async def _load_stored_bots(self):
         """Load previously generated bots from storage"""
         for bot_dir in self.storage_dir.iterdir():
@@ -54,6 +61,7 @@ class BotManager:
                     )
                     
                     self.active_bots[metadata["name"]] = bot
+                    self.bot_requirements[metadata["name"]] = metadata.get("requirements", {})
                     logger.info(f"Loaded bot: {metadata['name']}")
             except Exception as e:
                 logger.error(f"Failed to load bot {bot_dir.name}: {str(e)}")
@@ -61,32 +69,45 @@ class BotManager:
     async def create_bot(self, requirements: Dict[str, Any]) -> GeneratedBot:
         """Create a new bot based on the provided requirements"""
         try:
-            # Generate the bot
-            bot = await self.bot_generator.generate_bot(requirements)
+            # Generate the bot, resuming from the checkpoints of an earlier failed attempt
+            bot = await self.bot_generator.generate_bot(requirements, self._checkpoint_dir(requirements["name"]))
             
             # Store the bot
             await self._store_bot(bot, requirements)
             
             # Add to active bots
             self.active_bots[bot.name] = bot
+            self.bot_requirements[bot.name] = copy.deepcopy(requirements)
             
             return bot
         except Exception as e:
             logger.error(f"Failed to create bot: {str(e)}")
             raise
     
-    async def _store_bot(self, bot: GeneratedBot, requirements: Dict[str, Any]):
-        """Store a bot to disk"""
+    def _checkpoint_dir(self, name: str) -> Path:
+        """Where generation stages of a bot are checkpointed until the bot is stored"""
+        return self.storage_dir / name / ".checkpoints"
+    
+    async def _store_bot(self, bot: GeneratedBot, requirements: Dict[str, Any],
+                         previous: Optional[GeneratedBot] = None):
+        """Store a bot to disk. Given the previous version, only files that changed are written"""
         bot_dir = self.storage_dir / bot.name
         bot_dir.mkdir(exist_ok=True)
         
         # Store code files
         code_dir = bot_dir / "code"
         code_dir.mkdir(exist_ok=True)
+        old_code = previous.code if previous else {}
         for filename, content in bot.code.items():
+            if old_code.get(filename) == content and (code_dir / filename).exists():
+                continue
             with open(code_dir / filename, "w") as f:
                 f.write(content)
         
+        # Remove files the new version no longer has
+        for filename in set(old_code) - set(bot.code):
+            (code_dir / filename).unlink(missing_ok=True)
+        
         # Store metadata
         metadata = {
             "name": bot.name,
@@ -103,26 +124,41 @@ class BotManager:
         """Get a bot by name"""
         return self.active_bots.get(name)
     
+    def get_requirements(self, name: str) -> Optional[Dict[str, Any]]:
+        """Get a copy of the requirements a bot was generated from"""
+        requirements = self.bot_requirements.get(name)
+        return copy.deepcopy(requirements) if requirements is not None else None
+    
     def list_bots(self) -> List[str]:
         """List all available bots"""
         return list(self.active_bots.keys())
     
     async def update_bot(self, name: str, requirements: Dict[str, Any]) -> GeneratedBot:
-        """Update an existing bot with new requirements"""
+        """
+        Update an existing bot with new requirements.
+        Only the stages and files affected by the change are regenerated and rewritten
+        """
         if name not in self.active_bots:
             raise ValueError(f"Bot {name} not found")
         
         # Update requirements with the bot name
         requirements["name"] = name
         
-        # Generate the updated bot
-        bot = await self.bot_generator.generate_bot(requirements)
+        # Regenerate what changed, or everything if the old requirements are unknown
+        previous = self.active_bots[name]
+        old_requirements = self.bot_requirements.get(name)
+        if old_requirements:
+            bot = await self.bot_generator.update_bot(previous, dict(old_requirements, name=name), requirements,
+                                                      self._checkpoint_dir(name))
+        else:
+            bot = await self.bot_generator.generate_bot(requirements, self._checkpoint_dir(name))
         
         # Store the updated bot
-        await self._store_bot(bot, requirements)
+        await self._store_bot(bot, requirements, previous)
         
         # Update active bots
         self.active_bots[name] = bot
+        self.bot_requirements[name] = copy.deepcopy(requirements)
         
         return bot
     
@@ -133,6 +169,7 @@ class BotManager:
         
         # Remove from active bots
         del self.active_bots[name]
+        self.bot_requirements.pop(name, None)
         
         # Delete from storage
         bot_dir = self.storage_dir / name
@@ -161,5 +198,6 @@ if __name__ == "__main__":
         bot = await manager.create_bot(requirements)
         print(f"Created bot: {bot.name}")
         print("Available bots:", manager.list_bots())
+        await manager.aclose()
     
     asyncio.run(test()) 
\ No newline at end of file
@@ -1,14 +1,17 @@
 import asyncio
 import json
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Callable
 import logging
 import re
 from difflib import get_close_matches
 
 from .bot_manager import BotManager
 from .requirements_collector import RequirementsCollector
+from .prompt_builder import PromptBuilder
 from ..generator import GeneratedBot
 from ..agents.models import AIModel, ModelOptions
+from ..clients.metrics import call_site
+from ..clients.models import options_for
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +20,7 @@ class MasterBot:
     Master Bot that serves as the main interface for users to create and manage bots.
     This is the primary class users will interact with to create and manage their bots.
     """
-    def __init__(self, storage_dir: str = "generated_bots", use_llm: bool = True):
+    def __init__(self, storage_dir: str = "generated_bots", use_llm: bool = True, use_cache: Optional[bool] = None):
         self.bot_manager = BotManager(storage_dir)
         self.requirements_collector = RequirementsCollector()
         self.current_conversation = []
@@ -30,8 +33,15 @@ class MasterBot:
             "waiting_for": None
         }
         self.use_llm = use_llm
+        self.use_cache = use_cache
         self.llm_client = None
         self.llm_model = None
+        self.warmer = None
+        self.llm_options = options_for("intent")
+        self.prompt_builder = PromptBuilder(
+            context_window_size=self.llm_options.context_window_size,
+            reserved_tokens=self.llm_options.max_tokens
+        )
         self.system_prompt = """
 You are Mother Bot, a master bot creation assistant designed to help users create and manage specialized bots.
 
@@ -59,11 +69,11 @@ Always extract relevant information from user messages and update the conversati
     async def initialize(self):
         """Initialize the master bot"""
         if not self.initialized:
-            await self.bot_manager.initialize()
-            
-            # Initialize LLM client if enabled
+            # The generator and the master bot warm up their models concurrently
             if self.use_llm:
-                await self._initialize_llm_client()
+                await asyncio.gather(self.bot_manager.initialize(), self._initialize_llm_client())
+            else:
+                await self.bot_manager.initialize()
                 
             self.initialized = True
     
@@ -71,23 +81,50 @@ Always extract relevant information from user messages and update the conversati
         """Initialize the LLM client for enhanced natural language processing"""
         try:
             # Import here to avoid circular imports
-            from ..agents.clients import bootstrap_client_and_model
+            from ..clients import MockChatbotClient, bootstrap_client_and_model
             
-            self.llm_client, self.llm_model = await bootstrap_client_and_model("", "bot management")
+            self.llm_client, self.llm_model = await bootstrap_client_and_model()
+            if isinstance(self.llm_client, MockChatbotClient):
+                # Canned responses cannot drive the conversation; keep the rule-based flow
+                logger.info("No LLM server available, using rule-based message handling")
+                self.llm_client = None
+                self.use_llm = False
+                return
+            
+            # Load the model now rather than on the first user message
+            from ..clients import warm_up_models
+            self.warmer = await warm_up_models(self.llm_client, [self.llm_model])
+            
+            # Optionally serve repeated prompts from the response cache (llm_cache in the config)
+            from ..clients import cache_enabled
+            from ..config import load_config
+            if cache_enabled(self.use_cache, load_config()):
+                from ..clients import CachedChatbotClient, create_response_cache
+                self.llm_client = CachedChatbotClient(self.llm_client, create_response_cache(load_config()))
             
-            # Set system prompt if client supports it
-            if hasattr(self.llm_client, 'set_system_prompt'):
-                self.llm_client.set_system_prompt(self.system_prompt)
-                
             logger.info(f"LLM client initialized with model: {self.llm_model.name if hasattr(self.llm_model, 'name') else self.llm_model.id}")
         except Exception as e:
             logger.error(f"Failed to initialize LLM client: {str(e)}")
             self.use_llm = False
     
-    async def process_message(self, message: str) -> str:
+    async def aclose(self):
+        """Shut down the master bot and close any open LLM connections"""
+        if self.warmer is not None:
+            await self.warmer.aclose()
+            self.warmer = None
+        if self.llm_client is not None and hasattr(self.llm_client, "aclose"):
+            await self.llm_client.aclose()
+        await self.bot_manager.aclose()
+        self.initialized = False
+    
+    async def process_message(self, message: str, on_token: Optional[Callable[[str], None]] = None) -> str:
         """
         Process a user message and return a response.
         This is the main entry point for user interaction.
+        
+        If on_token is given and the LLM path is used, the response text is
+        passed to it incrementally as tokens arrive. The returned string is
+        still the final response, which may differ if an action was executed.
         """
         # Initialize if not already initialized
         if not self.initialized:
@@ -98,7 +135,7 @@ Always extract relevant information from user messages and update the conversati
         
         # Choose processing method based on LLM availability
         if self.use_llm and self.llm_client:
-            response = await self._process_with_llm(message)
+            response = await self._process_with_llm(message, on_token)
         else:
             # Fallback to rule-based processing
             response = await self._process_in_context(message)
@@ -108,39 +145,30 @@ Always extract relevant information from user messages and update the conversati
         
         return response
     
-    async def _process_with_llm(self, message: str) -> str:
+    async def _process_with_llm(self, message: str, on_token: Optional[Callable[[str], None]] = None) -> str:
         """Process the message using LLM for natural language understanding"""
         try:
-            # Create a context object with available bots and conversation state
-            context = {
-                "available_bots": self.bot_manager.list_bots(),
-                "current_conversation_context": self.conversation_context,
-                "last_messages": self.current_conversation[-min(5, len(self.current_conversation)):],
-                "available_actions": [
-                    "create_bot", "list_bots", "get_bot_details", 
-                    "update_bot", "delete_bot", "help"
-                ]
-            }
-            
-            # Create a prompt that includes context and the user's message
-            prompt = f"""
-Current context: {json.dumps(context, indent=2)}
-
-Based on this context and the user's message: "{message}"
-
-1. Determine the user's intent
-2. Extract any relevant entities (bot names, features, etc.)
-3. Decide what action to take
-
-Please respond in this format:
-INTENT: [detected intent]
-ENTITIES: [extracted entities as JSON]
-ACTION: [action to take]
-RESPONSE: [your final response to the user]
-"""
+            # Compact, budgeted prompt; the current message is already in the prompt, not the history
+            prompt = self.prompt_builder.build(
+                message,
+                self.conversation_context,
+                self.bot_manager.list_bots(),
+                self.current_conversation[:-1],
+                ["create_bot", "list_bots", "get_bot_details", "update_bot", "delete_bot", "help"],
+                system_prompt=self.system_prompt
+            )
             
             # Get LLM response
-            _, llm_response = await self.llm_client.chat_completion(prompt, self.llm_model)
+            with call_site("intent"):
+                if on_token and hasattr(self.llm_client, "stream_chat_completion"):
+                    llm_response = await self._stream_llm_response(prompt, on_token)
+                else:
+                    status, llm_response = await self.llm_client.chat_completion(
+                        prompt, self.llm_model, self.llm_options, system_prompt=self.system_prompt
+                    )
+                    if status != 200:
+                        # Endpoint unavailable; the handler below falls back to rule-based processing
+                        raise Exception(f"LLM request failed: {llm_response}")
             
             # Extract action and response from LLM output
             action = None
@@ -228,6 +256,31 @@ RESPONSE: [your final response to the user]
             # Fallback to rule-based processing
             return await self._process_in_context(message)
     
+    async def _stream_llm_response(self, prompt: str, on_token: Callable[[str], None]) -> str:
+        """Stream the LLM response, forwarding only the RESPONSE section to on_token"""
+        stream = self.llm_client.stream_chat_completion(
+            prompt, self.llm_model, self.llm_options, system_prompt=self.system_prompt
+        )
+        response_start = None
+        emitted = 0
+        
+        async for _ in stream:
+            # The marker may be split across chunks, so search the accumulated text
+            if response_start is None:
+                marker = stream.text.find("RESPONSE:")
+                if marker == -1:
+                    continue
+                response_start = marker + len("RESPONSE:")
+            
+            body = stream.text[response_start:].lstrip()
+            if len(body) > emitted:
+                on_token(body[emitted:])
+                emitted = len(body)
+        
+        if stream.ttft_ms is not None:
+            logger.info(f"LLM stream: time to first token {stream.ttft_ms:.0f}ms, total {stream.total_ms:.0f}ms")
+        return stream.text
+    
     async def _process_in_context(self, message: str) -> str:
         """Process the message in the context of the current conversation"""
         message_lower = message.lower()
@@ -647,13 +700,14 @@ For example, you could say "Create a weather bot called MyWeatherApp with histor
         # Extract update requirements
         feature_match = re.search(r"add(?:ing)?\s+([\w\s]+)(?:\s+feature)?", message_lower)
         if feature_match:
-            # Get current requirements
-            requirements = self.requirements_collector.get_requirements()
+            # Start from the requirements the bot was generated from, so only the new feature is regenerated
+            requirements = self.bot_manager.get_requirements(bot_name) or self.requirements_collector.get_requirements()
             
             # Add the new feature
             new_feature = feature_match.group(1).strip()
-            if new_feature not in requirements["features"]:
-                requirements["features"].append(new_feature)
+            features = requirements.setdefault("features", [])
+            if new_feature not in features:
+                features.append(new_feature)
             
             # Update the bot
             updated_bot = await self.bot_manager.update_bot(bot_name, requirements)
@@ -728,5 +782,7 @@ if __name__ == "__main__":
         
         for response in responses:
             print("\nBOT:", response)
+        
+        await master_bot.aclose()
     
     asyncio.run(test()) 
\ No newline at end of file
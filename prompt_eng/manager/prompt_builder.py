@@ -0,0 +1,135 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+from ..clients.metrics import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Ollama's default num_ctx, used when the options do not set a context window
+DEFAULT_CONTEXT_WINDOW = 2048
+
+PROMPT_TEMPLATE = """Current context: {context}
+
+Based on this context and the user's message: "{message}"
+
+1. Determine the user's intent
+2. Extract any relevant entities (bot names, features, etc.)
+3. Decide what action to take
+
+Please respond in this format:
+INTENT: [detected intent]
+ENTITIES: [extracted entities as JSON]
+ACTION: [action to take]
+RESPONSE: [your final response to the user]
+"""
+
+def compact_json(value: Any) -> str:
+    """JSON without indentation or spaces after separators"""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+def _truncate(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    return text[:max(0, max_chars - 3)] + "..."
+
+class PromptBuilder:
+    """
+    Builds MasterBot's intent prompt within a token budget.
+
+    The budget is the context window minus the tokens reserved for the answer
+    and the system prompt. Recent turns are kept (each clipped to
+    max_message_chars) and older ones are reduced to a one-line summary. If
+    the prompt is still too large, the oldest kept turns are dropped, then the
+    summary, then bots from the list and the list of actions, and finally the
+    user's message is clipped, so the prompt only exceeds the budget if the
+    template itself does.
+    """
+    def __init__(self, context_window_size: Optional[int] = None, reserved_tokens: int = 384,
+                 max_turns: int = 5, max_message_chars: int = 400):
+        self.context_window_size = context_window_size or DEFAULT_CONTEXT_WINDOW
+        self.reserved_tokens = reserved_tokens
+        self.max_turns = max_turns
+        self.max_message_chars = max_message_chars
+        self.last_stats: Dict[str, int] = {}
+
+    def budget(self, system_prompt: str = "") -> int:
+        """Tokens available for the user prompt"""
+        return self.context_window_size - self.reserved_tokens - estimate_tokens(system_prompt)
+
+    def build(self, message: str, conversation_context: Dict[str, Any], available_bots: List[str],
+              history: List[Dict[str, str]], available_actions: List[str], system_prompt: str = "") -> str:
+        """Render the prompt, trimmed to fit the budget, and log its size"""
+        budget = self.budget(system_prompt)
+        split = max(0, len(history) - self.max_turns)
+        older, recent = history[:split], history[split:]
+        turns = [
+            {"role": turn.get("role", ""), "content": _truncate(turn.get("content", ""), self.max_message_chars)}
+            for turn in recent
+        ]
+        summary = self._summarize(older)
+        bots = list(available_bots)
+        actions = list(available_actions)
+        state = {k: v for k, v in conversation_context.items() if v}
+        omitted_bots = 0
+
+        def render(user_message: str) -> str:
+            context = {
+                "available_bots": bots,
+                "current_conversation_context": state,
+                "last_messages": turns,
+                "available_actions": actions
+            }
+            if omitted_bots:
+                context["more_bots"] = omitted_bots
+            if summary:
+                context["earlier"] = summary
+            return PROMPT_TEMPLATE.format(context=compact_json(context), message=user_message)
+
+        def over(prompt: str) -> bool:
+            return estimate_tokens(prompt) > budget
+
+        prompt = render(message)
+        while over(prompt) and turns:
+            turns.pop(0)
+            prompt = render(message)
+        if over(prompt) and summary:
+            summary = ""
+            prompt = render(message)
+        while over(prompt) and bots:
+            # Keep the most recently added bots
+            drop = max(1, len(bots) // 2)
+            omitted_bots += drop
+            bots = bots[drop:]
+            prompt = render(message)
+        if over(prompt) and actions:
+            actions = []
+            prompt = render(message)
+        while over(prompt) and message:
+            overflow_chars = (estimate_tokens(prompt) - budget) * 4
+            message = _truncate(message, len(message) - overflow_chars) if overflow_chars < len(message) - 3 else ""
+            prompt = render(message)
+        if over(prompt) and state:
+            state = {}
+            prompt = render(message)
+        if over(prompt):
+            logger.warning(f"MasterBot prompt template alone exceeds the budget of {budget} tokens")
+
+        tokens = estimate_tokens(prompt)
+        self.last_stats = {
+            "prompt_tokens": tokens,
+            "budget": budget,
+            "turns": len(turns),
+            "summarized_turns": len(older),
+            "omitted_bots": omitted_bots
+        }
+        logger.info(f"MasterBot prompt: {tokens} tokens (budget {budget}, {len(turns)} recent turns, "
+                    f"{len(older)} summarized, {omitted_bots} bots omitted)")
+        return prompt
+
+    def _summarize(self, turns: List[Dict[str, str]]) -> str:
+        """One line naming what the user asked for in turns that are no longer sent in full"""
+        if not turns:
+            return ""
+        asks = [_truncate(turn.get("content", ""), 40) for turn in turns if turn.get("role") == "user"]
+        return _truncate(f"{len(turns)} earlier messages; user said: " + " | ".join(asks), self.max_message_chars)
@@ -163,8 +163,7 @@ class SimpleMotherOfBots:
             logger.info(f"Using model {generation_model.name} for code generation")
             
             # Get bot code using the available model
-            await self.client.set_system_prompt(system_prompt)
-            bot_code = await self.client.chat_completion(user_prompt, model=generation_model)
+            bot_code = await self.client.chat_completion(user_prompt, model=generation_model, system_prompt=system_prompt)
             
             # Save bot code with UTF-8 encoding
             file_path = os.path.join(self.bots_dir, f"{bot_name}.py")
@@ -0,0 +1,22 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from prompt_eng.clients.models import AIModel
+from prompt_eng.generator import DynamicBotGenerator
+
+def build_generator(client, **kwargs) -> DynamicBotGenerator:
+    """An uncached generator whose components all send their prompts to client"""
+    generator = DynamicBotGenerator(use_cache=False, **kwargs)
+    generator.client, generator.model = client, AIModel(id="mock")
+    for component in (generator.code_generator, generator.flow_designer, generator.rule_engine):
+        component.client, component.model = client, generator.model
+    return generator
+
+@pytest.fixture
+def make_generator():
+    return build_generator
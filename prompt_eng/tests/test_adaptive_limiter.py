@@ -0,0 +1,54 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from prompt_eng.clients import AdaptiveLimiter
+
+def test_concurrency_never_exceeds_limit():
+    async def run():
+        limiter = AdaptiveLimiter(initial_limit=2, max_limit=2)
+        peak = 0
+
+        async def request():
+            nonlocal peak
+            async with limiter.slot():
+                peak = max(peak, limiter.inflight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*[request() for _ in range(6)])
+        assert peak == 2
+        assert limiter.inflight == 0
+        assert limiter.snapshot()["queue_wait_max"] > 0
+
+    asyncio.run(run())
+
+def test_limit_shrinks_on_overload_and_grows_when_healthy():
+    async def run():
+        limiter = AdaptiveLimiter(initial_limit=8, max_limit=16)
+
+        async def overloaded():
+            async with limiter.slot() as slot:
+                await asyncio.sleep(0.01)
+                slot.mark_overloaded()
+
+        # Concurrent failures from the same overload only back off once
+        await asyncio.gather(*[overloaded() for _ in range(3)])
+        assert limiter.limit == 4
+
+        async def healthy():
+            async with limiter.slot():
+                await asyncio.sleep(0.001)
+
+        for _ in range(5):
+            await asyncio.gather(*[healthy() for _ in range(limiter.limit)])
+        assert limiter.limit > 4
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_concurrency_never_exceeds_limit()
+    test_limit_shrinks_on_overload_and_grows_when_healthy()
+    print("All adaptive limiter tests passed")
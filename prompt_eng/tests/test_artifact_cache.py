@@ -0,0 +1,91 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from prompt_eng.generator.artifacts import ArtifactStore, requirement_subset
+
+WEATHER = {
+    "name": "WeatherBot",
+    "type": "weather",
+    "features": ["daily_forecast", "location_based"],
+    "apis": [{"name": "OpenWeatherMap", "version": "2.5"}],
+    "language": "python"
+}
+
+class CountingClient:
+    """Answers flow and rules prompts with JSON and everything else with code, counting the prompts"""
+    def __init__(self):
+        self.prompts = []
+
+    async def chat_completion(self, message, model, options=None, system_prompt=None, history=None):
+        self.prompts.append(message)
+        if "conversation flow" in message and "Conversation flow" not in message:
+            return 200, json.dumps({"intents": [{"name": "get_weather"}]})
+        if "business rules" in message and "Business rules" not in message:
+            return 200, json.dumps([{"if": "rain", "then": "umbrella"}])
+        return 200, "import json\n" + "# generated\n" * 20
+
+def test_requirement_subset_is_canonical():
+    first = requirement_subset(WEATHER, ("type", "features"))
+    second = requirement_subset(dict(WEATHER, name="Other", type=" Weather ",
+                                     features=["location_based", "daily_forecast", "daily_forecast"]),
+                                ("type", "features"))
+    assert first == second == {"type": "weather", "features": ["daily_forecast", "location_based"]}
+
+def test_similar_bots_share_stage_outputs(tmp_path, make_generator):
+    async def run():
+        client = CountingClient()
+        generator = make_generator(client, artifacts=ArtifactStore(tmp_path))
+        first = await generator.generate_bot(dict(WEATHER))
+        assert len(client.prompts) == 5
+        # A renamed bot only regenerates the files that mention its name
+        second = await generator.generate_bot(dict(WEATHER, name="OtherWeatherBot",
+                                                   features=["location_based", "daily_forecast"]))
+        assert len(client.prompts) == 7
+        assert "OtherWeatherBot" in client.prompts[-1] and "OpenWeatherMap" in client.prompts[-1]
+        assert second.name == "OtherWeatherBot"
+        assert second.code["api_utils.py"] == first.code["api_utils.py"]
+        assert second.conversation_flow == first.conversation_flow
+
+        # A new feature changes the flow, rules, config and bot code, but not the API utilities
+        await generator.generate_bot(dict(WEATHER, features=["alerts"]))
+        assert len(client.prompts) == 11
+        report = generator.artifacts.report()
+        assert report["api_utils"] == {"hits": 2, "misses": 1, "hit_rate": 2 / 3}
+        assert report["flow"]["hit_rate"] == 1 / 3
+
+        # Artifacts survive a restart
+        client = CountingClient()
+        restarted = make_generator(client, artifacts=ArtifactStore(tmp_path))
+        await restarted.generate_bot(dict(WEATHER, features=["location_based", "daily_forecast"]))
+        assert client.prompts == []
+        assert all(counts["hit_rate"] == 1.0 for counts in restarted.artifacts.report().values())
+
+    asyncio.run(run())
+
+def test_failed_stages_are_not_stored(make_generator):
+    class FailingClient:
+        async def chat_completion(self, message, model, options=None, system_prompt=None, history=None):
+            return 500, "Connection refused"
+
+    async def run():
+        generator = make_generator(FailingClient(), artifacts=ArtifactStore(None))
+        bot = await generator.generate_bot(dict(WEATHER))
+        # The fallback template is used but not stored
+        assert bot.conversation_flow == generator.flow_designer.templates["weather"]
+        assert generator.artifacts._memory == {}
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    import tempfile
+    from conftest import build_generator
+    test_requirement_subset_is_canonical()
+    with tempfile.TemporaryDirectory() as directory:
+        test_similar_bots_share_stage_outputs(Path(directory), build_generator)
+    test_failed_stages_are_not_stored(build_generator)
+    print("Artifact cache tests passed")
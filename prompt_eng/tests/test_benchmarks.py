@@ -0,0 +1,35 @@
+import asyncio
+import copy
+import sys
+from pathlib import Path
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from prompt_eng.benchmarks.bench_pipeline import compare, run_benchmarks
+
+def test_pipeline_benchmarks_run_and_compare(monkeypatch):
+    monkeypatch.setenv("TEST_MODE", "true")
+    results = asyncio.run(run_benchmarks("fake-server", iterations=1, bot_counts=[3]))
+
+    assert set(results["results"]) == {
+        "generate_bot", "generate_similar_bots", "update_bot_code_full", "update_bot_code_edit",
+        "bot_manager_load_3", "master_bot_rule_based", "master_bot_llm"
+    }
+    assert set(results["results"]["generate_bot"]["stages"]) == {
+        "flow", "rules", "config", "api_utils", "db_utils", "bot_code", "code", "total"
+    }
+    # Renamed and reordered bots reuse the stored API and database utilities
+    hit_rates = results["results"]["generate_similar_bots"]["artifact_hit_rates"]
+    assert hit_rates["api_utils"] == hit_rates["db_utils"] == 0.75
+    # Editing bot.py writes a small fraction of the tokens of regenerating it
+    full, edit = results["results"]["update_bot_code_full"], results["results"]["update_bot_code_edit"]
+    assert edit["output_tokens"] * 10 < full["output_tokens"]
+    assert edit["p50"] < full["p50"]
+    assert results["results"]["master_bot_llm"]["n"] == 7
+    assert compare(results, results) == []
+
+    slower = copy.deepcopy(results)
+    slower["results"]["generate_bot"]["p50"] += 1.0
+    regressions = compare(slower, results)
+    assert len(regressions) == 1 and regressions[0].startswith("generate_bot p50")
@@ -0,0 +1,72 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from prompt_eng.clients import CachedChatbotClient, ResponseCache, run_chat_batch
+from prompt_eng.clients.models import AIModel
+
+class TrackingClient:
+    """Client that records how many calls overlap and fails on request"""
+    def __init__(self):
+        self._system_prompt = ""
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+
+    async def chat_completion(self, message, model, options=None, system_prompt=None, history=None):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            # Later prompts finish first, so ordering is not an accident of timing
+            await asyncio.sleep(0.01 * (10 - int(message.split()[-1])))
+            if message.startswith("fail"):
+                raise RuntimeError("upstream exploded")
+            return 200, f"reply to {message}"
+        finally:
+            self.active -= 1
+
+def test_results_keep_prompt_order_and_respect_concurrency():
+    async def run():
+        client = TrackingClient()
+        prompts = [f"prompt {i}" for i in range(8)]
+        results = await run_chat_batch(client.chat_completion, prompts, AIModel(id="test"), max_concurrency=3)
+
+        assert results == [(200, f"reply to prompt {i}") for i in range(8)]
+        assert client.peak == 3
+
+    asyncio.run(run())
+
+def test_failed_item_does_not_fail_batch():
+    async def run():
+        client = TrackingClient()
+        results = await run_chat_batch(client.chat_completion, ["prompt 1", "fail 2", "prompt 3"], AIModel(id="test"))
+
+        assert results[0] == (200, "reply to prompt 1")
+        assert results[1] == (500, "upstream exploded")
+        assert results[2] == (200, "reply to prompt 3")
+
+    asyncio.run(run())
+
+def test_cached_batch_only_sends_uncached_prompts():
+    async def run():
+        upstream = TrackingClient()
+        client = CachedChatbotClient(upstream, ResponseCache(path=None))
+        model = AIModel(id="test")
+
+        await client.chat_completion("prompt 1", model)
+        results = await client.chat_completion_many(["prompt 1", "prompt 2"], model)
+
+        assert [content for _, content in results] == ["reply to prompt 1", "reply to prompt 2"]
+        assert upstream.calls == 2
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_results_keep_prompt_order_and_respect_concurrency()
+    test_failed_item_does_not_fail_batch()
+    test_cached_batch_only_sends_uncached_prompts()
+    print("Batch tests passed")
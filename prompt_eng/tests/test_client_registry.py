@@ -0,0 +1,80 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from aiohttp import web
+
+from prompt_eng.benchmarks.fake_server import FakeLLMServer
+from prompt_eng.clients import (
+    ChatbotClientFactory, ClientRegistry, MockChatbotClient, bootstrap_client_and_model, get_metrics_registry
+)
+from prompt_eng.config import config_factory
+
+def test_registry_shares_one_client_per_host():
+    async def run():
+        load_config = config_factory.load_config
+        async with FakeLLMServer() as server:
+            config_factory.load_config = lambda: {"chatbot_api_host": server.url}
+            registry = ClientRegistry()
+            try:
+                # First lookups for different models share one bootstrap and client
+                *results, (other_client, other_model) = await asyncio.gather(
+                    *[registry.get("fake-model") for _ in range(4)], registry.get("not-served")
+                )
+                assert list(registry._clients.values()) == [other_client]
+
+                clients = {id(client) for client, _ in results}
+                assert len(clients) == 1
+                assert all(model.id == "fake-model" for _, model in results)
+                # Unknown models resolve against the same host's client
+                assert id(other_client) in clients
+                assert other_model.id == "fake-model"
+
+                status, content = await results[0][0].chat_completion("hello", results[0][1])
+                assert status == 200 and "hello" in content
+            finally:
+                config_factory.load_config = load_config
+                await registry.aclose()
+
+    asyncio.run(run())
+
+def test_mock_fallback_closes_the_discarded_client():
+    async def run():
+        # A server that lists no models
+        runner = web.AppRunner(web.Application())
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        load_config, create_client = config_factory.load_config, ChatbotClientFactory.create_client
+        factory_method = ChatbotClientFactory.__dict__["create_client"]
+        created = []
+
+        def record(config, client_type=None):
+            created.append(create_client(config, client_type))
+            return created[-1]
+
+        config_factory.load_config = lambda: {
+            "chatbot_api_host": f"http://127.0.0.1:{runner.addresses[0][1]}", "mock_latency": "0.01"
+        }
+        ChatbotClientFactory.create_client = record
+        summary_task = get_metrics_registry()._summary_task
+        try:
+            client, model = await bootstrap_client_and_model()
+            assert isinstance(client, MockChatbotClient) and model.id == "mock"
+            # The stand-in simulates what the configuration asks for
+            assert client.latency is not None
+            # The real client opened a session to list models; it is closed, not leaked
+            assert len(created) == 1 and created[0]._session is None
+            assert get_metrics_registry()._summary_task is summary_task
+        finally:
+            config_factory.load_config, ChatbotClientFactory.create_client = load_config, factory_method
+            await runner.cleanup()
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_registry_shares_one_client_per_host()
+    test_mock_fallback_closes_the_discarded_client()
+    print("Client registry tests passed")
@@ -0,0 +1,101 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import aiohttp
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from prompt_eng.benchmarks.fake_server import FakeLLMServer
+from prompt_eng.clients import LoadBalancedClient, OllamaClient, OpenWebUIClient
+from prompt_eng.clients.models import AIModel
+
+MODEL = AIModel(id="fake-model")
+
+def test_streaming_through_both_clients():
+    async def run():
+        async with FakeLLMServer(token_delay=0.001) as server:
+            async with OpenWebUIClient(server.url, bearer="test") as client:
+                stream = client.stream_chat_completion("stream me please", MODEL)
+                chunks = [chunk async for chunk in stream]
+                assert len(chunks) > 1
+                assert json.loads("".join(chunks)) == {"echo": "stream me please"}
+            async with OllamaClient(server.url) as client:
+                status, content = await client.chat_completion("plain", MODEL)
+                assert status == 200 and json.loads(content) == {"echo": "plain"}
+            assert [entry["stream"] for entry in server.requests] == [True, False]
+
+    asyncio.run(run())
+
+def test_native_chat_and_embeddings():
+    async def run():
+        async with FakeLLMServer() as server:
+            async with aiohttp.ClientSession() as session:
+                body = {"model": "fake-model", "messages": [{"role": "user", "content": "hi there"}]}
+                async with session.post(f"{server.url}/api/chat", json=body) as response:
+                    lines = [json.loads(line) async for line in response.content if line.strip()]
+                assert lines[-1]["done"] is True
+                assert json.loads("".join(line["message"]["content"] for line in lines)) == {"echo": "hi there"}
+
+                async with session.post(f"{server.url}/api/embeddings",
+                                        json={"model": "fake-model", "prompt": "hello"}) as response:
+                    first = (await response.json())["embedding"]
+                async with session.post(f"{server.url}/api/embeddings",
+                                        json={"model": "fake-model", "input": ["hello", "bye"]}) as response:
+                    data = (await response.json())["data"]
+                assert len(first) == server.embedding_dim
+                assert data[0]["embedding"] == first and data[1]["embedding"] != first
+
+    asyncio.run(run())
+
+def test_concurrency_cap_and_error_injection():
+    async def run():
+        async with FakeLLMServer(response_delay=0.02, max_concurrency=2) as server:
+            async with OllamaClient(server.url) as client:
+                results = await asyncio.gather(*[client.chat_completion(str(i), MODEL) for i in range(5)])
+                assert all(status == 200 for status, _ in results)
+                assert server.max_in_flight == 2
+                assert max(entry["queued"] for entry in server.requests) > 0
+
+                client.retry_policy.base_delay = 0.001
+                server.fail_next(503)
+                status, _ = await client.chat_completion("retried", MODEL)
+                assert status == 200
+                assert [entry["status"] for entry in server.requests[-2:]] == [503, 200]
+
+        async with FakeLLMServer(error_rate=0.5, seed=7) as first, FakeLLMServer(error_rate=0.5, seed=7) as second:
+            async with aiohttp.ClientSession() as session:
+                for server in (first, second):
+                    for _ in range(10):
+                        async with session.post(f"{server.url}/api/chat/completions", json={"messages": []}):
+                            pass
+            statuses = [entry["status"] for entry in first.requests]
+            assert statuses == [entry["status"] for entry in second.requests]
+            assert {200, 502, 503} >= set(statuses) and len(set(statuses)) > 1
+
+    asyncio.run(run())
+
+def test_model_discovery_on_both_apis():
+    async def run():
+        async with FakeLLMServer(model_id="llama3:8b") as server:
+            async with OpenWebUIClient(server.url, bearer="test") as client:
+                assert [model.id for model in await client.get_models()] == ["llama3:8b"]
+            async with OllamaClient(server.url) as client:
+                assert [model.id for model in await client.get_models()] == ["llama3:8b"]
+            # Ollama replicas pass the balancer's health probe, which lists models
+            balancer = LoadBalancedClient([OllamaClient(server.url), OllamaClient(server.url)], health_interval=0)
+            balancer.backends[0].healthy = False
+            await balancer.check_health()
+            assert all(backend.healthy for backend in balancer.backends)
+            await balancer.aclose()
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_streaming_through_both_clients()
+    test_native_chat_and_embeddings()
+    test_concurrency_cap_and_error_injection()
+    test_model_discovery_on_both_apis()
+    print("Fake server tests passed")
@@ -0,0 +1,52 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+REQUIREMENTS = {
+    "name": "WeatherBot",
+    "type": "weather",
+    "apis": [{"name": "OpenWeatherMap", "version": "2.5"}],
+    "database": "sqlite",
+    "language": "python"
+}
+
+class SlowCodeClient:
+    """Answers every prompt with plausible code after 50ms"""
+    async def chat_completion(self, message, model, options=None, system_prompt=None, history=None):
+        await asyncio.sleep(0.05)
+        return 200, "import json\n" + "# generated\n" * 20
+
+def test_independent_stages_run_concurrently(make_generator):
+    async def run():
+        generator = make_generator(SlowCodeClient(), max_concurrency=8)
+        started = time.monotonic()
+        bot = await generator.generate_bot(dict(REQUIREMENTS))
+        elapsed = time.monotonic() - started
+
+        # Six LLM calls, but the longest chain is flow/rules followed by the bot code
+        assert elapsed < 0.2
+        assert set(bot.code) == {"bot.python", "config.py", "api_utils.py", "db_utils.py"}
+        timings = generator.stage_timings
+        assert set(timings) == {"flow", "rules", "config", "api_utils", "db_utils", "bot_code", "code", "total"}
+        assert all(timings[stage] >= 0.05 for stage in ("flow", "rules", "config", "bot_code"))
+
+    asyncio.run(run())
+
+def test_fan_out_limit(make_generator):
+    async def run():
+        generator = make_generator(SlowCodeClient(), max_concurrency=1)
+        started = time.monotonic()
+        await generator.generate_bot(dict(REQUIREMENTS))
+        assert time.monotonic() - started >= 0.3
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    from conftest import build_generator
+    test_independent_stages_run_concurrently(build_generator)
+    test_fan_out_limit(build_generator)
+    print("Generation stage tests passed")
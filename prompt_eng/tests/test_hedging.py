@@ -0,0 +1,133 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from prompt_eng.clients import HedgeBudget, HedgedChatbotClient, LoadBalancedClient
+from prompt_eng.clients.models import AIModel
+
+class ScriptedClient:
+    """Answers after a per-call delay and records cancellations"""
+    def __init__(self, delays, name):
+        self._system_prompt = ""
+        self.delays = delays
+        self.name = name
+        self.calls = 0
+        self.cancelled = 0
+
+    async def chat_completion(self, message, model, options=None, system_prompt=None, history=None):
+        delay = self.delays(self.calls)
+        self.calls += 1
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return 200, f"{self.name}:{message}"
+
+def test_slow_request_is_hedged_and_loser_cancelled():
+    async def run():
+        primary = ScriptedClient(lambda i: 0.5 if i == 20 else 0.01, "primary")
+        backup = ScriptedClient(lambda i: 0.01, "backup")
+        client = HedgedChatbotClient(primary, hedge_client=backup, percentile=0.9,
+                                     budget=HedgeBudget(ratio=0.5), min_samples=20)
+        model = AIModel(id="test")
+
+        for i in range(20):
+            await client.chat_completion(f"warmup {i}", model)
+        # Nothing is hedged until enough latencies have been seen
+        assert backup.calls == 0
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        status, content = await client.chat_completion("straggler", model)
+        elapsed = loop.time() - started
+        await asyncio.sleep(0)
+
+        assert (status, content) == (200, "backup:straggler")
+        assert elapsed < 0.2
+        assert primary.cancelled == 1
+        assert client.stats["hedged"] == 1 and client.stats["hedge_wins"] == 1
+
+    asyncio.run(run())
+
+def test_budget_caps_hedges():
+    async def run():
+        primary = ScriptedClient(lambda i: 0.01 if i < 20 else 0.05, "primary")
+        client = HedgedChatbotClient(primary, hedge_model=AIModel(id="backup"), percentile=0.5,
+                                     budget=HedgeBudget(ratio=0.1, burst=1), min_samples=20)
+        model = AIModel(id="test")
+
+        for i in range(20):
+            await client.chat_completion(f"warmup {i}", model)
+        await asyncio.gather(*[client.chat_completion(f"slow {i}", model) for i in range(20)])
+
+        # 40 requests earn 0.1 tokens each, and the bucket never holds more than one
+        assert 1 <= client.stats["hedged"] <= 2
+        assert client.stats["budget_exhausted"] >= 18
+
+    asyncio.run(run())
+
+def test_no_hedging_without_a_distinct_target():
+    async def run():
+        primary = ScriptedClient(lambda i: 0.01 if i < 20 else 0.05, "primary")
+        client = HedgedChatbotClient(primary, percentile=0.5, budget=HedgeBudget(ratio=1.0), min_samples=20)
+        model = AIModel(id="test")
+
+        for i in range(25):
+            await client.chat_completion(f"m{i}", model)
+        # A duplicate to the same endpoint and model would only add load
+        assert primary.calls == 25
+        assert client.stats["hedged"] == 0
+
+    asyncio.run(run())
+
+def test_hedge_latency_is_not_recorded_as_primary_latency():
+    async def run():
+        primary = ScriptedClient(lambda i: 0.3 if i >= 20 else 0.01, "primary")
+        backup = ScriptedClient(lambda i: 0.0, "backup")
+        client = HedgedChatbotClient(primary, hedge_client=backup, percentile=0.5,
+                                     budget=HedgeBudget(ratio=1.0), min_samples=20)
+        model = AIModel(id="test")
+
+        for i in range(20):
+            await client.chat_completion(f"warmup {i}", model)
+        await client.chat_completion("straggler", model)
+        assert client.stats["hedge_wins"] == 1
+        assert client.latency.sample_count == 20
+
+    asyncio.run(run())
+
+def test_balanced_hedge_avoids_the_primary_replica():
+    async def run():
+        usual = ScriptedClient(lambda i: 0.5, "usual")
+        other = ScriptedClient(lambda i: 0.01, "other")
+        balancer = LoadBalancedClient([usual, other], health_interval=0)
+        balancer.backends[0].ewma_latency, balancer.backends[1].ewma_latency = 0.1, 1.0
+        client = HedgedChatbotClient(balancer, percentile=0.5, budget=HedgeBudget(ratio=1.0), min_samples=1)
+        client.latency.observe(0.02)
+        model = AIModel(id="test")
+
+        # Even with its own request outstanding the usually fast replica scores best,
+        # but the straggler there is hedged to the other one
+        assert await client.chat_completion("straggler", model) == (200, "other:straggler")
+        assert (usual.calls, other.calls) == (1, 1)
+        assert client.stats["hedged"] == 1
+
+        # With no other healthy replica the request is not hedged
+        balancer.backends[1].healthy = False
+        assert await client.chat_completion("alone", model) == (200, "usual:alone")
+        assert (usual.calls, other.calls) == (2, 1)
+        assert client.stats["no_target"] == 1
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_slow_request_is_hedged_and_loser_cancelled()
+    test_budget_caps_hedges()
+    test_no_hedging_without_a_distinct_target()
+    test_hedge_latency_is_not_recorded_as_primary_latency()
+    test_balanced_hedge_avoids_the_primary_replica()
+    print("Hedging tests passed")
@@ -0,0 +1,101 @@
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from prompt_eng.manager import BotManager, MasterBot
+
+WEATHER = {
+    "name": "WeatherBot",
+    "type": "weather",
+    "features": ["daily_forecast"],
+    "apis": [{"name": "OpenWeatherMap", "version": "2.5"}],
+    "database": "sqlite",
+    "language": "python"
+}
+
+class CountingClient:
+    """Answers flow and rules prompts with JSON and everything else with code, counting the prompts"""
+    def __init__(self):
+        self.prompts = []
+
+    async def chat_completion(self, message, model, options=None, system_prompt=None, history=None):
+        self.prompts.append(message)
+        if message.startswith("Design a conversation flow"):
+            return 200, json.dumps({"intents": [{"name": "get_weather"}], "prompt": len(self.prompts)})
+        if message.startswith("Generate business rules"):
+            return 200, json.dumps([{"if": "rain", "then": "umbrella", "prompt": len(self.prompts)}])
+        if "Do not repeat the whole file" in message:
+            return 200, f"@@ -1 +1,2 @@\n import json\n+# edit {len(self.prompts)}\n"
+        return 200, f"import json\n# prompt {len(self.prompts)}\n" + "# generated\n" * 20
+
+async def make_manager(storage_dir: Path, generator) -> BotManager:
+    manager = BotManager(str(storage_dir))
+    manager.bot_generator.bot_generator = generator
+    await manager.initialize()
+    return manager
+
+def test_update_regenerates_only_affected_stages(tmp_path, make_generator):
+    async def run():
+        client = CountingClient()
+        manager = await make_manager(tmp_path, make_generator(client))
+        created = await manager.create_bot(dict(WEATHER))
+        assert len(client.prompts) == 6
+        code_dir = tmp_path / "WeatherBot" / "code"
+        for path in code_dir.iterdir():
+            os.utime(path, (0, 0))
+
+        # A new feature reaches the flow, rules, config and bot code, not the API or database utilities
+        updated = await manager.update_bot("WeatherBot", dict(WEATHER, features=["daily_forecast", "alerts"]))
+        generator = manager.bot_generator.bot_generator
+        assert len(client.prompts) == 10
+        assert generator.reused_stages == ["api_utils", "db_utils"]
+        assert updated.code["api_utils.py"] == created.code["api_utils.py"]
+        # The bot code is edited, not rewritten
+        assert updated.code["bot.python"].startswith("import json\n# edit 10\n# prompt 6\n")
+        assert {path.name for path in code_dir.iterdir() if path.stat().st_mtime == 0} == {"api_utils.py", "db_utils.py"}
+
+        # After a restart the stored requirements are diffed against; a new database only touches its stages
+        client.prompts.clear()
+        manager = await make_manager(tmp_path, make_generator(client))
+        await manager.update_bot("WeatherBot", dict(WEATHER, features=["alerts", "daily_forecast"], database="postgres"))
+        assert len(client.prompts) == 3
+        assert manager.bot_generator.bot_generator.reused_stages == ["flow", "rules", "api_utils"]
+
+        # An unchanged update makes no LLM calls; dropping the database removes its file
+        client.prompts.clear()
+        await manager.update_bot("WeatherBot", manager.get_requirements("WeatherBot"))
+        assert client.prompts == []
+        bot = await manager.update_bot("WeatherBot", dict(manager.get_requirements("WeatherBot"), database=None))
+        assert "db_utils.py" not in bot.code
+        assert not (code_dir / "db_utils.py").exists()
+
+    asyncio.run(run())
+
+def test_master_bot_update_starts_from_stored_requirements(tmp_path, make_generator):
+    async def run():
+        client = CountingClient()
+        master_bot = MasterBot(storage_dir=str(tmp_path), use_llm=False)
+        master_bot.bot_manager = await make_manager(tmp_path, make_generator(client))
+        await master_bot.bot_manager.create_bot(dict(WEATHER))
+        client.prompts.clear()
+
+        response = await master_bot._handle_bot_update("Update WeatherBot to add alerts", "WeatherBot")
+        assert "alerts" in response
+        assert len(client.prompts) == 4
+        assert master_bot.bot_manager.get_requirements("WeatherBot")["features"] == ["daily_forecast", "alerts"]
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    import tempfile
+    from conftest import build_generator
+    with tempfile.TemporaryDirectory() as directory:
+        test_update_regenerates_only_affected_stages(Path(directory), build_generator)
+    with tempfile.TemporaryDirectory() as directory:
+        test_master_bot_update_starts_from_stored_requirements(Path(directory), build_generator)
+    print("Incremental update tests passed")
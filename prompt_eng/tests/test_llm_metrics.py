@@ -0,0 +1,92 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from prompt_eng.benchmarks.fake_server import FakeLLMServer
+from prompt_eng.clients import OllamaClient, call_site, get_metrics_registry
+from prompt_eng.clients.metrics import Histogram, MetricsRegistry, RequestMetrics
+from prompt_eng.clients.models import AIModel
+
+def test_histogram_buckets_and_prometheus_text():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value)
+    assert histogram.counts == [1, 2, 1]
+    assert histogram.quantile(0.5) == 1.0
+    assert histogram.quantile(1.0) == float("inf")
+
+    registry = MetricsRegistry()
+    registry.observe("llm_request_seconds", 0.3, model="m", call_site="intent")
+    registry.inc("llm_retries_total", model="m", call_site="intent")
+    registry.register_counter("bots_built_total", "Bots built")
+    registry.inc("bots_built_total")
+    text = registry.render_prometheus()
+
+    assert "# TYPE llm_request_seconds histogram" in text
+    assert 'llm_request_seconds_bucket{call_site="intent",model="m",le="0.25"} 0' in text
+    assert 'llm_request_seconds_bucket{call_site="intent",model="m",le="0.5"} 1' in text
+    assert 'llm_request_seconds_bucket{call_site="intent",model="m",le="+Inf"} 1' in text
+    assert 'llm_request_seconds_count{call_site="intent",model="m"} 1' in text
+    assert 'llm_retries_total{call_site="intent",model="m"} 1' in text
+    assert "# HELP bots_built_total Bots built\n# TYPE bots_built_total counter\nbots_built_total 1" in text
+    assert registry.summary().startswith("m/intent: n=1")
+
+def test_client_calls_are_recorded_per_call_site():
+    async def run():
+        registry = get_metrics_registry()
+        registry.reset()
+        model = AIModel(id="fake-model")
+        async with FakeLLMServer() as server:
+            async with OllamaClient(server.url) as client:
+                with call_site("intent"):
+                    await client.chat_completion("hello", model)
+                    await client.chat_completion("again", model)
+
+        labels = {"model": "fake-model", "call_site": "intent"}
+        assert registry.histogram("llm_request_seconds", **labels).count == 2
+        assert registry.histogram("llm_queue_seconds", **labels).count == 2
+        assert registry.histogram("llm_prompt_tokens", **labels).count == 2
+        assert registry.histogram("llm_tokens_per_second", **labels).count == 2
+        assert registry.counter("llm_requests_total", outcome="ok", **labels) == 2
+        # The first request opens the connection, the second reuses it
+        assert registry.counter("llm_connections_total", reused="false", **labels) == 1
+        assert registry.histogram("llm_connect_seconds", **labels).count == 1
+        assert registry.counter("llm_connections_total", reused="true", **labels) == 1
+
+        with call_site("code"):
+            metrics = RequestMetrics("fake-model", "prompt")
+        metrics.first_token()
+        metrics.finish("ok", "some streamed text")
+        metrics.finish("error")
+        stream_labels = {"model": "fake-model", "call_site": "code"}
+        assert registry.histogram("llm_ttft_seconds", **stream_labels).count == 1
+        # finish only counts once
+        assert registry.histogram("llm_request_seconds", **stream_labels).count == 1
+
+    asyncio.run(run())
+
+def test_failures_count_as_fallbacks():
+    async def run():
+        registry = get_metrics_registry()
+        registry.reset()
+        async with OllamaClient("http://127.0.0.1:9") as client:
+            client.retry_policy.max_retries = 1
+            client.retry_policy.base_delay = 0.01
+            status, _ = await client.chat_completion("hello", AIModel(id="down-model"))
+
+        labels = {"model": "down-model", "call_site": "default"}
+        assert status == 500
+        assert registry.counter("llm_retries_total", **labels) == 1
+        assert registry.counter("llm_requests_total", outcome="error", **labels) == 1
+        assert registry.counter("llm_fallbacks_total", kind="error", **labels) == 1
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_histogram_buckets_and_prometheus_text()
+    test_client_calls_are_recorded_per_call_site()
+    test_failures_count_as_fallbacks()
+    print("Metrics tests passed")
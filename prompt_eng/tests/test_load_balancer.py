@@ -0,0 +1,90 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from prompt_eng.benchmarks.fake_server import FakeLLMServer
+from prompt_eng.clients import ChatbotClientFactory, LoadBalancedClient, RetryPolicy
+from prompt_eng.clients.models import AIModel
+
+def test_factory_builds_balancer_from_host_list():
+    client = ChatbotClientFactory.create_client(
+        {"chatbot_api_host": "http://localhost:11434, http://localhost:11435"}
+    )
+    assert isinstance(client, LoadBalancedClient)
+    assert client.host == "http://localhost:11434,http://localhost:11435"
+
+def test_traffic_favours_fast_replica_and_skips_dead_ones():
+    async def run():
+        fast = FakeLLMServer(response_delay=0.005)
+        slow = FakeLLMServer(response_delay=0.05)
+        flaky = FakeLLMServer()
+        for server in (fast, slow, flaky):
+            await server.start()
+
+        config = {"chatbot_api_host": ",".join(s.url for s in (fast, slow, flaky)), "llm_max_retries": "0"}
+        balancer = ChatbotClientFactory.create_client(config, "ollama")
+        balancer.health_interval = 0  # probe explicitly below
+        model = AIModel(id="fake-model")
+        try:
+            # Send in waves so latency observations from one wave steer the next
+            for wave in range(6):
+                results = await asyncio.gather(*[balancer.chat_completion(f"m{i}", model) for i in range(10)])
+                assert all(status == 200 for status, _ in results)
+            assert fast.request_count > 2 * slow.request_count
+
+            # A replica that goes away is routed around, then dropped by the health probe
+            port = flaky.port
+            await flaky.stop()
+            results = await asyncio.gather(*[balancer.chat_completion(f"n{i}", model) for i in range(10)])
+            assert all(status == 200 for status, _ in results)
+            await balancer.check_health()
+            assert balancer.snapshot()[flaky.url]["healthy"] is False
+
+            # ...and returns once it answers again
+            flaky = FakeLLMServer(port=port)
+            await flaky.start()
+            await balancer.check_health()
+            assert balancer.snapshot()[flaky.url]["healthy"] is True
+        finally:
+            await balancer.aclose()
+            for server in (fast, slow, flaky):
+                await server.stop()
+
+    asyncio.run(run())
+
+def test_rejected_requests_do_not_count_as_backend_failures():
+    async def send(status, count):
+        servers = [FakeLLMServer(error_rate=1.0, error_statuses=(status,)) for _ in range(2)]
+        for server in servers:
+            await server.start()
+        balancer = LoadBalancedClient(
+            [ChatbotClientFactory.create_client({"chatbot_api_host": s.url, "llm_max_retries": "0"}, "ollama")
+             for s in servers],
+            health_interval=0
+        )
+        try:
+            results = [await balancer.chat_completion(f"m{i}", AIModel(id="fake-model")) for i in range(count)]
+            requests = sum(server.request_count for server in servers)
+            return results, requests, [backend["healthy"] for backend in balancer.snapshot().values()]
+        finally:
+            await balancer.aclose()
+            for server in servers:
+                await server.stop()
+
+    # A bad request is passed back as is, without failing over or marking the backend down
+    results, requests, healthy = asyncio.run(send(400, 5))
+    assert [status for status, _ in results] == [400] * 5
+    assert requests == 5 and all(healthy)
+
+    # Server errors fail over and take backends out of rotation
+    results, requests, healthy = asyncio.run(send(503, 3))
+    assert requests == 6 and not any(healthy)
+
+if __name__ == "__main__":
+    test_factory_builds_balancer_from_host_list()
+    test_traffic_favours_fast_replica_and_skips_dead_ones()
+    test_rejected_requests_do_not_count_as_backend_failures()
+    print("Load balancer tests passed")
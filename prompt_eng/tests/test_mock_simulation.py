@@ -0,0 +1,115 @@
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from prompt_eng.clients import MockChatbotClient, get_metrics_registry
+from prompt_eng.clients.models import AIModel
+from prompt_eng.clients.simulation import FaultModel, LatencyModel, load_timings, mock_options
+
+PROMPT = "Design the conversation flow for a weather bot"
+
+def test_latency_models():
+    rng = random.Random(1)
+    assert LatencyModel.parse("0.25").sample(rng) == 0.25
+    assert LatencyModel.parse("fixed:0.5").sample(rng) == 0.5
+
+    replay = LatencyModel.replay([0.1, 0.2])
+    assert [replay.sample(rng) for _ in range(3)] == [0.1, 0.2, 0.1]
+
+    lognormal = LatencyModel.parse("lognormal:1.0,0.5")
+    assert lognormal.sample(random.Random(7)) == LatencyModel.lognormal(1.0, 0.5).sample(random.Random(7))
+    draws = sorted(lognormal.sample(rng) for _ in range(2001))
+    # The median of the draws is close to the configured median
+    assert 0.8 < draws[1000] < 1.25
+
+def test_load_timings(tmp_path):
+    (tmp_path / "timings.json").write_text('{"latencies": [0.5, 1.5]}')
+    (tmp_path / "timings.txt").write_text("0.5\n1.5\n")
+    assert load_timings(tmp_path / "timings.json") == [0.5, 1.5]
+    assert load_timings(tmp_path / "timings.txt") == [0.5, 1.5]
+
+def test_seeded_faults_are_reproducible():
+    faults = FaultModel(timeout_rate=0.1, error_rate=0.2, malformed_rate=0.1)
+    rng = random.Random(42)
+    first = [faults.pick(rng) for _ in range(200)]
+    rng = random.Random(42)
+    second = [faults.pick(rng) for _ in range(200)]
+    assert first == second
+    assert set(first) == {"timeout", 502, 503, "malformed", None}
+
+def test_simulated_latency_and_token_rate():
+    async def run():
+        client = MockChatbotClient(latency=LatencyModel.fixed(0.05), tokens_per_second=2000)
+        started = time.monotonic()
+        status, content = await client.chat_completion(PROMPT, AIModel(id="sim"))
+        elapsed = time.monotonic() - started
+        assert status == 200
+        assert elapsed >= 0.05 + (len(content) / 4) / 2000 * 0.9
+
+        pieces = [piece async for piece in client.stream_chat_completion(PROMPT, AIModel(id="sim"))]
+        assert "".join(pieces) == content
+
+    asyncio.run(run())
+
+def test_concurrency_cap_queues_requests():
+    async def run():
+        client = MockChatbotClient(latency=LatencyModel.fixed(0.05), max_concurrency=2)
+        started = time.monotonic()
+        await asyncio.gather(*[client.chat_completion(PROMPT, AIModel(id="sim")) for _ in range(4)])
+        assert time.monotonic() - started >= 0.1
+
+    asyncio.run(run())
+
+def test_injected_faults_are_retried_and_recorded():
+    async def run():
+        registry = get_metrics_registry()
+        registry.reset()
+        client = MockChatbotClient(faults=FaultModel(error_rate=1.0), seed=3)
+        client.retry_policy.max_retries = 2
+        client.retry_policy.base_delay = 0.001
+        status, error = await client.chat_completion(PROMPT, AIModel(id="flaky"))
+        assert status == 500
+        assert "after 3 attempts" in error
+        labels = {"model": "flaky", "call_site": "default"}
+        assert registry.counter("llm_retries_total", **labels) == 2
+        assert registry.counter("llm_requests_total", outcome="error", **labels) == 1
+
+        client = MockChatbotClient(faults=FaultModel(malformed_rate=1.0))
+        status, content = await client.chat_completion(PROMPT, AIModel(id="flaky"))
+        _, full = await MockChatbotClient().chat_completion(PROMPT, AIModel(id="flaky"))
+        assert status == 200 and full.startswith(content) and len(content) < len(full)
+
+        client = MockChatbotClient(faults=FaultModel(timeout_rate=1.0, timeout=0.01))
+        client.retry_policy.max_retries = 0
+        status, error = await client.chat_completion(PROMPT, AIModel(id="flaky"))
+        assert status == 500 and "timed out" in error
+
+    asyncio.run(run())
+
+def test_mock_options_from_config():
+    options = mock_options({
+        "mock_latency": "lognormal:0.8,0.4",
+        "mock_tokens_per_second": "30",
+        "mock_error_rate": "0.05",
+        "mock_seed": "11"
+    })
+    assert options["latency"].kind == "lognormal"
+    assert options["tokens_per_second"] == 30.0
+    assert options["faults"].error_rate == 0.05
+    assert options["seed"] == 11
+    assert mock_options({}) == {}
+    assert not MockChatbotClient(**mock_options({})).simulated
+
+if __name__ == "__main__":
+    test_latency_models()
+    test_seeded_faults_are_reproducible()
+    test_simulated_latency_and_token_rate()
+    test_concurrency_cap_queues_requests()
+    test_injected_faults_are_retried_and_recorded()
+    test_mock_options_from_config()
+    print("Mock simulation tests passed")
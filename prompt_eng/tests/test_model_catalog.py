@@ -0,0 +1,87 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from prompt_eng.clients import ModelCatalog
+from prompt_eng.clients.models import AIModel
+
+class ModelSource:
+    """Counts fetches and serves a configurable model list"""
+    def __init__(self, ids):
+        self.ids = ids
+        self.fetches = 0
+
+    async def fetch(self):
+        self.fetches += 1
+        await asyncio.sleep(0.01)
+        return [AIModel(id=model_id) for model_id in self.ids]
+
+def test_fresh_models_are_served_from_the_catalog():
+    async def run():
+        catalog = ModelCatalog(ttl=60)
+        source = ModelSource(["llama2"])
+
+        first = await asyncio.gather(*[catalog.get_models("http://host", source.fetch) for _ in range(3)])
+        again = await catalog.get_models("http://host", source.fetch)
+
+        assert [m.id for m in again] == ["llama2"]
+        assert all([m.id for m in models] == ["llama2"] for models in first)
+        assert source.fetches == 1
+
+    asyncio.run(run())
+
+def test_stale_models_are_returned_while_refreshing_in_background():
+    async def run():
+        catalog = ModelCatalog(ttl=0)
+        source = ModelSource(["llama2"])
+        await catalog.get_models("http://host", source.fetch)
+
+        source.ids = ["llama2", "mistral"]
+        stale = await catalog.get_models("http://host", source.fetch)
+        assert [m.id for m in stale] == ["llama2"]
+
+        await asyncio.sleep(0.05)
+        catalog.ttl = 60
+        refreshed = await catalog.get_models("http://host", source.fetch)
+        assert [m.id for m in refreshed] == ["llama2", "mistral"]
+        assert source.fetches == 2
+
+    asyncio.run(run())
+
+def test_empty_model_lists_are_not_cached():
+    async def run():
+        catalog = ModelCatalog(ttl=60)
+        source = ModelSource([])
+        assert await catalog.get_models("http://host", source.fetch) == []
+
+        source.ids = ["llama2"]
+        assert [m.id for m in await catalog.get_models("http://host", source.fetch)] == ["llama2"]
+        assert [m.id for m in await catalog.get_models("http://host", source.fetch)] == ["llama2"]
+        assert source.fetches == 2
+
+    asyncio.run(run())
+
+def test_endpoint_type_is_probed_once():
+    async def run():
+        catalog = ModelCatalog()
+        probes = []
+
+        async def probe():
+            probes.append(1)
+            return "ollama"
+
+        assert await catalog.get_endpoint_type("http://host", probe) == "ollama"
+        assert await catalog.get_endpoint_type("http://host", probe) == "ollama"
+        assert len(probes) == 1
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_fresh_models_are_served_from_the_catalog()
+    test_stale_models_are_returned_while_refreshing_in_background()
+    test_empty_model_lists_are_not_cached()
+    test_endpoint_type_is_probed_once()
+    print("Model catalog tests passed")
@@ -0,0 +1,53 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from prompt_eng.benchmarks.fake_server import FakeLLMServer
+from prompt_eng.clients import OllamaClient, OpenWebUIClient
+from prompt_eng.clients.models import AIModel, ModelOptions, options_for
+
+def test_options_map_to_both_payload_styles():
+    options = ModelOptions(max_tokens=128, temperature=0.2, context_window_size=4096, stop=["\n\n"], num_batch=256)
+
+    assert options.to_openai_params() == {"max_tokens": 128, "temperature": 0.2, "stop": ["\n\n"]}
+    assert options.to_ollama_options() == {
+        "num_predict": 128, "temperature": 0.2, "num_ctx": 4096, "stop": ["\n\n"], "num_batch": 256
+    }
+    assert ModelOptions().to_openai_params() == {}
+
+def test_call_site_budgets():
+    assert options_for("intent").max_tokens < options_for("code").max_tokens
+    assert options_for("code", max_tokens=100).max_tokens == 100
+    # Overrides must not leak into the shared defaults
+    assert options_for("code").max_tokens == 4096
+    assert options_for("unknown") == ModelOptions()
+
+def test_options_are_sent_to_the_server():
+    async def run():
+        model = AIModel(id="fake-model")
+        options = ModelOptions(max_tokens=64, context_window_size=2048)
+        async with FakeLLMServer() as server:
+            async with OllamaClient(server.url) as client:
+                status, _ = await client.chat_completion("hi", model, options)
+                assert status == 200
+                # Native /api/chat takes every option under Ollama's names
+                assert server.requests[-1]["path"] == "/api/chat"
+                assert server.last_request["options"] == {"num_predict": 64, "num_ctx": 2048}
+                assert "max_tokens" not in server.last_request
+
+            async with OpenWebUIClient(server.url, bearer="test") as client:
+                status, _ = await client.chat_completion("hi", model, options)
+                assert status == 200
+                assert server.last_request["max_tokens"] == 64
+                assert "options" not in server.last_request
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_options_map_to_both_payload_styles()
+    test_call_site_budgets()
+    test_options_are_sent_to_the_server()
+    print("Model options tests passed")
@@ -0,0 +1,131 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from prompt_eng.clients.models import AIModel
+from prompt_eng.generator.bot_generator import CodeGenerator, describe_changes
+from prompt_eng.generator.patching import PatchError, apply_edit
+
+BOT = '''import json
+
+
+class WeatherBot:
+    def __init__(self, api_key):
+        self.api_key = api_key
+
+    def get_weather(self, location):
+        return {"location": location}
+
+    def update_location(self, location):
+        self.location = location
+
+
+if __name__ == "__main__":
+    print(WeatherBot("key").get_weather("Paris"))
+'''
+
+def test_unified_diff_with_wrong_line_numbers():
+    diff = """--- a/bot.py
++++ b/bot.py
+@@ -40,2 +40,5 @@
+     def get_weather(self, location):
+         return {"location": location}
++
++    def get_alerts(self, location):
++        return []
+"""
+    edited = apply_edit(BOT, diff)
+    assert "    def get_alerts(self, location):\n        return []\n\n    def update_location" in edited
+
+    with pytest.raises(PatchError):
+        apply_edit(BOT, "@@ -1,1 +1,1 @@\n-import yaml\n+import toml\n")
+    # A diff that breaks the syntax is rejected
+    with pytest.raises(PatchError):
+        apply_edit(BOT, "@@ -8,1 +8,1 @@\n-    def get_weather(self, location):\n+    def get_weather(self, location)\n")
+
+def test_function_replacements():
+    response = """Here are the changes:
+```python
+import datetime
+```
+```python
+    def get_weather(self, location):
+        return {"location": location, "at": datetime.datetime.now().isoformat()}
+
+    def get_alerts(self, location):
+        return []
+```"""
+    edited = apply_edit(BOT, response)
+    assert edited.startswith("import json\nimport datetime\n")
+    assert '"at": datetime.datetime.now().isoformat()' in edited
+    assert edited.index("def get_weather") < edited.index("def get_alerts") < edited.index("def update_location")
+    # Unchanged definitions are left exactly as they were
+    assert "    def update_location(self, location):\n        self.location = location\n" in edited
+
+    with pytest.raises(PatchError):
+        apply_edit(BOT, "Sure, I added the alerts feature.")
+
+def test_edit_falls_back_to_full_regeneration():
+    class Client:
+        def __init__(self):
+            self.prompts = []
+
+        async def chat_completion(self, message, model, options=None, system_prompt=None, history=None):
+            self.prompts.append(message)
+            if "Do not repeat the whole file" in message:
+                return 200, "```python\n    def get_weather(self, location)\n```"
+            return 200, BOT.replace("{\"location\": location}", "{}")
+
+    async def run():
+        generator = CodeGenerator()
+        generator.client, generator.model = Client(), AIModel(id="mock")
+        old = {"type": "weather", "features": ["forecast"]}
+        new = {"type": "weather", "features": ["alerts", "forecast"]}
+        assert describe_changes(old, new) == '- Add features: "alerts"'
+
+        code = await generator._generate_bot_code(new, {}, [], previous={"requirements": old, "bot_code": BOT})
+        assert len(generator.client.prompts) == 2
+        assert code == BOT.replace("{\"location\": location}", "{}")
+
+    asyncio.run(run())
+
+def test_edit_of_fenced_generated_code():
+    class Client:
+        def __init__(self):
+            self.prompts = []
+
+        async def chat_completion(self, message, model, options=None, system_prompt=None, history=None):
+            self.prompts.append(message)
+            if "Do not repeat the whole file" in message:
+                return 200, "```python\n    def get_alerts(self, location):\n        return []\n```"
+            return 200, f"Here is your bot:\n\n```python\n{BOT}```\n\nRun it with `python bot.py`."
+
+    async def run():
+        generator = CodeGenerator()
+        generator.client, generator.model = Client(), AIModel(id="mock")
+        old = {"type": "weather", "features": ["forecast"]}
+        new = {"type": "weather", "features": ["alerts", "forecast"]}
+
+        # The reply's prose and fences are not part of the stored code
+        code = await generator._generate_bot_code(old, {}, [])
+        assert code == BOT
+
+        # Bots stored with the whole reply are still edited rather than regenerated
+        raw = f"Here is your bot:\n\n```python\n{BOT}```"
+        edited = await generator._generate_bot_code(new, {}, [], previous={"requirements": old, "bot_code": raw})
+        assert len(generator.client.prompts) == 2
+        assert edited.startswith("import json\n") and "def get_alerts" in edited and "```" not in edited
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_unified_diff_with_wrong_line_numbers()
+    test_function_replacements()
+    test_edit_falls_back_to_full_regeneration()
+    test_edit_of_fenced_generated_code()
+    print("Patching tests passed")
@@ -0,0 +1,99 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from prompt_eng.generator.pipeline import GenerationPipeline, PipelineError, Stage
+
+def test_independent_stages_run_concurrently():
+    async def slow(**inputs):
+        await asyncio.sleep(0.05)
+        return sorted(inputs)
+
+    pipeline = GenerationPipeline([
+        Stage("a", slow, ["seed"]),
+        Stage("b", slow, ["seed"]),
+        Stage("c", slow, ["seed"]),
+        Stage("joined", lambda a, b, c: a + b + c, ["a", "b", "c"])
+    ])
+    assert pipeline.inputs == ["seed"]
+    assert pipeline.order[-1] == "joined"
+
+    started = time.perf_counter()
+    result = asyncio.run(pipeline.run({"seed": 1}))
+    assert time.perf_counter() - started < 0.12
+    assert result.outputs["joined"] == ["seed"] * 3
+    assert set(result.timings) == {"a", "b", "c", "joined"}
+
+def test_invalid_graphs_are_rejected():
+    with pytest.raises(ValueError):
+        GenerationPipeline([Stage("a", lambda b: b, ["b"]), Stage("b", lambda a: a, ["a"])])
+    with pytest.raises(ValueError):
+        asyncio.run(GenerationPipeline([Stage("a", lambda seed: seed, ["seed"])]).run({}))
+
+def test_resume_from_last_good_stage(tmp_path):
+    calls = []
+    fail = {"bot_code": True}
+
+    def stage(name):
+        def run(**inputs):
+            calls.append(name)
+            if fail.get(name):
+                raise RuntimeError(f"{name} broke")
+            return {name: inputs}
+        return run
+
+    pipeline = GenerationPipeline([
+        Stage("flow", stage("flow"), ["requirements"]),
+        Stage("rules", stage("rules"), ["requirements"]),
+        Stage("bot_code", stage("bot_code"), ["flow", "rules"]),
+        Stage("code", stage("code"), ["bot_code"], checkpoint=False)
+    ])
+
+    with pytest.raises(PipelineError) as failure:
+        asyncio.run(pipeline.run({"requirements": "v1"}, checkpoint_dir=tmp_path))
+    assert failure.value.stage == "bot_code"
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["flow.json", "rules.json"]
+
+    # The retry reruns only the failed stage and what depends on it
+    fail.clear()
+    calls.clear()
+    result = asyncio.run(pipeline.run({"requirements": "v1"}, checkpoint_dir=tmp_path))
+    assert calls == ["bot_code", "code"]
+    assert sorted(result.resumed) == ["flow", "rules"]
+    assert not tmp_path.exists()
+
+    # Changed inputs invalidate the checkpoints of the stages that read them
+    fail["code"] = True
+    with pytest.raises(PipelineError):
+        asyncio.run(pipeline.run({"requirements": "v1"}, checkpoint_dir=tmp_path))
+    fail.clear()
+    calls.clear()
+    result = asyncio.run(pipeline.run({"requirements": "v2"}, checkpoint_dir=tmp_path))
+    assert sorted(calls) == ["bot_code", "code", "flow", "rules"]
+    assert result.resumed == []
+
+def test_fallback_outputs_are_not_checkpointed(tmp_path):
+    pipeline = GenerationPipeline([
+        Stage("flow", lambda requirements: "template", ["requirements"], checkpoint=lambda flow: flow != "template"),
+        Stage("rules", lambda requirements: "generated", ["requirements"], checkpoint=lambda rules: rules != "template"),
+        Stage("code", lambda flow, rules: 1 / 0, ["flow", "rules"])
+    ])
+    with pytest.raises(PipelineError):
+        asyncio.run(pipeline.run({"requirements": "v1"}, checkpoint_dir=tmp_path))
+    assert [path.name for path in tmp_path.iterdir()] == ["rules.json"]
+
+if __name__ == "__main__":
+    import tempfile
+    test_independent_stages_run_concurrently()
+    test_invalid_graphs_are_rejected()
+    with tempfile.TemporaryDirectory() as directory:
+        test_resume_from_last_good_stage(Path(directory) / "checkpoints")
+    with tempfile.TemporaryDirectory() as directory:
+        test_fallback_outputs_are_not_checkpointed(Path(directory))
+    print("Pipeline tests passed")
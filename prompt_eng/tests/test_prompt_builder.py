@@ -0,0 +1,73 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from prompt_eng.clients import MockChatbotClient
+from prompt_eng.clients.models import AIModel
+from prompt_eng.manager.prompt_builder import PromptBuilder, estimate_tokens
+
+ACTIONS = ["create_bot", "list_bots", "get_bot_details", "update_bot", "delete_bot", "help"]
+
+def make_history(turns, length):
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"turn {i} " + "x" * length}
+        for i in range(turns)
+    ]
+
+def test_prompt_is_compact_and_keeps_recent_turns():
+    builder = PromptBuilder(context_window_size=4096)
+    history = make_history(12, 20)
+    prompt = builder.build("list my bots", {"bot_type": None, "waiting_for": "name"}, ["WeatherBot"],
+                           history, ACTIONS)
+
+    context = json.loads(prompt.split("Current context: ", 1)[1].split("\n", 1)[0])
+    assert [turn["content"].split()[1] for turn in context["last_messages"]] == [str(i) for i in range(7, 12)]
+    assert context["earlier"].startswith("7 earlier messages")
+    # Unset context fields are left out
+    assert context["current_conversation_context"] == {"waiting_for": "name"}
+    assert "\n  " not in prompt
+    assert builder.last_stats["prompt_tokens"] == estimate_tokens(prompt)
+
+def test_budget_is_enforced():
+    builder = PromptBuilder(context_window_size=1024, reserved_tokens=256)
+    bots = [f"Bot{i}" for i in range(300)]
+    prompt = builder.build("create a weather bot", {}, bots, make_history(10, 2000), ACTIONS,
+                           system_prompt="s" * 400)
+
+    assert estimate_tokens(prompt) <= builder.budget("s" * 400)
+    assert builder.last_stats["omitted_bots"] > 0
+    # The newest bots survive trimming
+    assert "Bot299" in prompt
+
+def test_budget_holds_for_very_large_input():
+    builder = PromptBuilder(context_window_size=512, reserved_tokens=256, max_message_chars=4000)
+    history = make_history(40, 4000)
+    actions = [f"action_{i}_" + "y" * 50 for i in range(100)]
+    prompt = builder.build("z" * 20000, {"waiting_for": "name"}, [f"Bot{i}" for i in range(1000)],
+                           history, actions)
+
+    assert estimate_tokens(prompt) <= builder.budget()
+    # The summary and actions go before the user's message is clipped
+    assert '"earlier"' not in prompt and "action_0_" not in prompt
+    assert "zzzz" in prompt
+
+def test_mock_client_still_parses_the_prompt():
+    async def run():
+        builder = PromptBuilder()
+        prompt = builder.build("list my bots", {}, ["WeatherBot", "ShopBot"], [], ACTIONS)
+        status, response = await MockChatbotClient().chat_completion(prompt, AIModel(id="mock"))
+        assert status == 200
+        assert "WeatherBot, ShopBot" in response
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_prompt_is_compact_and_keeps_recent_turns()
+    test_budget_is_enforced()
+    test_budget_holds_for_very_large_input()
+    test_mock_client_still_parses_the_prompt()
+    print("Prompt builder tests passed")
@@ -0,0 +1,58 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from prompt_eng.clients import CoalescingChatbotClient, SingleFlight
+from prompt_eng.clients.models import AIModel
+
+class SlowClient:
+    """Client whose responses take long enough for callers to overlap"""
+    def __init__(self):
+        self._system_prompt = ""
+        self.calls = 0
+
+    async def chat_completion(self, message, model, options=None, system_prompt=None, history=None):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return 200, f"reply to {message}"
+
+def test_identical_concurrent_requests_share_one_call():
+    async def run():
+        upstream = SlowClient()
+        client = CoalescingChatbotClient(upstream)
+        model = AIModel(id="test")
+
+        results = await asyncio.gather(*[client.chat_completion("weather bot flow", model) for _ in range(5)])
+        await client.chat_completion("different prompt", model)
+
+        assert results == [(200, "reply to weather bot flow")] * 5
+        assert upstream.calls == 2
+        assert client.stats == {"calls": 6, "upstream_calls": 2, "collapsed": 4}
+
+    asyncio.run(run())
+
+def test_cancelled_caller_does_not_cancel_shared_call():
+    async def run():
+        group = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        first = asyncio.ensure_future(group.do("key", work))
+        second = asyncio.ensure_future(group.do("key", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        assert await second == "done"
+        assert group.inflight == 0
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_identical_concurrent_requests_share_one_call()
+    test_cancelled_caller_does_not_cancel_shared_call()
+    print("All request coalescing tests passed")
@@ -0,0 +1,118 @@
+import asyncio
+import sys
+from pathlib import Path
+
+from aiohttp import web
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from prompt_eng.clients import CircuitBreaker, OllamaClient, RetryPolicy
+from prompt_eng.clients.models import AIModel
+from prompt_eng.clients.resilience import EndpointResilience, LatencyTracker, backoff_delay, parse_retry_after
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_backoff_and_retry_after():
+    assert backoff_delay(3, base_delay=0.5, max_delay=30, rng=lambda low, high: high) == 4.0
+    assert backoff_delay(10, base_delay=0.5, max_delay=30, rng=lambda low, high: high) == 30
+    assert all(0 <= backoff_delay(2) <= 2.0 for _ in range(50))
+
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0  # a date in the past
+    assert parse_retry_after("soon") is None
+    assert RetryPolicy(max_delay=10).delay(0, retry_after=120) == 10
+
+def test_circuit_breaker_states():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+
+    clock.now = 10
+    assert breaker.state == "half-open"
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # only one trial at a time
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock.now = 20
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+def test_timeout_follows_p99_latency():
+    tracker = LatencyTracker(default_timeout=60, min_timeout=1, headroom=2.0, min_samples=20)
+    assert tracker.timeout() == 60
+    for _ in range(50):
+        tracker.observe(0.5)
+    tracker.observe(3.0)
+    assert tracker.timeout() == 6.0
+    for _ in range(100):
+        tracker.observe(0.5)
+    assert tracker.timeout() == 1.0
+
+def test_call_sites_keep_their_own_timeouts():
+    endpoint = EndpointResilience("http://llm/api/chat", default_timeout=60)
+    for _ in range(50):
+        endpoint.latency("intent").observe(0.5)
+    # Fast intent calls must not shrink the timeout of long code generations
+    assert endpoint.latency("intent").timeout() == 5.0
+    assert endpoint.latency("code").timeout() == 60
+    assert endpoint.snapshot()["timeouts"] == {"code": 60, "intent": 5.0}
+
+def test_client_retries_and_fails_fast_when_circuit_is_open():
+    async def run():
+        attempts = []
+
+        async def flaky(request):
+            attempts.append(request.path)
+            if len(attempts) == 1:
+                return web.Response(status=503, headers={"Retry-After": "0"})
+            if len(attempts) == 2:
+                return web.json_response({"message": {"role": "assistant", "content": "recovered"}, "done": True})
+            return web.Response(status=502)
+
+        app = web.Application()
+        app.router.add_post("/api/chat", flaky)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", 0).start()
+        host = f"http://127.0.0.1:{runner.addresses[0][1]}"
+
+        try:
+            async with OllamaClient(host) as client:
+                client.retry_policy = RetryPolicy(max_retries=1, base_delay=0.01)
+                client._resilience_options = {"failure_threshold": 2, "recovery_timeout": 60}
+                model = AIModel(id="test")
+
+                assert await client.chat_completion("hi", model) == (200, "recovered")
+
+                status, error = await client.chat_completion("hi", model)
+                assert status == 500 and "after 2 attempts" in error
+
+                sent = len(attempts)
+                status, error = await client.chat_completion("hi", model)
+                assert status == 503 and "Circuit open" in error
+                assert len(attempts) == sent
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_backoff_and_retry_after()
+    test_circuit_breaker_states()
+    test_timeout_follows_p99_latency()
+    test_call_sites_keep_their_own_timeouts()
+    test_client_retries_and_fails_fast_when_circuit_is_open()
+    print("Resilience tests passed")
@@ -0,0 +1,90 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from prompt_eng.clients import CachedChatbotClient, ResponseCache, cache_enabled
+from prompt_eng.clients.models import AIModel, ModelOptions
+
+class CountingClient:
+    """Minimal client that counts upstream calls"""
+    def __init__(self):
+        self._system_prompt = ""
+        self.calls = 0
+
+    def set_system_prompt(self, prompt):
+        self._system_prompt = prompt
+
+    async def chat_completion(self, message, model, options=None, system_prompt=None, history=None):
+        self.calls += 1
+        return 200, f"reply to {message}"
+
+def test_memory_lru_eviction_and_ttl():
+    async def run():
+        cache = ResponseCache(max_entries=2, ttl=60, path=None)
+        await cache.set("a", "1")
+        await cache.set("b", "2")
+        await cache.get("a")
+        await cache.set("c", "3")
+        assert await cache.get("b") is None  # least recently used was evicted
+        assert await cache.get("a") == "1"
+
+        expiring = ResponseCache(ttl=0, path=None)
+        await expiring.set("a", "1")
+        assert await expiring.get("a") is None
+
+    asyncio.run(run())
+
+def test_disk_tier_survives_restart(tmp_path):
+    async def run():
+        path = tmp_path / "cache.sqlite"
+        await ResponseCache(path=path).set("key", "value")
+
+        restarted = ResponseCache(path=path)
+        assert await restarted.get("key") == "value"
+        assert restarted.stats["disk_hits"] == 1
+        assert await restarted.get("key") == "value"
+        assert restarted.stats["memory_hits"] == 1
+
+        await restarted.clear()
+        assert await ResponseCache(path=path).get("key") is None
+
+    asyncio.run(run())
+
+def test_cached_client_keys_and_bypass():
+    async def run():
+        upstream = CountingClient()
+        client = CachedChatbotClient(upstream, ResponseCache(path=None))
+        model = AIModel(id="test")
+
+        await client.chat_completion("hello", model)
+        await client.chat_completion("hello", model)
+        assert upstream.calls == 1
+
+        # Different options, system prompt or an explicit bypass all go upstream
+        await client.chat_completion("hello", model, ModelOptions(temperature=0.5))
+        client.set_system_prompt("be brief")
+        await client.chat_completion("hello", model)
+        await client.chat_completion("hello", model, use_cache=False)
+        assert upstream.calls == 4
+        assert client.stats["memory_hits"] == 1
+
+    asyncio.run(run())
+
+def test_caching_is_off_unless_enabled():
+    assert not cache_enabled(None, {})
+    assert cache_enabled(None, {"llm_cache": "true"})
+    # An explicit choice wins over the setting
+    assert not cache_enabled(False, {"llm_cache": "true"})
+    assert cache_enabled(True, {})
+
+if __name__ == "__main__":
+    import tempfile
+    test_memory_lru_eviction_and_ttl()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_disk_tier_survives_restart(Path(tmp))
+    test_cached_client_keys_and_bypass()
+    test_caching_is_off_unless_enabled()
+    print("All response cache tests passed")
@@ -0,0 +1,65 @@
+import asyncio
+import json
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from prompt_eng.benchmarks.fake_server import FakeLLMServer
+from prompt_eng.clients import OllamaClient
+from prompt_eng.clients.models import AIModel
+from prompt_eng.clients.sync import SyncChatbotClient, run_sync
+
+class _ServerThread:
+    """Runs a FakeLLMServer on its own loop so blocking code can call it"""
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.server = FakeLLMServer()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.server.start(), self.loop).result(5)
+        return self.server
+
+    def __exit__(self, *exc):
+        asyncio.run_coroutine_threadsafe(self.server.stop(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+
+def test_sync_client_round_trip():
+    model = AIModel(id="fake-model")
+    with _ServerThread() as server:
+        client = SyncChatbotClient(OllamaClient(server.url))
+        try:
+            assert [m.id for m in client.get_models()] == ["fake-model"]
+            status, response = client.chat_completion("hello", model, system_prompt="be brief")
+            assert status == 200
+            assert json.loads(response) == {"echo": "hello", "system": "be brief"}
+
+            results = client.chat_completion_many(["a", "b"], model)
+            assert [json.loads(body)["echo"] for _, body in results] == ["a", "b"]
+            # Attribute access falls through to the async client
+            assert client.host == server.url
+        finally:
+            client.close()
+
+def test_run_sync_refuses_running_loop():
+    async def inner():
+        return 1
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            run_sync(inner())
+
+    asyncio.run(run())
+    assert run_sync(inner()) == 1
+
+if __name__ == "__main__":
+    test_sync_client_round_trip()
+    test_run_sync_refuses_running_loop()
+    print("Sync facade tests passed")
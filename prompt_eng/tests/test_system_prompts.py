@@ -0,0 +1,48 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from prompt_eng.benchmarks.fake_server import FakeLLMServer
+from prompt_eng.clients import OllamaClient
+from prompt_eng.clients.models import AIModel
+
+def test_build_messages_prefers_per_call_prompt():
+    client = OllamaClient("http://localhost:11434")
+    client.set_system_prompt("default prompt")
+    history = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}]
+
+    assert client._build_messages("next") == [
+        {"role": "system", "content": "default prompt"},
+        {"role": "user", "content": "next"}
+    ]
+    assert client._build_messages("next", "call prompt", history) == [
+        {"role": "system", "content": "call prompt"},
+        *history,
+        {"role": "user", "content": "next"}
+    ]
+
+def test_concurrent_callers_keep_their_own_system_prompt():
+    async def run():
+        async with FakeLLMServer(response_delay=0.02) as server:
+            async with OllamaClient(server.url) as client:
+                model = AIModel(id="fake-model")
+                client.set_system_prompt("shared default")
+                results = await asyncio.gather(*[
+                    client.chat_completion(f"message {i}", model, system_prompt=f"caller {i}")
+                    for i in range(10)
+                ])
+
+        for i, (status, content) in enumerate(results):
+            assert status == 200
+            assert json.loads(content) == {"echo": f"message {i}", "system": f"caller {i}"}
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_build_messages_prefers_per_call_prompt()
+    test_concurrent_callers_keep_their_own_system_prompt()
+    print("System prompt tests passed")
@@ -0,0 +1,86 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from prompt_eng.benchmarks.fake_server import FakeLLMServer
+from prompt_eng.clients import ChatbotClientFactory, ModelWarmer, OllamaClient
+from prompt_eng.clients.models import AIModel
+
+class LoadingClient:
+    """Pays a load delay on the first request per model, like an idle Ollama server"""
+    def __init__(self, load_delay=0.2):
+        self.load_delay = load_delay
+        self.loaded = set()
+        self.calls = []
+
+    async def chat_completion(self, message, model, options=None, system_prompt=None, history=None):
+        self.calls.append((model.id, options.max_tokens))
+        if model.id not in self.loaded:
+            await asyncio.sleep(self.load_delay)
+            self.loaded.add(model.id)
+        return 200, "pong"
+
+def test_models_warm_up_concurrently():
+    async def run():
+        client = LoadingClient()
+        warmer = ModelWarmer(client, [AIModel(id="small"), AIModel(id="large")])
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        latencies = await warmer.warm_up()
+        elapsed = loop.time() - started
+
+        # Both models load at the same time
+        assert elapsed < 0.35
+        for model_id in ("small", "large"):
+            assert latencies[model_id]["cold"] >= 0.2
+            assert latencies[model_id]["warm"] < 0.1
+        # Pings only ask for a single token
+        assert all(max_tokens == 1 for _, max_tokens in client.calls)
+
+    asyncio.run(run())
+
+def test_background_pings_until_closed():
+    async def run():
+        client = LoadingClient(load_delay=0)
+        warmer = ModelWarmer(client, [AIModel(id="small")], ping_interval=0.02)
+        warmer.start()
+        await asyncio.sleep(0.1)
+        await warmer.aclose()
+        pings = len(client.calls)
+        await asyncio.sleep(0.05)
+
+        assert pings >= 3
+        assert len(client.calls) == pings
+
+    asyncio.run(run())
+
+def test_keep_alive_is_sent_to_ollama():
+    async def run():
+        async with FakeLLMServer() as server:
+            async with OllamaClient(server.url) as client:
+                client.keep_alive = "30m"
+                status, _ = await client.chat_completion("hi", AIModel(id="fake-model"))
+                assert status == 200
+                assert server.requests[-1]["path"] == "/api/chat"
+                assert server.last_request["keep_alive"] == "30m"
+
+                # Streams keep the model loaded too
+                client.keep_alive = -1
+                async for _ in client.stream_chat_completion("hi", AIModel(id="fake-model")):
+                    pass
+                assert server.last_request["keep_alive"] == -1
+
+        config = {"chatbot_api_host": "http://localhost:11434", "llm_keep_alive": "600"}
+        assert ChatbotClientFactory.create_client(config).keep_alive == 600
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test_models_warm_up_concurrently()
+    test_background_pings_until_closed()
+    test_keep_alive_is_sent_to_ollama()
+    print("Warm-up tests passed")